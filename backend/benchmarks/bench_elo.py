@@ -0,0 +1,24 @@
+import pytest
+from src.matchmaking.elo_service import EloService
+
+
+@pytest.mark.parametrize(
+    "winner_rating,loser_rating,winner_games,loser_games",
+    [
+        (1200, 1200, 50, 50),  # even match, established players
+        (1000, 1600, 5, 80),  # upset by a provisional player
+        (2500, 2450, 200, 200),  # experienced K-factor
+    ],
+    ids=["even", "upset", "experienced"],
+)
+def test_calculate_match_rating_changes(benchmark, winner_rating, loser_rating, winner_games, loser_games):
+    result = benchmark(
+        EloService.calculate_match_rating_changes,
+        winner_rating, loser_rating, winner_games, loser_games, False,
+    )
+    assert result
+
+
+def test_calculate_match_rating_changes_resignation(benchmark):
+    result = benchmark(EloService.calculate_match_rating_changes, 1200, 1250, 40, 40, True)
+    assert result
@@ -0,0 +1,65 @@
+import pytest
+from conftest import make_queue
+from src.matchmaking.connection import ConnectionSender
+from src.matchmaking.websocket_manager import WebSocketManager
+
+QUEUE_SIZES = [10, 100, 1000, 10000, 50000]
+
+# try_match_players compares every pair until it finds a match, so a queue
+# with no compatible pair costs O(n^2); larger sizes would take minutes per round
+NO_MATCH_QUEUE_SIZES = [10, 100, 500, 1000]
+
+
+class NullWebSocket:
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_manager(queue: dict) -> WebSocketManager:
+    manager = WebSocketManager()
+    manager.queue = queue
+    manager.matches = []
+
+    async def create_match(user1_id, user2_id, db):
+        # Only the pairing is measured; the queue is left untouched between rounds
+        manager.matches.append((user1_id, user2_id))
+
+    manager.create_match = create_match
+    return manager
+
+
+@pytest.mark.parametrize("size", QUEUE_SIZES)
+def test_try_match_players_typical_queue(benchmark, run_async, size):
+    """ELOs spread over 1000-1600: a compatible pair turns up near the front of the queue"""
+    manager = make_manager(make_queue(size, lambda i, rng: rng.randint(1000, 1600)))
+
+    benchmark(lambda: run_async(manager.try_match_players(db=None)))
+    assert manager.matches
+
+
+@pytest.mark.parametrize("size", NO_MATCH_QUEUE_SIZES)
+def test_try_match_players_no_compatible_pair(benchmark, run_async, size):
+    """Fresh queue with ELOs 101 apart: every pair is rejected (worst case)"""
+    manager = make_manager(make_queue(size, lambda i, rng: i * 101))
+
+    benchmark.pedantic(lambda: run_async(manager.try_match_players(db=None)), rounds=3, iterations=1)
+    assert not manager.matches
+
+
+@pytest.mark.parametrize("size", QUEUE_SIZES)
+def test_send_queue_updates(benchmark, run_async, size):
+    """Status computation, message encoding and enqueueing for every queued user"""
+    manager = WebSocketManager()
+    manager.queue = make_queue(size, lambda i, rng: rng.randint(800, 2000), wait_seconds=45)
+    for user_id in manager.queue:
+        # Writers are never started, so each sender keeps one coalesced status message
+        manager.senders[user_id] = ConnectionSender(user_id, NullWebSocket(), on_close=lambda *_: None)
+
+    benchmark(lambda: run_async(manager._send_queue_updates()))
+    assert all(sender.pending_count == 1 for sender in manager.senders.values())
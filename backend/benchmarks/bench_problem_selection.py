@@ -0,0 +1,57 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from src.matchmaking.completed_problems import ProblemIndex
+from src.matchmaking.service import TOPIC_MAPPING, resolve_problem_filters
+
+
+def player(topics, difficulty):
+    return SimpleNamespace(topics=topics, difficulty=difficulty)
+
+
+SCENARIOS = {
+    # Overlapping preferences: the common case
+    "shared": (player([str(i) for i in range(0, 20)], ["1", "2"]), player([str(i) for i in range(10, 30)], ["2", "3"])),
+    # Every topic selected by both players
+    "all_topics": (player([str(i) for i in range(71)], ["1", "2", "3"]), player([str(i) for i in range(71)], ["1", "2", "3"])),
+    # Disjoint preferences: combined-preferences fallback
+    "disjoint": (player(["0", "1", "2"], ["1"]), player(["40", "41", "42"], ["3"])),
+    # No preferences at all: popular defaults
+    "empty": (player(None, None), player([], [])),
+}
+
+
+@pytest.mark.parametrize("scenario", list(SCENARIOS))
+def test_resolve_problem_filters(benchmark, scenario):
+    user, opponent = SCENARIOS[scenario]
+    topic_slugs, difficulty_strings, _ = benchmark(resolve_problem_filters, user, opponent)
+    assert topic_slugs and difficulty_strings
+
+
+def make_catalog(size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        f"problem-{i}": {
+            "id": i,
+            "difficulty": rng.choice(["EASY", "MEDIUM", "HARD"]),
+            "paid_only": rng.random() < 0.15,
+            "topic_slugs": rng.sample(TOPIC_MAPPING[:20], rng.randint(1, 3)),
+        }
+        for i in range(1, size + 1)
+    }
+
+
+@pytest.mark.parametrize("played", [0, 500, 3000])
+def test_pick_unplayed_problem(benchmark, played):
+    # Two repeat-off players who have played `played` problems each, on a ~3500 problem catalog
+    index = ProblemIndex(make_catalog(3500))
+    rng = random.Random(1)
+    completed = [index.mask(f"problem-{i}" for i in rng.sample(range(1, 3501), played)) for _ in range(2)]
+    topics, difficulties = TOPIC_MAPPING[:3], ["MEDIUM"]
+
+    def pick():
+        eligible = index.bucket_mask(topics, difficulties) & ~(completed[0] | completed[1])
+        return index.pick(eligible, rng)
+
+    benchmark(pick)
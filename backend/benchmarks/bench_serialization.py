@@ -0,0 +1,53 @@
+import pytest
+from src.leetcode.schemas import Problem
+from src.matchmaking.encoding import encode_message
+from src.matchmaking.schemas import MatchResponse
+
+PROBLEM_DATA = {
+    "id": 1,
+    "title": "Two Sum",
+    "slug": "two-sum",
+    "difficulty": "Easy",
+    "tags": ["array", "hash-table"],
+    "acceptance_rate": "55.2",
+}
+
+
+@pytest.fixture
+def problem():
+    return Problem(**PROBLEM_DATA)
+
+
+def test_problem_validate(benchmark):
+    benchmark(Problem, **PROBLEM_DATA)
+
+
+def test_problem_dict(benchmark, problem):
+    # match_found payloads are built from problem.dict()
+    assert benchmark(problem.dict) == PROBLEM_DATA
+
+
+def test_problem_model_dump_json(benchmark, problem):
+    benchmark(problem.model_dump_json)
+
+
+def test_match_response_model_dump_json(benchmark, problem):
+    response = MatchResponse(
+        match_id=42,
+        opponent="opponent@example.com",
+        opponent_elo=1234,
+        opponent_profile_picture_url="/uploads/profile_pictures/2.png",
+        problem=problem.dict(),
+    )
+    benchmark(response.model_dump_json)
+
+
+def test_encode_match_found(benchmark, problem):
+    """The full match_found message as sent over the WebSocket"""
+    message = {
+        "type": "match_found",
+        "match_id": 42,
+        "problem": problem.dict(),
+        "opponent": {"username": "opponent", "elo": 1234, "profile_picture_url": "/uploads/profile_pictures/2.png"},
+    }
+    benchmark(encode_message, message)
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import random
+import sys
+import time
+
+import pytest
+
+# Make `src` importable when the benchmarks are run from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing here touches the database, but importing the app requires a URL
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+@pytest.fixture
+def run_async():
+    """Run a coroutine on one event loop shared by every round of a benchmark"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def make_queue(size: int, elo_for, wait_seconds: float = 0, seed: int = 1234) -> dict:
+    """Build a matchmaking queue of `size` users, elo_for(index, rng) -> ELO"""
+    rng = random.Random(seed)
+    now = time.time()
+    return {
+        user_id: {
+            "elo": elo_for(user_id, rng),
+            "websocket": None,
+            "join_time": now - wait_seconds - rng.uniform(0, 5),
+        }
+        for user_id in range(1, size + 1)
+    }
@@ -0,0 +1,22 @@
+"""
+One-shot seeding of the user_achievement_stats counters from match history.
+
+Run from the backend directory:
+    python -m scripts.backfill_achievement_stats
+"""
+import asyncio
+
+from src.database.database import AsyncSessionLocal, init_db
+from src.achievements.achievements import AchievementTracker
+
+
+async def main():
+    await init_db()  # Creates the counters table if it doesn't exist yet
+    async with AsyncSessionLocal() as db:
+        users = await AchievementTracker.backfill_counters(db)
+        await db.commit()
+    print(f"✅ Seeded achievement counters for {users} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Backfill problem_id, difficulty and topic_tags on existing match_history rows.
+
+Adds the columns if the table predates them, then resolves every distinct
+problem slug through the cached LeetCode problem catalog (one upstream call
+at most) and updates rows in batches.
+
+Run from the backend directory:
+    python -m scripts.backfill_match_problem_metadata [--refresh-catalog] [--batch-size 500]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from src.database.database import AsyncSessionLocal, async_engine, init_db
+from src.database.models import MatchHistory
+from src.leetcode.service.leetcode_service import LeetCodeService
+
+NEW_COLUMNS = {
+    "problem_id": "INTEGER NULL",
+    "difficulty": "VARCHAR(10) NULL",
+    "topic_tags": "JSON NULL",
+}
+PLACEHOLDER_SLUGS = ("TBD", "unknown")
+
+
+async def ensure_columns():
+    """Add the metadata columns and index to an existing match_history table"""
+    async with async_engine.begin() as conn:
+        existing = await conn.run_sync(
+            lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("match_history")}
+        )
+        for column, ddl in NEW_COLUMNS.items():
+            if column not in existing:
+                print(f"➕ Adding match_history.{column}")
+                await conn.execute(text(f"ALTER TABLE match_history ADD COLUMN {column} {ddl}"))
+
+        indexes = await conn.run_sync(
+            lambda sync_conn: {i["name"] for i in inspect(sync_conn).get_indexes("match_history")}
+        )
+        if "ix_match_history_winner_difficulty" not in indexes:
+            await conn.execute(text(
+                "CREATE INDEX ix_match_history_winner_difficulty ON match_history (winner_id, difficulty)"
+            ))
+
+
+async def backfill(batch_size: int, refresh_catalog: bool) -> int:
+    catalog = await LeetCodeService.get_problem_catalog(refresh=refresh_catalog)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(MatchHistory.leetcode_problem)
+            .where(MatchHistory.difficulty.is_(None))
+            .where(MatchHistory.leetcode_problem.not_in(PLACEHOLDER_SLUGS))
+            .distinct()
+        )
+        slugs = [row[0] for row in result.all()]
+
+        unresolved = [slug for slug in slugs if slug not in catalog]
+        if unresolved:
+            print(f"⚠️ {len(unresolved)} slugs not in catalog, leaving them as-is: {unresolved[:10]}")
+
+        params = [
+            {
+                "slug": slug,
+                "problem_id": catalog[slug]["id"],
+                "difficulty": catalog[slug]["difficulty"],
+                "topic_tags": catalog[slug]["tags"],
+            }
+            for slug in slugs
+            if slug in catalog
+        ]
+
+        statement = (
+            update(MatchHistory.__table__)
+            .where(MatchHistory.__table__.c.leetcode_problem == bindparam("slug"))
+            .where(MatchHistory.__table__.c.difficulty.is_(None))
+            .values(
+                problem_id=bindparam("problem_id"),
+                difficulty=bindparam("difficulty"),
+                topic_tags=bindparam("topic_tags"),
+            )
+        )
+
+        for start in range(0, len(params), batch_size):
+            batch = params[start:start + batch_size]
+            await db.execute(statement, batch)
+            await db.commit()
+            print(f"📝 Updated slugs {start + 1}-{start + len(batch)} of {len(params)}")
+
+    return len(params)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="Slugs updated per transaction")
+    parser.add_argument("--refresh-catalog", action="store_true", help="Re-download the problem catalog")
+    args = parser.parse_args()
+
+    await init_db()
+    await ensure_columns()
+    resolved = await backfill(args.batch_size, args.refresh_catalog)
+    print(f"✅ Backfilled problem metadata for {resolved} distinct problems")
+    print("   Re-run scripts/backfill_achievement_stats.py to recount difficulty wins.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
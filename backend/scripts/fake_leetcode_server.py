@@ -0,0 +1,350 @@
+"""
+Local stand-in for the LeetCode GraphQL API, for load tests and offline benchmarks.
+
+Serves every query in src/leetcode/service/graphql_queries.py (random problem,
+problem details, recent AC submissions, submission details, user profile and
+stats, problem list, and the batched per-user lookups) from an in-memory problem set generated from --seed.
+
+Upstream behaviour can be simulated, from the command line or at runtime via
+POST /_control/config:
+- latency: fixed base plus uniform jitter, optionally per operation
+- error_rate: fraction of requests answered with HTTP 500
+- graphql_error_rate: fraction answered 200 with a GraphQL "errors" list
+- rate_limit / burst: token bucket; excess requests get HTTP 429
+
+Control endpoints:
+    POST /_control/accept  {"username": "lt_player_1", "titleSlug": "fake-problem-3"}
+    POST /_control/profile {"username": "alice", "aboutMe": "<verification hash>"}
+    POST /_control/config  {"latency_ms": 80, "error_rate": 0.01}
+    GET  /_control/stats
+
+Run from the backend directory:
+    python -m scripts.fake_leetcode_server --port 8765 --latency-ms 80 --jitter-ms 40 --rate-limit 50
+and start the API with LEETCODE_GRAPHQL_URL=http://127.0.0.1:8765/graphql
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+TAGS = (
+    ("Array", "array"), ("String", "string"), ("Hash Table", "hash-table"),
+    ("Dynamic Programming", "dynamic-programming"), ("Math", "math"), ("Sorting", "sorting"),
+    ("Greedy", "greedy"), ("Depth-First Search", "depth-first-search"), ("Binary Search", "binary-search"),
+    ("Tree", "tree"), ("Graph", "graph"), ("Two Pointers", "two-pointers"),
+)
+
+_OPERATION_NAME = re.compile(r"\b(?:query|mutation)\s+(\w+)")
+# Batched user lookups: u0: matchedUser(username: $u0) { ... }
+_ALIASED_USER_FIELD = re.compile(r"(\w+):\s*(matchedUser|recentAcSubmissionList)\(username:\s*\$(\w+)")
+
+
+@dataclass
+class FakeConfig:
+    """Simulated upstream behaviour"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    operation_latency_ms: Dict[str, float] = field(default_factory=dict)  # Overrides latency_ms per operation
+    error_rate: float = 0.0
+    graphql_error_rate: float = 0.0
+    rate_limit: float = 0.0  # Requests per second, 0 = unlimited
+    burst: int = 10
+
+    def update(self, values: dict):
+        known = {f.name for f in fields(self)}
+        for key, value in values.items():
+            if key not in known:
+                raise ValueError(f"Unknown setting: {key}")
+            setattr(self, key, value)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def parse_operation_latency(spec: str) -> Dict[str, float]:
+    """'recentAcSubmissions=200,randomQuestionV2=50' -> {"recentAcSubmissions": 200.0, ...}"""
+    latencies = {}
+    for item in filter(None, spec.split(",")):
+        operation, latency = item.split("=", 1)
+        latencies[operation.strip()] = float(latency)
+    return latencies
+
+
+def operation_name(query: str) -> str:
+    match = _OPERATION_NAME.search(query)
+    return match.group(1) if match else "anonymous"
+
+
+def build_problems(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    problems = []
+    for i in range(1, count + 1):
+        tags = rng.sample(TAGS, rng.randint(1, 3))
+        problems.append({
+            "questionId": str(i),
+            "title": f"Fake Problem {i}",
+            "titleSlug": f"fake-problem-{i}",
+            "difficulty": DIFFICULTIES[i % 3],
+            "content": f"<p>Fake problem {i}</p>",
+            "paidOnly": False,
+            "stats": json.dumps({"acRate": f"{rng.uniform(20, 80):.1f}%"}),
+            "topicTags": [{"name": name, "slug": slug} for name, slug in tags],
+        })
+    return problems
+
+
+class FakeLeetCode:
+    """In-memory problems and submissions plus request counters"""
+
+    def __init__(self, problem_count: int = 300, seed: int = 0, config: FakeConfig = None):
+        self.problems = build_problems(problem_count, seed)
+        self.by_slug = {p["titleSlug"]: p for p in self.problems}
+        self.submissions = defaultdict(list)  # username -> newest-first AC submissions
+        self.submission_code = {}
+        self.submission_ids = itertools.count(1_000_000)
+        self.about_me = {}  # username -> profile bio (registration verification)
+        self.requests = Counter()
+        self.failures = Counter()  # "http_500", "graphql_error", "rate_limited"
+        self.rng = random.Random(seed)
+        # Separate stream so fault injection does not change which problems are picked
+        self.fault_rng = random.Random(seed + 1)
+        self.config = config or FakeConfig()
+        self._bucket = None
+
+    def configure(self, values: dict):
+        self.config.update(values)
+        self._bucket = None
+
+    def latency_seconds(self, operation: str) -> float:
+        base = self.config.operation_latency_ms.get(operation, self.config.latency_ms)
+        jitter = self.fault_rng.uniform(0, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        return (base + jitter) / 1000
+
+    def fault(self) -> str:
+        """Injected failure for the next request, or "" to serve it normally"""
+        if self.config.rate_limit:
+            if self._bucket is None:
+                self._bucket = TokenBucket(self.config.rate_limit, self.config.burst)
+            if not self._bucket.take():
+                return "rate_limited"
+        if self.config.error_rate and self.fault_rng.random() < self.config.error_rate:
+            return "http_500"
+        if self.config.graphql_error_rate and self.fault_rng.random() < self.config.graphql_error_rate:
+            return "graphql_error"
+        return ""
+
+    def accept(self, username: str, title_slug: str) -> dict:
+        problem = self.by_slug[title_slug]
+        submission_id = next(self.submission_ids)
+        submission = {
+            "id": str(submission_id),
+            "title": problem["title"],
+            "titleSlug": title_slug,
+            "timestamp": str(int(time.time())),
+            "lang": "python3",
+            "runtime": f"{self.rng.randint(30, 200)} ms",
+            "memory": f"{self.rng.uniform(15, 20):.1f} MB",
+        }
+        self.submissions[username].insert(0, submission)
+        del self.submissions[username][20:]
+        self.submission_code[submission_id] = "class Solution:\n    def solve(self):\n        return 42\n"
+        return submission
+
+    def execute(self, query: str, variables: dict) -> dict:
+        aliased = _ALIASED_USER_FIELD.findall(query)
+        if aliased:
+            return {
+                alias: self._user_field(field, variables[variable], variables.get("limit"))
+                for alias, field, variable in aliased
+            }
+        if "randomQuestionV2" in query:
+            return {"randomQuestionV2": self._random_question(variables)}
+        if "recentAcSubmissionList" in query:
+            return {"recentAcSubmissionList": self._user_field(
+                "recentAcSubmissionList", variables["username"], variables.get("limit"))}
+        if "submissionDetails" in query:
+            return {"submissionDetails": self._submission_details(int(variables["submissionId"]))}
+        if "problemsetQuestionListV2" in query:
+            questions = [
+                {"id": p["questionId"], "titleSlug": p["titleSlug"], "difficulty": p["difficulty"].upper(),
+                 "paidOnly": False, "topicTags": p["topicTags"]}
+                for p in self.problems
+            ]
+            return {"problemsetQuestionListV2": {"questions": questions}}
+        if "matchedUser" in query:
+            return {"matchedUser": self._user_field("matchedUser", variables["username"])}
+        if "question(" in query:
+            return {"question": self.by_slug.get(variables.get("titleSlug"))}
+        raise ValueError(f"Unsupported query: {operation_name(query)}")
+
+    def _random_question(self, variables: dict) -> dict:
+        filters = variables.get("filtersV2") or {}
+        difficulties = set((filters.get("difficultyFilter") or {}).get("difficulties") or [])
+        topics = set((filters.get("topicFilter") or {}).get("topicSlugs") or [])
+        candidates = [
+            p for p in self.problems
+            if (not difficulties or p["difficulty"].upper() in difficulties)
+            # Generated problems carry few tags, so any shared topic counts as a match
+            and (not topics or topics & {tag["slug"] for tag in p["topicTags"]})
+        ]
+        if not candidates:
+            return None
+        return {"titleSlug": self.rng.choice(candidates)["titleSlug"]}
+
+    def _submission_details(self, submission_id: int) -> dict:
+        return {
+            "id": submission_id,
+            "runtime": 50,
+            "runtimeDisplay": "50 ms",
+            "runtimePercentile": 50.0,
+            "runtimeDistribution": "{}",
+            "memory": 17_000_000,
+            "memoryDisplay": "17 MB",
+            "memoryPercentile": 50.0,
+            "code": self.submission_code.get(submission_id, ""),
+            "timestamp": int(time.time()),
+            "lang": {"name": "python3", "verboseName": "Python3"},
+            "question": {"questionId": "1", "titleSlug": "fake-problem-1"},
+            "notes": "",
+            "topicTags": [],
+            "runtimeError": None,
+            "compileError": None,
+        }
+
+    def _user_field(self, field: str, username: str, limit: int = None):
+        if field == "recentAcSubmissionList":
+            return self.submissions.get(username, [])[:limit or 15]
+        return self._matched_user(username)
+
+    def _matched_user(self, username: str) -> dict:
+        solved = len({s["titleSlug"] for s in self.submissions.get(username, [])})
+        return {
+            "username": username,
+            "profile": {"ranking": 100_000, "userAvatar": "", "realName": username,
+                        "aboutMe": self.about_me.get(username, "")},
+            "submitStats": {"acSubmissionNum": [
+                {"difficulty": "All", "count": solved},
+                {"difficulty": "Easy", "count": solved},
+                {"difficulty": "Medium", "count": 0},
+                {"difficulty": "Hard", "count": 0},
+            ]},
+        }
+
+
+def create_app(fake: FakeLeetCode) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        body = await request.json()
+        query = body.get("query", "")
+        operation = operation_name(query)
+        fake.requests[operation] += 1
+
+        failure = fake.fault()
+        if failure:
+            fake.failures[failure] += 1
+        if failure == "rate_limited":
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+
+        latency = fake.latency_seconds(operation)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if failure == "http_500":
+            return JSONResponse({"error": "Internal Server Error"}, status_code=500)
+        if failure == "graphql_error":
+            return {"data": None, "errors": [{"message": "Simulated upstream error"}]}
+        try:
+            return {"data": fake.execute(query, body.get("variables") or {})}
+        except (KeyError, ValueError) as e:
+            return {"data": None, "errors": [{"message": str(e)}]}
+
+    @app.post("/_control/accept")
+    async def accept(request: Request):
+        body = await request.json()
+        return fake.accept(body["username"], body["titleSlug"])
+
+    @app.post("/_control/profile")
+    async def profile(request: Request):
+        body = await request.json()
+        fake.about_me[body["username"]] = body.get("aboutMe", "")
+        return {"status": "ok"}
+
+    @app.post("/_control/config")
+    async def config(request: Request):
+        try:
+            fake.configure(await request.json())
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return asdict(fake.config)
+
+    @app.get("/_control/stats")
+    async def stats():
+        return {
+            "requests": dict(fake.requests),
+            "failures": dict(fake.failures),
+            "users_with_submissions": len(fake.submissions),
+            "config": asdict(fake.config),
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LeetCode GraphQL server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--problems", type=int, default=300, help="Number of generated problems")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random latency added on top")
+    parser.add_argument("--operation-latency", default="",
+                        help="Per-operation latency, e.g. recentAcSubmissions=200,randomQuestionV2=50")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--graphql-error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a GraphQL error")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before HTTP 429 (0 = off)")
+    parser.add_argument("--burst", type=int, default=10, help="Requests allowed above the rate limit in a burst")
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        operation_latency_ms=parse_operation_latency(args.operation_latency),
+        error_rate=args.error_rate,
+        graphql_error_rate=args.graphql_error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    fake = FakeLeetCode(args.problems, args.seed, config)
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
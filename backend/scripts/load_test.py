@@ -0,0 +1,326 @@
+"""
+Matchmaking load test: N simulated players over the matchmaking WebSocket.
+
+By default this starts everything it needs:
+- a fresh SQLite database seeded with load-test users
+- scripts/fake_leetcode_server.py as the LeetCode GraphQL API
+- the API server (uvicorn src.main:app) pointed at both
+
+Each player connects, joins the queue, and when matched either submits
+(after registering an accepted submission on the fake server) or resigns,
+then queues again until the run ends. The report covers match formation
+latency percentiles, throughput and server CPU.
+
+Run from the backend directory:
+    python -m scripts.load_test --players 200 --duration 60
+    python -m scripts.load_test --players 2000 --spawn-rate 200 --resign-ratio 0.2
+    python -m scripts.load_test --database-url mysql+aiomysql://... --api-url http://127.0.0.1:8000 --server-pid 1234
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME_PREFIX = "lt_player_"
+
+
+# -------------------------------------------------------------------
+# Environment setup
+# -------------------------------------------------------------------
+
+async def seed_users(database_url: str, count: int, seed: int) -> Dict[str, int]:
+    """Create (or reset) the load-test users. Returns leetcode_username -> user_id."""
+    os.environ["DATABASE_URL"] = database_url
+    from sqlalchemy import delete, select
+    from src.database.database import AsyncSessionLocal, async_engine, init_db
+    from src.database.models import User
+
+    await init_db()
+    rng = random.Random(seed)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.leetcode_username.like(f"{USERNAME_PREFIX}%")))
+        db.add_all([
+            User(
+                email=f"{USERNAME_PREFIX}{i}@loadtest.local",
+                hashed_password="!",
+                leetcode_username=f"{USERNAME_PREFIX}{i}",
+                user_elo=int(rng.gauss(1200, 150)),
+                repeating_questions=True,
+            )
+            for i in range(count)
+        ])
+        await db.commit()
+        rows = await db.execute(
+            select(User.leetcode_username, User.id).where(User.leetcode_username.like(f"{USERNAME_PREFIX}%"))
+        )
+        users = dict(rows.all())
+    await async_engine.dispose()
+    return users
+
+
+def start_process(args: List[str], env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_for_http(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of the full line (11 and 12 after the command name)
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+# -------------------------------------------------------------------
+# Simulated players
+# -------------------------------------------------------------------
+
+class RunFinished(Exception):
+    """The run ended while this player was waiting in the queue"""
+
+
+class Stats:
+    def __init__(self):
+        self.match_latencies: List[float] = []  # join_queue -> match_found
+        self.completion_latencies: List[float] = []  # submit/resign -> match_completed
+        self.matches_found = 0
+        self.matches_completed = 0
+        self.messages = Counter()
+        self.errors = Counter()
+
+
+class Player:
+    def __init__(self, user_id: int, username: str, config, users: Dict[str, int],
+                 stats: Stats, control: httpx.AsyncClient, deadline: float):
+        self.user_id = user_id
+        self.username = username
+        self.config = config
+        self.users = users
+        self.stats = stats
+        self.control = control
+        self.deadline = deadline
+
+    async def run(self):
+        url = f"{self.config.ws_url}/matchmaking/ws/matchmaking/{self.user_id}"
+        try:
+            async with websockets.connect(url, open_timeout=30, max_queue=None) as ws:
+                while time.monotonic() < self.deadline:
+                    await self.play_match(ws)
+        except RunFinished:
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.errors[type(e).__name__] += 1
+
+    async def receive(self, ws, *types: str, until: Optional[float] = None) -> dict:
+        until = until or self.deadline + self.config.grace
+        while True:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            message = json.loads(await asyncio.wait_for(ws.recv(), timeout=remaining))
+            self.stats.messages[message.get("type")] += 1
+            if message.get("type") in ("error", "match_error", "submission_invalid"):
+                self.stats.errors[message["type"]] += 1
+            if message.get("type") in types:
+                return message
+
+    async def play_match(self, ws):
+        joined_at = time.perf_counter()
+        await ws.send(json.dumps({"type": "join_queue"}))
+        try:
+            found = await self.receive(ws, "match_found", until=self.deadline)
+        except asyncio.TimeoutError:
+            # Still queued when the run ended: not a failure
+            await ws.send(json.dumps({"type": "leave_queue"}))
+            raise RunFinished()
+        self.stats.match_latencies.append(time.perf_counter() - joined_at)
+        self.stats.matches_found += 1
+
+        match_id = found["match_id"]
+        opponent_id = self.users.get(found["opponent"]["username"], self.user_id)
+
+        # Both players derive the same plan from the match id; the lower id acts
+        plan = random.Random(match_id)
+        resign = plan.random() < self.config.resign_ratio
+        if self.user_id < opponent_id:
+            await self.receive(ws, "timer_update")  # Countdown has started
+            await asyncio.sleep(self.config.solve_seconds)
+            acted_at = time.perf_counter()
+            if resign:
+                await ws.send(json.dumps({"type": "resign_match", "match_id": match_id}))
+            else:
+                await self.control.post("/_control/accept", json={
+                    "username": self.username,
+                    "titleSlug": found["problem"]["slug"],
+                })
+                await ws.send(json.dumps({"type": "submit_solution", "match_id": match_id}))
+            await self.receive(ws, "match_completed")
+            self.stats.completion_latencies.append(time.perf_counter() - acted_at)
+            self.stats.matches_completed += 1
+        else:
+            await self.receive(ws, "match_completed")
+
+        await asyncio.sleep(self.config.requeue_seconds)
+
+
+# -------------------------------------------------------------------
+# Reporting
+# -------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def report(config, stats: Stats, elapsed: float, cpu_seconds: Optional[float]):
+    print("\n📊 Load test results")
+    print(f"   players: {config.players}   duration: {elapsed:.1f}s")
+    print(f"   matches found: {stats.matches_found // 2}   completed: {stats.matches_completed}")
+    print(f"   throughput: {stats.matches_completed / elapsed:.2f} matches/s")
+    for label, values in (("match formation", stats.match_latencies),
+                          ("submit/resign -> completed", stats.completion_latencies)):
+        if values:
+            print(
+                f"   {label} latency (s): p50={percentile(values, 50):.3f} p90={percentile(values, 90):.3f} "
+                f"p99={percentile(values, 99):.3f} max={max(values):.3f} (n={len(values)})"
+            )
+    if cpu_seconds is not None:
+        print(f"   server CPU: {cpu_seconds:.1f}s ({cpu_seconds / elapsed * 100:.0f}% of one core)")
+    if stats.errors:
+        print(f"   errors: {dict(stats.errors)}")
+    print(f"   messages received: {dict(stats.messages)}")
+
+
+# -------------------------------------------------------------------
+# Entry point
+# -------------------------------------------------------------------
+
+async def run(config):
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    database_url = config.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    processes = []
+
+    users = await seed_users(database_url, config.players, config.seed)
+    print(f"🌱 Seeded {len(users)} players ({database_url.split('://')[0]})")
+
+    control_url = config.fake_leetcode_url
+    if not control_url:
+        control_url = f"http://127.0.0.1:{config.fake_port}"
+        processes.append(start_process(
+            [sys.executable, "-m", "scripts.fake_leetcode_server", "--port", str(config.fake_port),
+             "--latency-ms", str(config.fake_latency_ms), "--jitter-ms", str(config.fake_jitter_ms),
+             "--error-rate", str(config.fake_error_rate), "--rate-limit", str(config.fake_rate_limit),
+             "--seed", str(config.seed)],
+            dict(os.environ), os.path.join(workdir, "fake_leetcode.log"),
+        ))
+        await wait_for_http(f"{control_url}/_control/stats")
+
+    api_url = config.api_url
+    server_pid = config.server_pid
+    if not api_url:
+        api_url = f"http://127.0.0.1:{config.api_port}"
+        tokens_file = os.path.join(workdir, "leetcode_tokens.json")
+        with open(tokens_file, "w") as f:
+            json.dump({"LEETCODE_SESSION": "loadtest", "csrftoken": "loadtest"}, f)
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            LEETCODE_GRAPHQL_URL=f"{control_url}/graphql",
+            LEETCODE_TOKENS_FILE=tokens_file,
+            TOPIC_MAP_CACHE_FILE=os.path.join(workdir, "topic_map_cache.json"),
+            PROBLEM_CATALOG_CACHE_FILE=os.path.join(workdir, "problem_catalog_cache.json"),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        )
+        server = start_process(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(config.api_port), "--log-level", "warning"],
+            env, os.path.join(workdir, "api.log"),
+        )
+        processes.append(server)
+        server_pid = server.pid
+        await wait_for_http(f"{api_url}/")
+    config.ws_url = api_url.replace("http", "ws", 1)
+    print(f"🚀 API at {api_url}, fake LeetCode at {control_url} (logs in {workdir})")
+
+    stats = Stats()
+    cpu_before = process_cpu_seconds(server_pid) if server_pid else None
+    started = time.monotonic()
+    deadline = started + config.duration
+    try:
+        limits = httpx.Limits(max_connections=100)
+        async with httpx.AsyncClient(base_url=control_url, limits=limits, timeout=30) as control:
+            tasks = []
+            for index, (username, user_id) in enumerate(sorted(users.items(), key=lambda item: item[1])):
+                player = Player(user_id, username, config, users, stats, control, deadline)
+                tasks.append(asyncio.create_task(player.run()))
+                if config.spawn_rate and (index + 1) % config.spawn_rate == 0:
+                    await asyncio.sleep(1)
+            await asyncio.wait(tasks, timeout=config.duration + config.grace + 5)
+            for task in tasks:
+                task.cancel()
+        elapsed = time.monotonic() - started
+        cpu_after = process_cpu_seconds(server_pid) if server_pid else None
+        cpu_seconds = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+        report(config, stats, elapsed, cpu_seconds)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matchmaking WebSocket load test")
+    parser.add_argument("--players", type=int, default=100, help="Number of simulated players")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to keep starting new matches")
+    parser.add_argument("--spawn-rate", type=int, default=100, help="Players connected per second (0 = all at once)")
+    parser.add_argument("--resign-ratio", type=float, default=0.3, help="Fraction of matches ended by resignation")
+    parser.add_argument("--solve-seconds", type=float, default=5.0, help="Delay between countdown start and submit/resign")
+    parser.add_argument("--requeue-seconds", type=float, default=1.0, help="Pause before queueing again")
+    parser.add_argument("--grace", type=float, default=30.0, help="Extra seconds allowed for in-flight matches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="Database to seed (default: fresh SQLite file)")
+    parser.add_argument("--api-url", help="Use an already running API instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of an external API server, for CPU reporting")
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--fake-leetcode-url", help="Use an already running fake LeetCode server")
+    parser.add_argument("--fake-port", type=int, default=8765)
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="Simulated LeetCode latency")
+    parser.add_argument("--fake-jitter-ms", type=float, default=0.0, help="Simulated LeetCode latency jitter")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="Fraction of LeetCode calls failing")
+    parser.add_argument("--fake-rate-limit", type=float, default=0.0, help="LeetCode requests/s before 429s")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
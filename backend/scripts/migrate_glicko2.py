@@ -0,0 +1,56 @@
+"""
+Prepare an existing database for RATING_SYSTEM=glicko2.
+
+Adds the Glicko-2 columns to users and match_history (new databases get them
+from init_db) and creates the rating_periods table. Every user starts at
+1500 / 350 / 0.06; the first rating period then rates all existing matches.
+
+Run from the backend directory:
+    python -m scripts.migrate_glicko2
+"""
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from src.database.database import async_engine, init_db
+
+NEW_COLUMNS = {
+    "users": {
+        "glicko_rating": "FLOAT NOT NULL DEFAULT 1500",
+        "glicko_rd": "FLOAT NOT NULL DEFAULT 350",
+        "glicko_volatility": "FLOAT NOT NULL DEFAULT 0.06",
+    },
+    "match_history": {
+        "rating_period_id": "INTEGER NULL REFERENCES rating_periods(period_id)",
+    },
+}
+
+
+async def ensure_columns():
+    async with async_engine.begin() as conn:
+        for table, columns in NEW_COLUMNS.items():
+            existing = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(table)}
+            )
+            for column, ddl in columns.items():
+                if column not in existing:
+                    print(f"➕ Adding {table}.{column}")
+                    await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+        indexes = await conn.run_sync(
+            lambda sync_conn: {i["name"] for i in inspect(sync_conn).get_indexes("match_history")}
+        )
+        if "ix_match_history_rating_period_id" not in indexes:
+            await conn.execute(text(
+                "CREATE INDEX ix_match_history_rating_period_id ON match_history (rating_period_id)"
+            ))
+
+
+async def main():
+    await init_db()  # Creates rating_periods if it doesn't exist yet
+    await ensure_columns()
+    print("✅ Database ready for RATING_SYSTEM=glicko2")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
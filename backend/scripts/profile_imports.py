@@ -0,0 +1,72 @@
+"""
+Import-time profile of the API process.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the slowest imports, the total cold-start time and any heavy optional
+dependencies that were pulled in at startup.
+
+Run from the backend directory:
+    python -m scripts.profile_imports
+    python -m scripts.profile_imports --module src.main --top 40
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only be imported on first use, never at app startup
+HEAVY_MODULES = ("playwright", "PIL", "numpy")
+
+
+def run_importtime(module: str = "src.main") -> list:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns [(module_name, self_us, cumulative_us), ...] in import order.
+    """
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the backend")
+    parser.add_argument("--module", default="src.main", help="Module to import (default: src.main)")
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    rows = run_importtime(args.module)
+    by_name = {name: cumulative for name, _, cumulative in rows}
+    total_us = by_name.get(args.module, 0)
+
+    print(f"⏱️  import {args.module}: {total_us / 1000:.1f} ms ({len(rows)} modules)\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    loaded_heavy = [module for module in HEAVY_MODULES if module in by_name]
+    if loaded_heavy:
+        print(f"\n⚠️  Heavy modules imported at startup: {', '.join(loaded_heavy)}")
+    else:
+        print(f"\n✅ No heavy modules imported at startup ({', '.join(HEAVY_MODULES)})")
+
+
+if __name__ == "__main__":
+    main()
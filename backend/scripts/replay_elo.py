@@ -0,0 +1,77 @@
+"""
+Recompute every user's ELO by replaying match history, e.g. after changing
+the K-factors or the resignation penalty in EloService.
+
+Prints a diff report against the stored ratings; --apply writes the replayed
+ratings and per-match ELO changes back in bulk.
+
+Run from the backend directory:
+    python -m scripts.replay_elo
+    python -m scripts.replay_elo --provisional-k 48 --resignation-penalty 5 --output report.json
+    python -m scripts.replay_elo --apply
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import time
+
+from src.matchmaking.elo_replay import EloParameters, run_replay
+
+PARAMETER_FLAGS = {
+    "provisional_k": "K-factor for provisional players",
+    "default_k": "K-factor for established players",
+    "experienced_k": "K-factor for highly rated players",
+    "provisional_games": "Games before a player stops being provisional",
+    "experienced_rating": "Rating from which the experienced K-factor applies",
+    "resignation_penalty": "Extra points a resigning player loses",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    current = EloParameters.current()
+    for name, help_text in PARAMETER_FLAGS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=int, default=getattr(current, name),
+            help=f"{help_text} (default: {getattr(current, name)})",
+        )
+    parser.add_argument("--apply", action="store_true", help="Write the replayed ratings back to the database")
+    parser.add_argument("--top", type=int, default=20, help="Largest rating changes to list")
+    parser.add_argument("--output", help="Also write the full report as JSON to this file")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    params = dataclasses.replace(EloParameters.current(), **{name: getattr(args, name) for name in PARAMETER_FLAGS})
+
+    start = time.perf_counter()
+    report = await run_replay(params, apply=args.apply, top=args.top)
+    elapsed = time.perf_counter() - start
+
+    print(f"🔁 Replayed {report['matches']} matches for {report['users']} users "
+          f"in {report['rounds']} rounds ({elapsed:.2f}s)")
+    print(f"   Parameters: {report['parameters']}")
+    print(f"   Resignations detected: {report['resignations']}")
+    print(f"   Users with a different rating: {report['users_changed']} "
+          f"(mean |Δ| {report['mean_abs_delta']}, max |Δ| {report['max_abs_delta']})")
+    print(f"   Matches with different ELO changes: {report['matches_changed']}")
+    for change in report["largest_changes"]:
+        print(f"   user {change['user_id']:>8}: {change['current_elo']:>5} -> {change['replayed_elo']:>5} "
+              f"({change['delta']:+d}, {change['games_played']} games)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.output}")
+
+    if args.apply:
+        applied = report["applied"]
+        print(f"✅ Updated {applied['users_updated']} users and {applied['matches_updated']} matches")
+    else:
+        print("ℹ️ Dry run - pass --apply to write the replayed ratings")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
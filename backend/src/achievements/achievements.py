@@ -1,6 +1,8 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
-from ..database.models import User, MatchHistory
+from sqlalchemy import select, func
+from ..database.models import User, MatchHistory, UserAchievementStats
 
 ACHIEVEMENTS = [
     {
@@ -53,32 +55,156 @@ ACHIEVEMENTS = [
     }
 ]
 
+@dataclass
+class MatchCompletedEvent:
+    """Outcome of a finished match, as needed to update achievement counters"""
+    winner_id: int
+    loser_id: int
+    difficulty: Optional[str] = None  # "Easy", "Medium" or "Hard" (LeetCode casing)
+
+
 class AchievementTracker:
     """Handles achievement tracking and validation for users"""
-    
+
+    @staticmethod
+    async def on_match_completed(event: MatchCompletedEvent, db: AsyncSession) -> Dict[int, list]:
+        """
+        Apply a completed match to both players' counters and unlock achievements.
+        Must be called after the match itself has been committed.
+        Returns user_id -> list of newly unlocked achievement objects.
+        """
+        difficulty_column = AchievementTracker._difficulty_column(event.difficulty)
+        newly_unlocked = {}
+
+        for user_id, won in ((event.winner_id, True), (event.loser_id, False)):
+            counters, seeded = await AchievementTracker._get_or_seed_counters(user_id, db)
+
+            # Freshly seeded counters already include this (committed) match
+            if not seeded:
+                counters.games_played += 1
+                if won:
+                    counters.wins += 1
+                    if difficulty_column:
+                        setattr(counters, difficulty_column, getattr(counters, difficulty_column) + 1)
+
+            newly_unlocked[user_id] = await AchievementTracker._unlock_from_counters(user_id, counters, db)
+
+        await db.commit()
+        return newly_unlocked
+
     @staticmethod
     async def check_achievements(user_id: int, db: AsyncSession, event_type: str = "match_completed") -> list:
         """
-        Check and update achievements for a user after a match event.
+        Check and update achievements for a user from their stored counters.
         Returns list of newly unlocked achievement objects.
         """
-        # Get user data
+        counters, _ = await AchievementTracker._get_or_seed_counters(user_id, db)
+        newly_unlocked = await AchievementTracker._unlock_from_counters(user_id, counters, db)
+
+        # Save counters (if just seeded) and any unlocked achievements
+        await db.commit()
+        return newly_unlocked
+
+    @staticmethod
+    async def backfill_counters(db: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        One-shot rebuild of achievement counters from match history.
+        Rebuilds every user when user_ids is None. Returns number of users written.
+        """
+        rebuild_all = user_ids is None
+        user_ids = list(user_ids) if not rebuild_all else None
+
+        def only_users(query, column):
+            return query.where(column.in_(user_ids)) if user_ids is not None else query
+
+        games = {}
+        for column in (MatchHistory.winner_id, MatchHistory.loser_id):
+            result = await db.execute(
+                only_users(
+                    select(column, func.count(MatchHistory.match_id))
+                    .where(MatchHistory.elo_change != 0)  # Only completed matches
+                    .group_by(column),
+                    column,
+                )
+            )
+            for user_id, count in result.all():
+                games[user_id] = games.get(user_id, 0) + count
+
+        # Wins per difficulty, aggregated on the (winner_id, difficulty) index
+        wins = {}
+        result = await db.execute(
+            only_users(
+                select(MatchHistory.winner_id, MatchHistory.difficulty, func.count(MatchHistory.match_id))
+                .where(MatchHistory.elo_change != 0)
+                .group_by(MatchHistory.winner_id, MatchHistory.difficulty),
+                MatchHistory.winner_id,
+            )
+        )
+        for user_id, difficulty, count in result.all():
+            user_wins = wins.setdefault(user_id, {"wins": 0, "easy_wins": 0, "medium_wins": 0, "hard_wins": 0})
+            user_wins["wins"] += count
+            difficulty_column = AchievementTracker._difficulty_column(difficulty)
+            if difficulty_column:
+                user_wins[difficulty_column] += count
+
+        existing_query = select(UserAchievementStats)
+        if rebuild_all:
+            user_ids = list(set(games) | set(wins))
+        else:
+            existing_query = existing_query.where(UserAchievementStats.user_id.in_(user_ids))
+
+        existing_result = await db.execute(existing_query)
+        existing = {row.user_id: row for row in existing_result.scalars().all()}
+
+        for user_id in user_ids:
+            counters = existing.get(user_id)
+            if counters is None:
+                counters = UserAchievementStats(user_id=user_id)
+                db.add(counters)
+            user_wins = wins.get(user_id, {})
+            counters.games_played = games.get(user_id, 0)
+            counters.wins = user_wins.get("wins", 0)
+            counters.easy_wins = user_wins.get("easy_wins", 0)
+            counters.medium_wins = user_wins.get("medium_wins", 0)
+            counters.hard_wins = user_wins.get("hard_wins", 0)
+
+        await db.flush()
+        return len(user_ids)
+
+    @staticmethod
+    async def _get_or_seed_counters(user_id: int, db: AsyncSession):
+        """Load a user's counters, seeding them from history the first time. Returns (counters, seeded)."""
+        result = await db.execute(
+            select(UserAchievementStats).where(UserAchievementStats.user_id == user_id)
+        )
+        counters = result.scalar_one_or_none()
+        if counters:
+            return counters, False
+
+        await AchievementTracker.backfill_counters(db, [user_id])
+        result = await db.execute(
+            select(UserAchievementStats).where(UserAchievementStats.user_id == user_id)
+        )
+        return result.scalar_one(), True
+
+    @staticmethod
+    async def _unlock_from_counters(user_id: int, counters: UserAchievementStats, db: AsyncSession) -> list:
+        """Mark achievements reached by the counters as unlocked (caller commits)"""
         user_result = await db.execute(select(User).where(User.id == user_id))
         user = user_result.scalar_one_or_none()
-        
+
         if not user:
             return []
-        
-        # Get user's match statistics
-        stats = await AchievementTracker._get_user_stats(user_id, db)
+
+        stats = AchievementTracker._stats_from_counters(counters)
         newly_unlocked = []
-        
+
         # Check each achievement
         for i, achievement in enumerate(ACHIEVEMENTS):
             # Skip if already unlocked
             if user.achievements[i]:
                 continue
-                
+
             # Check if achievement is unlocked
             if await AchievementTracker._check_achievement(i, stats, achievement):
                 user.achievements[i] = True
@@ -93,81 +219,31 @@ class AchievementTracker:
                 }
                 newly_unlocked.append(achievement_obj)
                 print(f"🏆 User {user_id} unlocked achievement {i}: {achievement['description']}")
-        
-        # Save changes if any achievements were unlocked
-        if newly_unlocked:
-            await db.commit()
-        
+
         return newly_unlocked
-    
+
     @staticmethod
-    async def _get_user_stats(user_id: int, db: AsyncSession) -> dict:
-        """Get comprehensive user statistics for achievement checking"""
-        
-        # Total games played
-        total_games_result = await db.execute(
-            select(func.count(MatchHistory.match_id))
-            .where(
-                or_(
-                    MatchHistory.winner_id == user_id,
-                    MatchHistory.loser_id == user_id
-                )
-            )
-            .where(MatchHistory.elo_change != 0)  # Only completed matches
-        )
-        total_games = total_games_result.scalar() or 0
-        
-        # Total wins
-        total_wins_result = await db.execute(
-            select(func.count(MatchHistory.match_id))
-            .where(MatchHistory.winner_id == user_id)
-            .where(MatchHistory.elo_change != 0)
-        )
-        total_wins = total_wins_result.scalar() or 0
-        
-        # Get all match history for difficulty analysis
-        matches_result = await db.execute(
-            select(MatchHistory)
-            .where(MatchHistory.winner_id == user_id)
-            .where(MatchHistory.elo_change != 0)
-        )
-        won_matches = matches_result.scalars().all()
-        
-        # Count wins by difficulty (we'll need to get problem difficulty from leetcode_problem)
-        # For now, we'll use a simple heuristic or you can enhance this with actual problem data
-        easy_wins = 0
-        medium_wins = 0
-        hard_wins = 0
-        
-        # This is a simplified approach - you might want to store problem difficulty in the database
-        # or fetch it from your problem service
-        for match in won_matches:
-            # Simple heuristic based on problem name patterns or you can enhance this
-            problem_name = match.leetcode_problem.lower() if match.leetcode_problem else ""
-            if "easy" in problem_name or len(problem_name) < 20:  # Simple heuristic
-                easy_wins += 1
-            elif "hard" in problem_name or len(problem_name) > 40:
-                hard_wins += 1
-            else:
-                medium_wins += 1
-        
-        # Check if user has won on all three difficulties
-        difficulties_won = set()
-        if easy_wins > 0:
-            difficulties_won.add("easy")
-        if medium_wins > 0:
-            difficulties_won.add("medium")
-        if hard_wins > 0:
-            difficulties_won.add("hard")
-        
+    def _stats_from_counters(counters: UserAchievementStats) -> dict:
+        """Shape stored counters like the stats dict used by _check_achievement"""
+        difficulty_wins = (counters.easy_wins, counters.medium_wins, counters.hard_wins)
         return {
-            "total_games": total_games,
-            "total_wins": total_wins,
-            "easy_wins": easy_wins,
-            "medium_wins": medium_wins,
-            "hard_wins": hard_wins,
-            "difficulties_won_count": len(difficulties_won)
+            "total_games": counters.games_played,
+            "total_wins": counters.wins,
+            "easy_wins": counters.easy_wins,
+            "medium_wins": counters.medium_wins,
+            "hard_wins": counters.hard_wins,
+            "difficulties_won_count": sum(1 for wins in difficulty_wins if wins > 0)
         }
+
+    @staticmethod
+    def _difficulty_column(difficulty: Optional[str]) -> Optional[str]:
+        """Map a problem difficulty to its counter column name"""
+        if not difficulty:
+            return None
+        difficulty = difficulty.lower()
+        if difficulty in ("easy", "medium", "hard"):
+            return f"{difficulty}_wins"
+        return None
     
     @staticmethod
     async def _check_achievement(achievement_idx: int, stats: dict, achievement: dict) -> bool:
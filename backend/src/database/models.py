@@ -3,7 +3,8 @@ Database models for the application.
 """
 from sqlalchemy.ext.mutable import MutableList
 from fastapi_users.db import SQLAlchemyBaseUserTable
-from sqlalchemy import Column, Integer, String, Boolean, Float, Text, JSON, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Float, Text, JSON, Enum, ForeignKey, DateTime, Index, text
+from sqlalchemy.orm import deferred
 from src.database.database import Base
 import enum
 from datetime import datetime
@@ -31,6 +32,16 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     winstreak = Column(Integer, default=0, nullable=False)  # Win streak counter
     profile_picture_url = Column(String(255), nullable=True)  # URL to profile picture
     achievements = Column(MutableList.as_mutable(JSON), default=lambda: [False for _ in range(8)], nullable=False)
+
+    # Glicko-2 rating (RATING_SYSTEM=glicko2), updated once per rating period. Deferred
+    # and filled by the server so Elo mode runs before scripts.migrate_glicko2 adds them;
+    # NULL reads as the starting values (1500 / 350 / 0.06)
+    glicko_rating = deferred(Column(Float, server_default="1500", nullable=True), group="glicko2")
+    glicko_rd = deferred(Column(Float, server_default="350", nullable=True), group="glicko2")  # Rating deviation
+    glicko_volatility = deferred(Column(Float, server_default="0.06", nullable=True), group="glicko2")
+
+    # Don't read server defaults back after INSERT (that would name the Glicko-2 columns)
+    __mapper_args__ = {"eager_defaults": False}
     
     # FastAPI-users required fields (need to be added to your database)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -78,6 +89,11 @@ class MatchHistory(Base):
     winner_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
     loser_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
     leetcode_problem = Column(String(255), nullable=False)
+
+    # Problem metadata captured when the match is created
+    problem_id = Column(Integer, nullable=True)
+    difficulty = Column(String(10), nullable=True)  # EASY / MEDIUM / HARD
+    topic_tags = Column(MutableList.as_mutable(JSON), nullable=True)
     
     # ELO tracking columns
     elo_change = Column(Integer, nullable=False)  # Keep for backward compatibility
@@ -94,6 +110,52 @@ class MatchHistory(Base):
     winner_code = Column(Text, nullable=True)
     loser_code = Column(Text, nullable=True)
 
+    # Glicko-2 rating period the match was rated in (NULL until processed). The server
+    # default keeps it out of INSERTs, so Elo mode runs before the column is migrated in
+    rating_period_id = deferred(
+        Column(Integer, ForeignKey("rating_periods.period_id"), nullable=True, index=True, server_default=text("NULL")),
+        group="glicko2",
+    )
+
+    __table_args__ = (
+        # Wins per difficulty (achievements, analytics)
+        Index("ix_match_history_winner_difficulty", "winner_id", "difficulty"),
+    )
+    __mapper_args__ = {"eager_defaults": False}
+
+
+class RatingPeriod(Base):
+    """One batch of matches rated together by the Glicko-2 job"""
+    __tablename__ = "rating_periods"
+
+    period_id = Column(Integer, primary_key=True, autoincrement=True)
+    processed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    matches = Column(Integer, default=0, nullable=False)
+    players = Column(Integer, default=0, nullable=False)
+
+
+class LeetCodeUserCache(Base):
+    """Last known LeetCode stats/profile payloads per username, each with its own fetch time"""
+    __tablename__ = "leetcode_user_cache"
+
+    username = Column(String(255), primary_key=True)
+    stats = Column(JSON, nullable=True)
+    stats_updated_at = Column(DateTime, nullable=True)
+    profile = Column(JSON, nullable=True)
+    profile_updated_at = Column(DateTime, nullable=True)
+
+
+class UserAchievementStats(Base):
+    """Running per-user counters used to evaluate achievements without scanning match history"""
+    __tablename__ = "user_achievement_stats"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True, nullable=False)
+    games_played = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    easy_wins = Column(Integer, default=0, nullable=False)
+    medium_wins = Column(Integer, default=0, nullable=False)
+    hard_wins = Column(Integer, default=0, nullable=False)
+
 
 class FriendMatchRequest(Base):
     __tablename__ = "friend_match_requests"
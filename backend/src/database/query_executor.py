@@ -1,26 +1,14 @@
 # backend/src/database/query_executor.py
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy import text
-import os
-from dotenv import load_dotenv
 
-# -----------------------------
-# Load environment variables
-# -----------------------------
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# -----------------------------
-# Async database engine & session
-# -----------------------------
-async_engine = create_async_engine(DATABASE_URL, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+# Shares the application's engine and connection pool
+from src.database.database import AsyncSessionLocal
 
 # -----------------------------
 # General async query executor
 # -----------------------------
-async def execute_query(query: str, params: dict = None, fetch: bool = True):
+async def execute_query(query: str, params: dict = None, fetch: bool = True, as_tuples: bool = False):
 
     """
     Execute a raw SQL query against the RDS database asynchronously.
@@ -30,9 +18,10 @@ async def execute_query(query: str, params: dict = None, fetch: bool = True):
         params (dict): Parameters for the query
         fetch (bool): If True, fetch and return results; 
                       if False, commit changes without returning results
+        as_tuples (bool): If True, return rows as plain tuples instead of dicts
 
     Returns:
-        List of dicts (if fetch=True) or None
+        List of dicts / tuples (if fetch=True) or None
     """
     results = []
     async with AsyncSessionLocal() as db:
@@ -40,28 +29,78 @@ async def execute_query(query: str, params: dict = None, fetch: bool = True):
             statement = text(query)
             res = await db.execute(statement, params or {})
             if fetch:
-                # Convert results to list of dicts
-                columns = res.keys()
-                results = [dict(zip(columns, row)) for row in res.fetchall()]
+                rows = res.fetchall()
+                if as_tuples:
+                    results = [tuple(row) for row in rows]
+                else:
+                    # Convert results to list of dicts
+                    columns = list(res.keys())
+                    results = [dict(zip(columns, row)) for row in rows]
             else:
                 await db.commit()
         except Exception as e:
             await db.rollback()
             raise e
+    return results
+
+
+# -----------------------------
+# Batched writes
+# -----------------------------
+async def execute_many(query: str, params_list: list, batch_size: int = 1000) -> int:
+
+    """
+    Execute the same statement for many parameter sets (executemany),
+    committing once per batch.
+
+    Parameters:
+        query (str): SQL statement with named parameters
+        params_list (list[dict]): One dict of parameters per execution
+        batch_size (int): Parameter sets sent per round trip / transaction
+
+    Returns:
+        Number of parameter sets executed
+    """
+    if not params_list:
+        return 0
+
+    statement = text(query)
     async with AsyncSessionLocal() as db:
         try:
-            statement = text(query)
-            res = await db.execute(statement, params or {})
-            if fetch:
-                # Convert results to list of dicts
-                columns = res.keys()
-                results = [dict(zip(columns, row)) for row in res.fetchall()]
-            else:
+            for start in range(0, len(params_list), batch_size):
+                await db.execute(statement, params_list[start:start + batch_size])
                 await db.commit()
         except Exception as e:
             await db.rollback()
             raise e
-    return results
+    return len(params_list)
+
+
+# -----------------------------
+# Streaming reads
+# -----------------------------
+async def stream_query(query: str, params: dict = None, batch_size: int = 1000, as_tuples: bool = False):
+
+    """
+    Stream rows from a large result set using a server-side cursor,
+    without loading the whole result into memory.
+
+    Usage:
+        async for row in stream_query("SELECT * FROM match_history"):
+            ...
+
+    Yields:
+        dicts (or tuples if as_tuples=True), one per row
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            text(query).execution_options(yield_per=batch_size),
+            params or {},
+        )
+        columns = list(result.keys())
+        async for partition in result.partitions(batch_size):
+            for row in partition:
+                yield tuple(row) if as_tuples else dict(zip(columns, row))
 
 
 # ✅ Wrap test in an async main function
@@ -1,7 +1,7 @@
 # backend/src/friends/routes.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.database import get_db
+from src.database.database import get_db, get_read_db
 from src.friends import service
 from src.friends.schemas import (
     FriendRequest,
@@ -87,7 +87,7 @@ async def get_friend_requests(
 async def search_users(
     user_id: int,
     query: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Search for users to add as friends"""
     return await service.search_users(db, query, user_id)
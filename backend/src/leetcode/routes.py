@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from src.leetcode.schemas import Problem, UserSubmission, ProblemStats
+from typing import Dict, List, Optional
+from src.leetcode.schemas import Problem, UserSubmission, ProblemStats, UsernameBatch
 from src.leetcode.service.leetcode_service import LeetCodeService
+from src.leetcode.service.user_cache import LEETCODE_USER_CACHE
 
 router = APIRouter(prefix="/leetcode")
 
@@ -13,8 +14,8 @@ async def get_problem(problem_slug: str):
 # @router.get("/user/{username}/stats", response_model=ProblemStats)
 @router.get("/user/{username}/stats")
 async def get_user_leetcode_stats(username: str):
-    """Get user's LeetCode statistics"""
-    return await LeetCodeService.get_user_stats(username)
+    """Get user's LeetCode statistics (cached; refreshed in the background when stale)"""
+    return await LEETCODE_USER_CACHE.get_stats(username)
 
 @router.post("/random-question")
 async def get_random_question():
@@ -32,8 +33,18 @@ async def get_recent_user_submission(username: str):
 
 @router.get("/user/{username}/profile")
 async def get_user_profile_summary(username: str):
-    """Get user's LeetCode profile summary including bio (aboutMe)"""
-    return await LeetCodeService.get_user_profile_summary(username)
+    """Get user's LeetCode profile summary including bio (aboutMe), cached like the stats"""
+    return await LEETCODE_USER_CACHE.get_profile(username)
+
+@router.post("/users/stats", response_model=Dict[str, Optional[ProblemStats]])
+async def get_users_leetcode_stats(batch: UsernameBatch):
+    """LeetCode statistics for many users in one call; unknown users map to null"""
+    return await LeetCodeService.get_users_stats(batch.usernames)
+
+@router.post("/users/profiles")
+async def get_users_profile_summaries(batch: UsernameBatch):
+    """LeetCode profile summaries for many users in one call; unknown users map to null"""
+    return await LeetCodeService.get_users_profile_summaries(batch.usernames)
 
 
 @router.get("/questions")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -29,4 +29,7 @@ class ProblemStats(BaseModel):
 class SyncResult(BaseModel):
     synced_submissions: int
     updated_stats: ProblemStats
-    last_sync: datetime
\ No newline at end of file
+    last_sync: datetime
+
+class UsernameBatch(BaseModel):
+    usernames: List[str] = Field(..., max_length=200)
@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import Optional, Tuple
 
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 # ──────────────────────────────────────────────────────────────
 #  Path / Imports Setup
@@ -220,7 +219,10 @@ class LeetCodeAuthenticator:
         try:
             # Example submission; you can change this to a lightweight endpoint.
             submission_id = 1831890835
-            question = await LeetCodeService.get_submission_details(submission_id)
+            # Validate these tokens, not the ones the app currently has in memory
+            question = await LeetCodeService.get_submission_details(
+                submission_id, auth_cookies=f"csrftoken={tokens.csrf_token or ''}; LEETCODE_SESSION={tokens.session_token}"
+            )
             LOGGER.info(
                 f"Validation call succeeded. Submission keys: {list(question.keys())}"
             )
@@ -254,6 +256,9 @@ class LeetCodeAuthenticator:
         if not GITHUB_USERNAME or not GITHUB_PASSWORD:
             raise RuntimeError("GITHUB_USERNAME and GITHUB_PASSWORD must be set in the environment.")
 
+        # Playwright is heavy; only load it when a browser login actually happens
+        from playwright.async_api import async_playwright
+
         async with async_playwright() as p:
             LOGGER.info("Launching browser for GitHub → LeetCode login...")
             browser = await p.firefox.launch(headless=self.headless, timeout=40_000)
@@ -359,6 +364,8 @@ class LeetCodeAuthenticator:
         LOGGER.info("   3. Use a backup code if needed")
         LOGGER.info("   Waiting up to 3 minutes for successful redirect to LeetCode...")
 
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
         try:
             await page.wait_for_url(
                 lambda url: "leetcode.com" in url,
@@ -0,0 +1,55 @@
+# src/leetcode/service/batch_loader.py
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+
+class BatchLoader:
+    """
+    DataLoader-style collector: load() calls made in the same event-loop tick
+    are answered by a single batch_fn(keys) call, and concurrent loads of the
+    same key share one result. batch_fn returns {key: value}; missing keys
+    resolve to None and an exception fails every load in the batch.
+    """
+
+    def __init__(self, batch_fn: Callable[[list], Awaitable[Dict[Hashable, object]]]):
+        self.batch_fn = batch_fn
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+
+    async def load(self, key: Hashable):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures can't cross event loops (e.g. separate asyncio.run calls)
+            self._loop = loop
+            self._pending = {}
+
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        # A cancelled caller must not cancel the result other callers are waiting on
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> dict:
+        keys = list(dict.fromkeys(keys))
+        return dict(zip(keys, await asyncio.gather(*(self.load(key) for key in keys))))
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._resolve(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, pending: Dict[Hashable, asyncio.Future]):
+        try:
+            results = await self.batch_fn(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(results.get(key))
@@ -1,21 +1,40 @@
 # src/leetcode/service/client.py
+import os
+import time
 import httpx
 
+from ...metrics.metrics import GRAPHQL_ERRORS, GRAPHQL_REQUEST_SECONDS, graphql_operation_name
+
 class LeetCodeGraphQLClient:
-    BASE_URL = "https://leetcode.com/graphql"
+    # Overridable so load tests can point at scripts/fake_leetcode_server.py
+    BASE_URL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
 
     @staticmethod
     async def query(query: str, variables: dict = None, auth_cookies: str = None):
         """Send a GraphQL query to LeetCode and return JSON data."""
-        async with httpx.AsyncClient(timeout=15) as client:
-            response = await client.post(
-                LeetCodeGraphQLClient.BASE_URL,
-                json={"query": query, "variables": variables or {}},
-                headers={"Content-Type": "application/json",
-                         "Referer": "https://leetcode.com",
-                         "Cookie": auth_cookies or ""
-                         },
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data
+        operation = graphql_operation_name(query)
+        start = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(timeout=15) as client:
+                response = await client.post(
+                    LeetCodeGraphQLClient.BASE_URL,
+                    json={"query": query, "variables": variables or {}},
+                    headers={"Content-Type": "application/json",
+                             "Referer": "https://leetcode.com",
+                             "Cookie": auth_cookies or ""
+                             },
+                )
+                response.raise_for_status()
+                data = response.json()
+        except httpx.HTTPStatusError as e:
+            GRAPHQL_ERRORS.labels(operation=operation, reason=f"http_{e.response.status_code}").inc()
+            raise
+        except Exception:
+            GRAPHQL_ERRORS.labels(operation=operation, reason="transport").inc()
+            raise
+        finally:
+            GRAPHQL_REQUEST_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+
+        if isinstance(data, dict) and data.get("errors"):
+            GRAPHQL_ERRORS.labels(operation=operation, reason="graphql").inc()
+        return data
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 PROFILE_QUERY = """
   query getUserProfile($username: String!) {
     matchedUser(username: $username) {
@@ -82,6 +84,23 @@ query problemsetQuestionListV2 {
 }
 """
 
+CATALOG_QUERY = """
+query problemsetQuestionListV2 {
+  problemsetQuestionListV2 {
+    questions {
+      id
+      titleSlug
+      difficulty
+      paidOnly
+      topicTags {
+        name
+        slug
+      }
+    }
+  }
+}
+"""
+
 SUBMISSION_DETAILS_QUERY = """
 query submissionDetails($submissionId: Int!) {
   submissionDetails(submissionId: $submissionId) {
@@ -101,4 +120,48 @@ query submissionDetails($submissionId: Int!) {
     }
   }
 }
-"""
\ No newline at end of file
+"""
+
+# Per-user selections for build_batched_user_query: (operation name, root field, arguments, fields)
+BATCHED_USER_SELECTIONS = {
+    "stats": ("batchUserStats", "matchedUser", "", """
+      username
+      submitStats {
+        acSubmissionNum {
+          difficulty
+          count
+        }
+      }"""),
+    "profile": ("batchUserProfiles", "matchedUser", "", """
+      username
+      profile {
+        ranking
+        userAvatar
+        realName
+        aboutMe
+      }"""),
+    "submissions": ("batchRecentAcSubmissions", "recentAcSubmissionList", ", limit: $limit", """
+      id
+      title
+      titleSlug
+      timestamp
+      lang
+      runtime
+      memory"""),
+}
+
+
+@lru_cache(maxsize=None)
+def build_batched_user_query(kind: str, count: int) -> str:
+    """
+    One document looking up `count` users at once: user i is aliased u{i}
+    and passed as variable $u{i}, e.g. u0: matchedUser(username: $u0) { ... }
+    """
+    operation, root_field, arguments, fields = BATCHED_USER_SELECTIONS[kind]
+    variables = ", ".join(f"$u{i}: String!" for i in range(count))
+    if arguments:
+        variables += ", $limit: Int"
+    selections = "".join(
+        f"\n    u{i}: {root_field}(username: $u{i}{arguments}) {{{fields}\n    }}" for i in range(count)
+    )
+    return f"\n  query {operation}({variables}) {{{selections}\n  }}\n"
@@ -3,75 +3,245 @@ import httpx
 import json
 import os
 import sys
+import time
 import asyncio
-import subprocess
-from typing import List, Optional
+import hashlib
+import aiofiles
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from functools import partial
 from collections import defaultdict
 
+from .batch_loader import BatchLoader
 from .client import LeetCodeGraphQLClient
 from ..schemas import Problem, UserSubmission, ProblemStats, SyncResult
 from ..enums.difficulty import DifficultyEnum
 from .graphql_queries import *
+from ...logging_config import get_logger
+
+logger = get_logger("leetcode")
 
 # -------------------------------------------------------------------
 # Paths / constants
 # -------------------------------------------------------------------
 
-CACHE_FILE = "topic_map_cache.json"
+# Cache files live in the backend directory unless overridden, regardless of the CWD
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+CACHE_FILE = os.path.abspath(
+    os.getenv("TOPIC_MAP_CACHE_FILE", os.path.join(BACKEND_DIR, "topic_map_cache.json"))
+)
 ALL_DIFFS = {"EASY", "MEDIUM", "HARD"}
 TOPIC_MAP_CACHE = None
 
-TOKENS_FILE = os.path.join(os.path.dirname(__file__), "auth_tokens", "leetcode_tokens.json")
+# How often the topic map is rebuilt in the background (seconds)
+TOPIC_MAP_REFRESH_SECONDS = float(os.getenv("TOPIC_MAP_REFRESH_SECONDS", str(24 * 60 * 60)))
+
+CATALOG_CACHE_FILE = os.path.abspath(
+    os.getenv("PROBLEM_CATALOG_CACHE_FILE", os.path.join(BACKEND_DIR, "problem_catalog_cache.json"))
+)
+PROBLEM_CATALOG = None  # slug -> {"id", "difficulty", "paid_only", "tags", "topic_slugs"}
+
+# Bump when the shape of a cached payload changes; older files are ignored
+CACHE_VERSION = 1
+
+TOKENS_FILE = os.getenv(
+    "LEETCODE_TOKENS_FILE",
+    os.path.join(os.path.dirname(__file__), "auth_tokens", "leetcode_tokens.json"),
+)
+
+# Users looked up per batched GraphQL document (keeps documents well under upstream limits)
+LEETCODE_BATCH_SIZE = int(os.getenv("LEETCODE_BATCH_SIZE", "20"))
 
 
 # -------------------------------------------------------------------
-# Auth cookie loader
+# Auth cookies
 # -------------------------------------------------------------------
 
-async def load_auth_cookies(filepath: str = TOKENS_FILE) -> str:
-    """
-    Load LeetCode authentication cookies from the saved tokens file.
-    If tokens don't exist, automatically runs authentication.
+# How long a LeetCode session is trusted after login (LeetCodeAuthenticator uses 24h)
+AUTH_COOKIE_MAX_AGE_SECONDS = float(os.getenv("LEETCODE_COOKIE_MAX_AGE_SECONDS", str(24 * 60 * 60)))
 
-    Returns formatted cookie string:
-        "csrftoken=<token>; LEETCODE_SESSION=<session>"
-    """
-    try:
-        # Check if tokens file exists
-        if not os.path.exists(filepath):
-            print(f"⚠️  Tokens file not found: {filepath}")
-            print("🔄 Running automatic authentication...")
+# Log in again this long before the session is considered expired
+AUTH_COOKIE_REFRESH_MARGIN_SECONDS = float(os.getenv("LEETCODE_COOKIE_REFRESH_MARGIN_SECONDS", str(60 * 60)))
 
-            # Import and run authentication
-            from .auth_tokens.leetcode_auth_viewer import get_leetcode_tokens
+# How often the tokens file is checked for changes made outside the app
+AUTH_COOKIE_WATCH_SECONDS = float(os.getenv("LEETCODE_COOKIE_WATCH_SECONDS", "30"))
 
+# Wait at least this long before retrying a failed login
+AUTH_COOKIE_RETRY_SECONDS = float(os.getenv("LEETCODE_COOKIE_RETRY_SECONDS", "300"))
 
-            # Run authentication (no force refresh by default)
-            session_token, csrf_token = await get_leetcode_tokens(force_refresh=False)
 
-            print("✅ Authentication completed automatically!")
-            return f"csrftoken={csrf_token}; LEETCODE_SESSION={session_token}"
+class AuthCookieCache:
+    """
+    LeetCode auth cookies held in memory.
 
-        # Load existing tokens
-        with open(filepath, "r", encoding="utf-8") as f:
+    The tokens file is only read by the background task (run), which reloads
+    it when its mtime changes and logs in again via Playwright shortly before
+    the session expires. Requests only ever read the in-memory cookie string.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.cookies: Optional[str] = None
+        self.retrieved_at: Optional[float] = None
+        self._mtime: Optional[float] = None
+        self._last_login_attempt = 0.0
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the tokens file if it changed since the last load (blocking; run off the event loop)"""
+        try:
+            mtime = os.stat(self.filepath).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with open(self.filepath, "r", encoding="utf-8") as f:
             tokens_data = json.load(f)
 
-        csrf_token = tokens_data.get("csrftoken", "")
         session_token = tokens_data.get("LEETCODE_SESSION", "")
-
         if not session_token:
             raise ValueError("LEETCODE_SESSION token not found in tokens file")
 
-        return f"csrftoken={csrf_token}; LEETCODE_SESSION={session_token}"
+        csrf_token = tokens_data.get("csrftoken", "")
+        self.cookies = f"csrftoken={csrf_token}; LEETCODE_SESSION={session_token}"
+        # Files written by hand may lack retrieved_at; their mtime is the best guess
+        retrieved_at = tokens_data.get("retrieved_at")
+        if retrieved_at:
+            retrieved = datetime.fromisoformat(retrieved_at)
+            if retrieved.tzinfo is None:  # LeetCodeAuthenticator writes naive UTC times
+                retrieved = retrieved.replace(tzinfo=timezone.utc)
+            self.retrieved_at = retrieved.timestamp()
+        else:
+            self.retrieved_at = mtime
+        self._mtime = mtime
+        logger.info("🔑 Loaded LeetCode auth cookies")
+        return True
+
+    def needs_login(self, now: Optional[float] = None) -> bool:
+        if self.cookies is None or self.retrieved_at is None:
+            return True
+        age = (now or time.time()) - self.retrieved_at
+        return age >= AUTH_COOKIE_MAX_AGE_SECONDS - AUTH_COOKIE_REFRESH_MARGIN_SECONDS
+
+    async def get(self) -> str:
+        """Current cookie string; never starts a browser login"""
+        if self.cookies is None:
+            # Only before the background task's first load (e.g. in scripts): read the file once, off the loop
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not load tokens file {self.filepath}: {e}")
+        if self.cookies is None:
+            raise HTTPException(status_code=503, detail="LeetCode authentication is not available yet")
+        return self.cookies
+
+    async def login(self):
+        """Log in through the browser and load the tokens it saved"""
+        self._last_login_attempt = time.time()
+        # Playwright is heavy; only load it when a browser login actually happens
+        from .auth_tokens.leetcode_auth_viewer import get_leetcode_tokens
+
+        logger.info("🔄 Refreshing LeetCode auth cookies...")
+        await get_leetcode_tokens(force_refresh=True)
+        await asyncio.to_thread(self.reload_if_changed)
+        logger.info("✅ LeetCode auth cookies refreshed")
+
+    async def run(self, interval: float = AUTH_COOKIE_WATCH_SECONDS):
+        """Background task: pick up file changes and log in again before the session expires"""
+        while True:
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not load tokens file {self.filepath}: {e}")
 
-    except HTTPException:
-        # Pass through FastAPI HTTPExceptions unchanged
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to load authentication tokens: {str(e)}",
-        )
+            if self.needs_login() and time.time() - self._last_login_attempt >= AUTH_COOKIE_RETRY_SECONDS:
+                try:
+                    await self.login()
+                except Exception as e:
+                    logger.warning(f"⚠️  LeetCode login failed: {e}")
+
+            await asyncio.sleep(interval)
+
+
+AUTH_COOKIES = AuthCookieCache(TOKENS_FILE)
+
+
+async def load_auth_cookies() -> str:
+    """
+    LeetCode authentication cookies from memory:
+        "csrftoken=<token>; LEETCODE_SESSION=<session>"
+    Raises a 503 until the background task has loaded them (see AuthCookieCache).
+    """
+    return await AUTH_COOKIES.get()
+
+
+# -------------------------------------------------------------------
+# Cache file persistence
+# -------------------------------------------------------------------
+
+def _checksum(data) -> str:
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def read_cache_file(path: str, allow_legacy: bool = True) -> Optional[dict]:
+    """
+    Read a cache file written by write_cache_file without blocking the event loop.
+
+    Returns {"data", "updated_at"} or None when the file is missing, from
+    another version, or fails its checksum. Files written before versioning
+    (the bare payload) are accepted when allow_legacy is set.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        async with aiofiles.open(path, "r", encoding="utf-8") as f:
+            payload = json.loads(await f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️  Could not read cache file {path}: {e}")
+        return None
+
+    if "version" not in payload:
+        if not allow_legacy:
+            return None
+        return {"data": payload, "updated_at": os.path.getmtime(path)}
+
+    if payload.get("version") != CACHE_VERSION:
+        logger.warning(f"⚠️  Ignoring cache file {path}: version {payload.get('version')} != {CACHE_VERSION}")
+        return None
+
+    data = payload.get("data")
+    if _checksum(data) != payload.get("checksum"):
+        logger.warning(f"⚠️  Ignoring cache file {path}: checksum mismatch")
+        return None
+
+    return {"data": data, "updated_at": payload.get("updated_at", 0)}
+
+
+async def write_cache_file(path: str, data) -> None:
+    """
+    Persist a cache payload atomically: write a temp file next to the target,
+    fsync it and rename it over the old file, so readers never see a partial write.
+    """
+    payload = {
+        "version": CACHE_VERSION,
+        "updated_at": time.time(),
+        "checksum": _checksum(data),
+        "data": data,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(payload))
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 # -------------------------------------------------------------------
@@ -80,15 +250,39 @@ async def load_auth_cookies(filepath: str = TOKENS_FILE) -> str:
 
 class LeetCodeService:
     @staticmethod
-    async def load_cache():
-        """Load cache from disk on startup."""
+    async def load_cache() -> Optional[float]:
+        """
+        Load the topic map from disk on startup.
+        Returns when the cached map was built (epoch seconds), or None if there is none.
+        """
         global TOPIC_MAP_CACHE
 
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "r") as f:
-                # Convert stored lists back into sets
-                data = json.load(f)
-                TOPIC_MAP_CACHE = {k: set(v) for k, v in data.items()}
+        cached = await read_cache_file(CACHE_FILE)
+        if cached is None:
+            return None
+
+        # Convert stored lists back into sets
+        TOPIC_MAP_CACHE = {k: set(v) for k, v in cached["data"].items()}
+        return cached["updated_at"]
+
+    @staticmethod
+    async def run_topic_map_refresh(last_updated: Optional[float] = None,
+                                    interval: float = TOPIC_MAP_REFRESH_SECONDS):
+        """
+        Background task: rebuild the topic map every `interval` seconds.
+        The first refresh happens as soon as the loaded map (if any) is older than `interval`.
+        Requests keep using the current map while a refresh is running.
+        """
+        while True:
+            age = time.time() - last_updated if last_updated else interval
+            await asyncio.sleep(max(interval - age, 0))
+            try:
+                result = await LeetCodeService.refresh_topic_difficulty_map()
+                logger.info(f"🔄 Refreshed topic map ({result['topics']} topics)")
+            except Exception as e:
+                logger.warning(f"⚠️  Topic map refresh failed: {e}")
+            # Retry (or refresh again) after a full interval either way
+            last_updated = time.time()
 
     @staticmethod
     async def fetch_leetcode_questions():
@@ -114,7 +308,7 @@ class LeetCodeService:
         # Filter topics missing at least one difficulty
         # Store the MISSING difficulties (disallowed), not the available ones
         filtered = {
-            topic: list(ALL_DIFFS - diffs)  # Get missing difficulties
+            topic: sorted(ALL_DIFFS - diffs)  # Get missing difficulties
             for topic, diffs in topic_map.items()
             if diffs != ALL_DIFFS  # Only include topics missing at least one difficulty
         }
@@ -122,22 +316,99 @@ class LeetCodeService:
         TOPIC_MAP_CACHE = {k: set(v) for k, v in filtered.items()}
 
         # Save to disk (already converted to lists)
-        with open(CACHE_FILE, "w") as f:
-            json.dump(filtered, f)
+        await write_cache_file(CACHE_FILE, filtered)
 
         return {"status": "updated", "topics": len(filtered)}
 
+    @staticmethod
+    async def get_problem_catalog(refresh: bool = False) -> dict:
+        """
+        Slug -> {"id", "difficulty", "paid_only", "tags", "topic_slugs"} for every LeetCode problem.
+        Served from memory, then from disk, and only fetched upstream when missing
+        or when refresh=True.
+        """
+        global PROBLEM_CATALOG
+
+        if PROBLEM_CATALOG is not None and not refresh:
+            return PROBLEM_CATALOG
+
+        if not refresh:
+            cached = await read_cache_file(CATALOG_CACHE_FILE)
+            # Catalogs saved before topic_slugs was added are fetched again
+            if cached is not None and all("topic_slugs" in entry for entry in cached["data"].values()):
+                PROBLEM_CATALOG = cached["data"]
+                return PROBLEM_CATALOG
+
+        data = await LeetCodeGraphQLClient.query(CATALOG_QUERY)
+        questions = data["data"]["problemsetQuestionListV2"]["questions"]
+
+        PROBLEM_CATALOG = {
+            q["titleSlug"]: {
+                "id": int(q["id"]),
+                "difficulty": q["difficulty"].upper(),
+                "paid_only": q.get("paidOnly", False),
+                "tags": [tag["name"] for tag in q["topicTags"]],
+                "topic_slugs": [tag["slug"] for tag in q["topicTags"]],
+            }
+            for q in questions
+        }
+
+        await write_cache_file(CATALOG_CACHE_FILE, PROBLEM_CATALOG)
+
+        return PROBLEM_CATALOG
+
     @staticmethod
     async def get_problem(slug: str) -> Problem:
         data = await LeetCodeGraphQLClient.query(PROBLEM_QUERY, {"titleSlug": slug})
         return data
 
+    @staticmethod
+    async def batch_user_query(kind: str, usernames: List[str]) -> Dict[str, Optional[object]]:
+        """
+        Look up many users with one aliased GraphQL document per LEETCODE_BATCH_SIZE
+        users (see build_batched_user_query). kind is "stats", "profile" or
+        "submissions"; unknown users (a null alias) map to None. A chunk that comes
+        back with errors and no data at all (rate limit, outage) raises a 502.
+        """
+        usernames = list(dict.fromkeys(usernames))
+        chunks = [usernames[i:i + LEETCODE_BATCH_SIZE] for i in range(0, len(usernames), LEETCODE_BATCH_SIZE)]
+
+        async def query_chunk(chunk: List[str]) -> dict:
+            variables = {f"u{i}": username for i, username in enumerate(chunk)}
+            data = await LeetCodeGraphQLClient.query(build_batched_user_query(kind, len(chunk)), variables)
+            results = data.get("data")
+            if results is None:
+                # Not "user not found": the whole chunk failed upstream
+                messages = "; ".join(error.get("message", "") for error in data.get("errors") or [])
+                raise HTTPException(status_code=502, detail=f"LeetCode user lookup failed: {messages or 'no data'}")
+            return {username: results.get(f"u{i}") for i, username in enumerate(chunk)}
+
+        merged = {}
+        for results in await asyncio.gather(*(query_chunk(chunk) for chunk in chunks)):
+            merged.update(results)
+        return merged
+
+    @staticmethod
+    async def get_users_submissions(usernames: List[str]) -> Dict[str, Optional[list]]:
+        """Recent accepted submissions for many users, batched"""
+        return await LeetCodeService.batch_user_query("submissions", usernames)
+
+    @staticmethod
+    async def get_users_stats(usernames: List[str]) -> Dict[str, Optional[ProblemStats]]:
+        """get_user_stats for many users, batched; unknown users map to None"""
+        results = await LeetCodeService.batch_user_query("stats", usernames)
+        return {username: _parse_stats(user) if user else None for username, user in results.items()}
+
+    @staticmethod
+    async def get_users_profile_summaries(usernames: List[str]) -> Dict[str, Optional[dict]]:
+        """get_user_profile_summary for many users, batched; unknown users map to None"""
+        results = await LeetCodeService.batch_user_query("profile", usernames)
+        return {username: _parse_profile(user) if user else None for username, user in results.items()}
+
     @staticmethod
     async def get_user_submissions(username: str):
-        data = await LeetCodeGraphQLClient.query(
-            RECENT_AC_SUBMISSIONS_QUERY, {"username": username}
-        )
-        return data["data"]["recentAcSubmissionList"]
+        # Concurrent lookups (e.g. several players submitting at once) share one request
+        return await USER_SUBMISSIONS_LOADER.load(username)
 
     @staticmethod
     async def get_recent_user_submission(username: str) -> Optional[UserSubmission]:
@@ -150,9 +421,7 @@ class LeetCodeService:
         submission_details = await LeetCodeService.get_submission_details(
             submission["id"]
         )
-        
-        print(submission_details.keys())
-        
+
         return UserSubmission(
             id=submission["id"],
             title=submission["title"],
@@ -167,11 +436,7 @@ class LeetCodeService:
     @staticmethod
     async def get_user_stats(username: str) -> ProblemStats:
         """Get user's LeetCode statistics (Easy, Medium, Hard only)."""
-        data = await LeetCodeGraphQLClient.query(
-            QUESTION_STATS_QUERY, {"username": username}
-        )
-
-        matched_user = data.get("data", {}).get("matchedUser")
+        matched_user = await USER_STATS_LOADER.load(username)
 
         if not matched_user:
             raise HTTPException(
@@ -179,24 +444,7 @@ class LeetCodeService:
                 detail=f"User '{username}' not found on LeetCode.",
             )
 
-        stats = matched_user["submitStats"]["acSubmissionNum"]
-        filtered = {
-            s["difficulty"]: s["count"]
-            for s in stats
-            if s["difficulty"] in ["All", "Easy", "Medium", "Hard"]
-        }
-
-        total = filtered.get("All", 0)
-        easy = filtered.get("Easy", 0)
-        medium = filtered.get("Medium", 0)
-        hard = filtered.get("Hard", 0)
-
-        return ProblemStats(
-            total_solved=total,
-            easy_solved=easy,
-            medium_solved=medium,
-            hard_solved=hard,
-        )
+        return _parse_stats(matched_user)
 
     @staticmethod
     async def get_user_profile_summary(username: str) -> dict:
@@ -204,9 +452,7 @@ class LeetCodeService:
         Get user's LeetCode profile summary including aboutMe (bio).
         Returns the profile data including username, ranking, avatar, realName, and aboutMe.
         """
-        data = await LeetCodeGraphQLClient.query(PROFILE_QUERY, {"username": username})
-
-        matched_user = data.get("data", {}).get("matchedUser")
+        matched_user = await USER_PROFILE_LOADER.load(username)
 
         if not matched_user:
             raise HTTPException(
@@ -214,15 +460,25 @@ class LeetCodeService:
                 detail=f"User '{username}' not found on LeetCode.",
             )
 
-        profile = matched_user.get("profile", {})
+        return _parse_profile(matched_user)
 
-        return {
-            "username": matched_user.get("username"),
-            "ranking": profile.get("ranking"),
-            "userAvatar": profile.get("userAvatar"),
-            "realName": profile.get("realName"),
-            "aboutMe": profile.get("aboutMe", ""),
-        }
+    @staticmethod
+    async def fetch_problem(slug: str) -> Problem:
+        """Problem details for a known slug"""
+        problem_data = await LeetCodeService.get_problem(slug)
+        problem = problem_data["data"]["question"]
+
+        stats_data = json.loads(problem["stats"])
+        acceptance_rate = stats_data.get("acRate")
+
+        return Problem(
+            id=problem["questionId"],
+            title=problem["title"],
+            slug=problem["titleSlug"],
+            difficulty=problem["difficulty"],
+            tags=[tag["name"] for tag in problem["topicTags"]],
+            acceptance_rate=acceptance_rate,
+        )
 
     @staticmethod
     async def get_random_problem(
@@ -272,53 +528,75 @@ class LeetCodeService:
                     raise ValueError("LeetCode API returned no titleSlug")
 
                 if random_slug in excluded_slugs:
-                    print(
-                        f"🔄 Attempt {attempt + 1}: Problem {random_slug} already completed, retrying..."
+                    logger.debug(
+                        "🔄 Attempt %s: Problem %s already completed, retrying...", attempt + 1, random_slug
                     )
                     continue
 
-                print(f"🎯 Selected random problem: {random_slug}")
+                logger.info(f"🎯 Selected random problem: {random_slug}")
 
-                problem_data = await LeetCodeService.get_problem(random_slug)
-                problem = problem_data["data"]["question"]
-
-                stats_data = json.loads(problem["stats"])
-                acceptance_rate = stats_data.get("acRate")
-
-                return Problem(
-                    id=problem["questionId"],
-                    title=problem["title"],
-                    slug=problem["titleSlug"],
-                    difficulty=problem["difficulty"],
-                    tags=[tag["name"] for tag in problem["topicTags"]],
-                    acceptance_rate=acceptance_rate,
-                )
+                return await LeetCodeService.fetch_problem(random_slug)
 
             except Exception as e:
                 if attempt < max_attempts - 1:
                     continue
-                print(f"⚠️ Failed to fetch random problem: {e}")
+                logger.warning(f"⚠️ Failed to fetch random problem: {e}")
                 return {"error": str(e)}
 
         error_msg = (
             "You've completed all questions under your current filters. "
             "Enable Repeat Questions or widen your topics."
         )
-        print(f"⚠️ {error_msg}")
+        logger.warning(f"⚠️ {error_msg}")
         return {"error": error_msg}
 
     @staticmethod
-    async def get_submission_details(submission_id: int) -> dict:
+    async def get_submission_details(submission_id: int, auth_cookies: Optional[str] = None) -> dict:
         """
         Fetch details of a specific submission by its ID.
-        Automatically loads authentication cookies from the saved tokens file.
+        Uses the in-memory authentication cookies unless others are given.
         """
-        auth_cookies = await load_auth_cookies()
+        auth_cookies = auth_cookies or await load_auth_cookies()
         
         data = await LeetCodeGraphQLClient.query(
             SUBMISSION_DETAILS_QUERY,
             {"submissionId": submission_id},
             auth_cookies,
         )
-        print(data)
+        # The payload includes the submitted code; never log it
+        logger.debug("Fetched submission details for %s", submission_id)
         return data["data"]["submissionDetails"]
+
+
+def _parse_stats(matched_user: dict) -> ProblemStats:
+    stats = matched_user["submitStats"]["acSubmissionNum"]
+    filtered = {
+        s["difficulty"]: s["count"]
+        for s in stats
+        if s["difficulty"] in ["All", "Easy", "Medium", "Hard"]
+    }
+
+    return ProblemStats(
+        total_solved=filtered.get("All", 0),
+        easy_solved=filtered.get("Easy", 0),
+        medium_solved=filtered.get("Medium", 0),
+        hard_solved=filtered.get("Hard", 0),
+    )
+
+
+def _parse_profile(matched_user: dict) -> dict:
+    profile = matched_user.get("profile") or {}
+
+    return {
+        "username": matched_user.get("username"),
+        "ranking": profile.get("ranking"),
+        "userAvatar": profile.get("userAvatar"),
+        "realName": profile.get("realName"),
+        "aboutMe": profile.get("aboutMe", ""),
+    }
+
+
+# Single-user lookups made in the same event-loop tick go out as one batched query
+USER_STATS_LOADER = BatchLoader(partial(LeetCodeService.batch_user_query, "stats"))
+USER_PROFILE_LOADER = BatchLoader(partial(LeetCodeService.batch_user_query, "profile"))
+USER_SUBMISSIONS_LOADER = BatchLoader(partial(LeetCodeService.batch_user_query, "submissions"))
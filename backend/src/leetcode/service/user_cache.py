@@ -0,0 +1,102 @@
+# src/leetcode/service/user_cache.py
+"""
+Database-backed cache of LeetCode user stats and profile summaries.
+
+Stale-while-revalidate: a cached payload is returned straight away, and if
+it is older than its TTL a background refresh is started (one per username
+and field at a time). Only a username never seen before waits on LeetCode.
+Stats and profile are fetched and aged independently, and the table
+(leetcode_user_cache) survives restarts.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ...database.models import LeetCodeUserCache
+from ...logging_config import get_logger
+from ..schemas import ProblemStats
+
+logger = get_logger("leetcode")
+
+# How long a cached payload is served without triggering a refresh
+LEETCODE_STATS_TTL_SECONDS = float(os.getenv("LEETCODE_STATS_TTL_SECONDS", "600"))
+LEETCODE_PROFILE_TTL_SECONDS = float(os.getenv("LEETCODE_PROFILE_TTL_SECONDS", "3600"))
+
+
+class LeetCodeUserCacheService:
+    def __init__(self, stats_ttl: float = LEETCODE_STATS_TTL_SECONDS, profile_ttl: float = LEETCODE_PROFILE_TTL_SECONDS):
+        self.ttl = {"stats": stats_ttl, "profile": profile_ttl}
+        self.refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def get_stats(self, username: str) -> ProblemStats:
+        return ProblemStats(**await self.get("stats", username))
+
+    async def get_profile(self, username: str) -> dict:
+        return await self.get("profile", username)
+
+    async def get(self, field: str, username: str):
+        """Cached payload for field ("stats" or "profile"); fetches upstream only on a miss"""
+        from ...database.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            row = await db.get(LeetCodeUserCache, username)
+            payload = getattr(row, field) if row else None
+            updated_at = getattr(row, f"{field}_updated_at") if row else None
+
+        if payload is None:
+            return await self.refresh(field, username)
+
+        if datetime.utcnow() - updated_at > timedelta(seconds=self.ttl[field]):
+            self.refresh_in_background(field, username)
+        return payload
+
+    def refresh_in_background(self, field: str, username: str):
+        key = (field, username)
+        if key in self.refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self.refresh(field, username)
+            except Exception as e:
+                logger.warning(f"⚠️ Background refresh of LeetCode {field} for {username} failed: {e}")
+            finally:
+                self.refreshing.pop(key, None)
+
+        self.refreshing[key] = asyncio.create_task(refresh())
+
+    async def refresh(self, field: str, username: str):
+        """Fetch from LeetCode and store; upstream errors (e.g. 404) propagate and nothing is cached"""
+        from ...database.database import AsyncSessionLocal
+        from .leetcode_service import LeetCodeService
+
+        if field == "stats":
+            payload = (await LeetCodeService.get_user_stats(username)).model_dump()
+        else:
+            payload = await LeetCodeService.get_user_profile_summary(username)
+
+        values = {field: payload, f"{field}_updated_at": datetime.utcnow()}
+        async with AsyncSessionLocal() as db:
+            row = await db.get(LeetCodeUserCache, username)
+            if row is None:
+                db.add(LeetCodeUserCache(username=username, **values))
+                try:
+                    await db.commit()
+                    return payload
+                except IntegrityError:
+                    # Another worker inserted the row first
+                    await db.rollback()
+                    row = (await db.execute(
+                        select(LeetCodeUserCache).where(LeetCodeUserCache.username == username)
+                    )).scalar_one()
+            for name, value in values.items():
+                setattr(row, name, value)
+            await db.commit()
+        return payload
+
+
+LEETCODE_USER_CACHE = LeetCodeUserCacheService()
@@ -0,0 +1,130 @@
+# src/logging_config.py
+"""
+Application logging.
+
+- Loggers are per category (get_logger("matchmaking") -> "app.matchmaking"),
+  with levels set by LOG_LEVEL and per-category LOG_LEVELS, e.g.
+  LOG_LEVELS="matchmaking=DEBUG,leetcode=WARNING".
+- Records are handed to a QueueHandler and written by a QueueListener thread,
+  so logging from the event loop never blocks on stdout.
+- LOG_FORMAT=json emits one JSON object per line; `extra=` fields are included.
+- SampledLogger rate-limits repetitive debug lines (e.g. rejected match pairs).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+APP_LOGGER = "app"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# A sampled message is emitted at most once per key per this many seconds
+LOG_SAMPLE_INTERVAL_SECONDS = float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "10"))
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "category": record.name[len(APP_LOGGER) + 1:] if record.name.startswith(APP_LOGGER + ".") else record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'matchmaking=DEBUG, leetcode=warning' -> {"matchmaking": "DEBUG", "leetcode": "WARNING"}"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            category, level = item.split("=", 1)
+            levels[category.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Configure the app loggers once; later calls are no-ops"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    app_logger = logging.getLogger(APP_LOGGER)
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.propagate = False
+
+    for category, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(f"{APP_LOGGER}.{category}").setLevel(level)
+
+
+def get_logger(category: str) -> logging.Logger:
+    return logging.getLogger(f"{APP_LOGGER}.{category}")
+
+
+class SampledLogger:
+    """
+    Emits a message at most once per key per interval and reports how many
+    were suppressed. Checks the level first, so disabled debug lines cost
+    one comparison.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = LOG_SAMPLE_INTERVAL_SECONDS):
+        self.logger = logger
+        self.interval = interval
+        self._last_emitted: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def log(self, level: int, key: str, msg: str, *args, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        now = time.monotonic()
+        last = self._last_emitted.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+
+        if len(self._last_emitted) > 10000:
+            self._last_emitted = {k: t for k, t in self._last_emitted.items() if now - t < self.interval}
+
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            msg = f"{msg} (+{suppressed} similar suppressed)"
+        self._last_emitted[key] = now
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, key: str, msg: str, *args, **kwargs):
+        self.log(logging.DEBUG, key, msg, *args, **kwargs)
+
+    def info(self, key: str, msg: str, *args, **kwargs):
+        self.log(logging.INFO, key, msg, *args, **kwargs)
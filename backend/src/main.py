@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
+from src.logging_config import setup_logging
 from src.database.database import init_db
 from src.matchmaking.routes import router as matchmaking_router
 from src.matchmaking.websocket_routes import router as websocket_router
@@ -16,14 +18,44 @@ from src.settings.routes import router as settings_router
 from src.friends.routes import router as friends_router
 from src.leetcode.routes import router as leetcode_router
 from src.achievements.routes import router as achievements_router
+from src.metrics.routes import router as metrics_router
+
+# --- Logging (non-blocking, configured via LOG_LEVEL / LOG_LEVELS / LOG_FORMAT) ---
+setup_logging()
 
 # --- Lifespan event (startup/shutdown) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()  # Run database initialization
     from src.leetcode.service.leetcode_service import LeetCodeService
-    await LeetCodeService.load_cache()  # Load topic map cache
+    last_updated = await LeetCodeService.load_cache()  # Load topic map cache
+
+    # Keep the topic map fresh without blocking startup or requests
+    background_tasks = [asyncio.create_task(LeetCodeService.run_topic_map_refresh(last_updated))]
+
+    # Auth cookies stay in memory; the file is watched and the login renewed in the background
+    from src.leetcode.service.leetcode_service import AUTH_COOKIES
+    background_tasks.append(asyncio.create_task(AUTH_COOKIES.run()))
+
+    # Glicko-2 ratings are computed in periodic batches (imported here: it needs NumPy)
+    from src.matchmaking.websocket_manager import RATING_SYSTEM
+    if RATING_SYSTEM == "glicko2":
+        from src.matchmaking.glicko2 import run_rating_periods
+        background_tasks.append(asyncio.create_task(run_rating_periods()))
+
+    # Keep ready-to-serve problems for the most requested preference buckets
+    from src.matchmaking.problem_pool import PROBLEM_POOL
+    if PROBLEM_POOL.size > 0:
+        background_tasks.append(asyncio.create_task(PROBLEM_POOL.run()))
+
+    # Opt-in: finish matches as soon as an accepted submission shows up on LeetCode
+    from src.matchmaking.submission_poller import AUTO_DETECT_SUBMISSIONS, SubmissionPoller
+    if AUTO_DETECT_SUBMISSIONS:
+        from src.matchmaking.websocket_manager import websocket_manager
+        background_tasks.append(asyncio.create_task(SubmissionPoller(websocket_manager).run()))
     yield
+    for task in background_tasks:
+        task.cancel()
 
 # --- FastAPI app instance ---
 app = FastAPI(lifespan=lifespan)
@@ -54,12 +86,19 @@ app.include_router(settings_router, prefix="/api", tags=["settings"])
 app.include_router(friends_router, tags=["friends"])
 app.include_router(leetcode_router, prefix="/api", tags=["leetcode"])
 app.include_router(achievements_router, prefix="/api", tags=["achievements"])
+app.include_router(metrics_router, tags=["metrics"])
 
 # --- Root Health Check ---
 @app.get("/")
 async def root():
     return {"message": "LeetCode Tracker API running"}
 
+# --- Database Pool Health ---
+@app.get("/health/db-pool")
+async def db_pool_health():
+    from src.database.database import get_pool_stats
+    return get_pool_stats()
+
 # --- Authenticated Profile Endpoint ---
 @app.get("/me")
 async def get_profile(user: User = Depends(current_user)):
@@ -76,7 +115,15 @@ async def get_profile(user: User = Depends(current_user)):
         "profile_picture_url": get_profile_picture_url(user.profile_picture_url),
     }
 
-@app.on_event("startup")
-async def startup_event():
-    await LeetCodeService.load_cache()
+# --- Local entrypoint: `python -m src.main` ---
+if __name__ == "__main__":
+    import os
+    import uvicorn
 
+    uvicorn.run(
+        "src.main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        # Compress WebSocket frames (trades CPU for bandwidth, off by default)
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "false").lower() == "true",
+    )
@@ -0,0 +1,136 @@
+# src/matchmaking/completed_problems.py
+"""
+Completed problems per user, as bitmasks over catalog problem ids.
+
+With Repeat Questions off, the problems two players can still get are a
+bucket's candidates minus what either of them has played:
+
+    eligible = bucket_mask & ~(completed[user] | completed[opponent])
+
+Each user's bitmask is built from match history once and then updated as
+matches finish, so match creation neither scans history nor rejects
+already-played random problems one upstream call at a time.
+
+Bucket masks treat topics as "any of", like the fake LeetCode server;
+premium problems are never eligible.
+"""
+import os
+import random
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Optional
+
+from ..logging_config import get_logger
+
+logger = get_logger("matchmaking")
+
+# Users whose bitmasks stay in memory (least recently used are dropped first)
+COMPLETED_PROBLEMS_MAX_USERS = int(os.getenv("COMPLETED_PROBLEMS_MAX_USERS", "10000"))
+
+# Random probes for a set bit before falling back to a full scan
+PICK_PROBES = 32
+
+
+class ProblemIndex:
+    """Bitmasks over the problem catalog: bit i is the problem whose catalog id is i"""
+
+    def __init__(self, catalog: dict):
+        self.slug_ids: Dict[str, int] = {}
+        self.slugs_by_id: Dict[int, str] = {}
+        self.topic_masks: Dict[str, int] = defaultdict(int)
+        self.difficulty_masks: Dict[str, int] = defaultdict(int)
+        self.free_mask = 0
+        self._buckets: Dict[tuple, int] = {}
+
+        for slug, entry in catalog.items():
+            bit = 1 << entry["id"]
+            self.slug_ids[slug] = entry["id"]
+            self.slugs_by_id[entry["id"]] = slug
+            self.difficulty_masks[entry["difficulty"]] |= bit
+            for topic in entry["topic_slugs"]:
+                self.topic_masks[topic] |= bit
+            if not entry["paid_only"]:
+                self.free_mask |= bit
+
+    def mask(self, slugs: Iterable[str]) -> int:
+        bits = 0
+        for slug in slugs:
+            problem_id = self.slug_ids.get(slug)
+            if problem_id is not None:
+                bits |= 1 << problem_id
+        return bits
+
+    def bucket_mask(self, topics: Optional[list] = None, difficulties: Optional[list] = None) -> int:
+        """Free problems with any of `topics` and any of `difficulties` (None/empty = no filter)"""
+        key = (frozenset(topics or ()), frozenset(difficulties or ()))
+        bits = self._buckets.get(key)
+        if bits is None:
+            bits = self.free_mask
+            if key[0]:
+                topic_bits = 0
+                for topic in key[0]:
+                    topic_bits |= self.topic_masks.get(topic, 0)
+                bits &= topic_bits
+            if key[1]:
+                difficulty_bits = 0
+                for difficulty in key[1]:
+                    difficulty_bits |= self.difficulty_masks.get(difficulty, 0)
+                bits &= difficulty_bits
+            self._buckets[key] = bits
+        return bits
+
+    def pick(self, eligible: int, rng: random.Random = random) -> Optional[str]:
+        """Slug of a uniformly random set bit, or None if no problem is eligible"""
+        if not eligible:
+            return None
+        length = eligible.bit_length()
+        for _ in range(PICK_PROBES):
+            problem_id = rng.randrange(length)
+            if eligible >> problem_id & 1:
+                return self.slugs_by_id[problem_id]
+        # Sparse mask: choose among the set bits directly
+        ids = [i for i, bit in enumerate(reversed(bin(eligible)[2:])) if bit == "1"]
+        return self.slugs_by_id[rng.choice(ids)]
+
+
+class CompletedProblems:
+    def __init__(self, max_users: int = COMPLETED_PROBLEMS_MAX_USERS):
+        self.max_users = max_users
+        self.index: Optional[ProblemIndex] = None
+        self._masks: "OrderedDict[int, int]" = OrderedDict()
+
+    async def problem_index(self) -> Optional[ProblemIndex]:
+        """The catalog index, built on first use; None if the catalog can't be loaded"""
+        if self.index is None:
+            from ..leetcode.service.leetcode_service import LeetCodeService
+
+            try:
+                self.index = ProblemIndex(await LeetCodeService.get_problem_catalog())
+            except Exception as e:
+                logger.warning(f"⚠️ Problem catalog unavailable, excluding completed problems upstream: {e}")
+                return None
+        return self.index
+
+    async def get(self, db, user_id: int) -> int:
+        """Bitmask of problems user_id has played (one history query the first time)"""
+        bits = self._masks.get(user_id)
+        if bits is None:
+            from .service import get_completed_problems
+
+            bits = self.index.mask(await get_completed_problems(db, user_id))
+            self._masks[user_id] = bits
+            if len(self._masks) > self.max_users:
+                self._masks.popitem(last=False)
+        self._masks.move_to_end(user_id)
+        return bits
+
+    def record(self, user_ids: Iterable[int], slug: str):
+        """A finished match: mark its problem as played for users already in memory"""
+        if self.index is None:
+            return
+        bits = self.index.mask([slug])
+        for user_id in user_ids:
+            if user_id in self._masks:
+                self._masks[user_id] |= bits
+
+
+COMPLETED_PROBLEMS = CompletedProblems()
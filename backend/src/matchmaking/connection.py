@@ -0,0 +1,177 @@
+# src/matchmaking/connection.py
+import os
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Union
+from fastapi import WebSocket
+from .encoding import EncodedMessage, encode_message
+from ..metrics.metrics import WS_MESSAGES_DROPPED, WS_SEND_FAILURES
+from ..logging_config import get_logger
+
+logger = get_logger("websocket")
+
+# Maximum number of messages buffered per connection before the
+# slow-consumer policy kicks in
+SEND_QUEUE_MAX_SIZE = int(os.getenv("WS_SEND_QUEUE_MAX_SIZE", "64"))
+
+# Seconds a single frame may take to send before the client is considered stuck
+SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
+# Only the most recent pending copy of these message types is ever delivered
+COALESCED_MESSAGE_TYPES = {"queue_status"}
+
+# These message types may be dropped when a client falls behind
+DROPPABLE_MESSAGE_TYPES = {"queue_status", "pong"}
+
+# Close code sent to clients that cannot keep up (1013 = try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Close code sent to a connection replaced by a newer one for the same user
+REPLACED_CLOSE_CODE = 4000
+
+
+class ConnectionSender:
+    """
+    Outbound message queue for a single WebSocket connection.
+
+    Messages are encoded once, buffered in a bounded queue and written by a
+    dedicated writer task, so broadcasting never waits on a slow socket:
+    - status messages are coalesced (only the latest one is kept)
+    - status messages are dropped first when the buffer is full
+    - clients that still cannot keep up are disconnected
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        websocket: WebSocket,
+        on_close: Callable[[int, WebSocket], None],
+        max_size: int = SEND_QUEUE_MAX_SIZE,
+        send_timeout: float = SEND_TIMEOUT_SECONDS,
+        binary_frames: bool = False,
+    ):
+        self.user_id = user_id
+        self.websocket = websocket
+        # Clients that opt in receive bytes frames, others get text frames
+        self.binary_frames = binary_frames
+        self.max_size = max_size
+        self.send_timeout = send_timeout
+        self.closed = False
+        self.dropped_messages = 0
+        self._on_close = on_close
+        # Each entry is a one-element list so coalescing can swap the payload in place
+        self._pending: Deque[List[EncodedMessage]] = deque()
+        self._coalesced: Dict[str, List[EncodedMessage]] = {}
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the writer task (requires a running event loop)"""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, message: Union[dict, EncodedMessage]) -> bool:
+        """
+        Queue a message for delivery without blocking.
+        Returns False if the message was dropped or the connection is closed.
+        """
+        if self.closed:
+            return False
+
+        message = encode_message(message)
+        message_type = message.type
+
+        # Replace a pending status update instead of queueing another one
+        if message_type in COALESCED_MESSAGE_TYPES and message_type in self._coalesced:
+            self._coalesced[message_type][0] = message
+            return True
+
+        if len(self._pending) >= self.max_size:
+            if message_type in DROPPABLE_MESSAGE_TYPES:
+                self.dropped_messages += 1
+                WS_MESSAGES_DROPPED.inc()
+                return False
+
+            # Make room by discarding buffered status messages
+            self._drop_droppable_messages()
+            if len(self._pending) >= self.max_size:
+                logger.warning(f"🐢 User {self.user_id} is not keeping up ({len(self._pending)} pending messages), disconnecting")
+                WS_SEND_FAILURES.labels(reason="slow_consumer").inc()
+                self.close(SLOW_CONSUMER_CLOSE_CODE)
+                return False
+
+        entry = [message]
+        self._pending.append(entry)
+        if message_type in COALESCED_MESSAGE_TYPES:
+            self._coalesced[message_type] = entry
+        self._wakeup.set()
+        return True
+
+    def close(self, code: Optional[int] = None):
+        """Stop the writer and optionally close the socket with the given code"""
+        if self.closed:
+            return
+        self.closed = True
+        self._pending.clear()
+        self._coalesced.clear()
+
+        if self._writer_task and self._writer_task is not asyncio.current_task():
+            self._writer_task.cancel()
+
+        if code is not None:
+            asyncio.create_task(self._close_websocket(code))
+
+        self._on_close(self.user_id, self.websocket)
+
+    def _drop_droppable_messages(self):
+        kept = deque(entry for entry in self._pending if entry[0].type not in DROPPABLE_MESSAGE_TYPES)
+        dropped = len(self._pending) - len(kept)
+        self.dropped_messages += dropped
+        WS_MESSAGES_DROPPED.inc(dropped)
+        self._pending = kept
+        self._coalesced = {
+            message_type: entry
+            for message_type, entry in self._coalesced.items()
+            if message_type not in DROPPABLE_MESSAGE_TYPES
+        }
+
+    async def _close_websocket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            # Socket is already gone
+            pass
+
+    async def _writer(self):
+        """Drain the queue one frame at a time"""
+        try:
+            while not self.closed:
+                if not self._pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                entry = self._pending.popleft()
+                message = entry[0]
+                if self._coalesced.get(message.type) is entry:
+                    del self._coalesced[message.type]
+
+                if self.binary_frames:
+                    send = self.websocket.send_bytes(message.data)
+                else:
+                    send = self.websocket.send_text(message.text)
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"🐢 Send to user {self.user_id} timed out after {self.send_timeout}s, disconnecting")
+            WS_SEND_FAILURES.labels(reason="timeout").inc()
+            self.close(SLOW_CONSUMER_CLOSE_CODE)
+        except Exception as e:
+            logger.error(f"❌ Failed to send message to user {self.user_id}: {e}")
+            WS_SEND_FAILURES.labels(reason="error").inc()
+            self.close()
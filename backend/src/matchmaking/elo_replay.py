@@ -0,0 +1,320 @@
+# src/matchmaking/elo_replay.py
+"""
+Batch recomputation of every user's ELO from match history.
+
+Used after changing the K-factors or the resignation penalty in EloService:
+completed matches are replayed in match_id order with the same formula as
+EloService.calculate_match_rating_changes, on NumPy arrays instead of rows.
+
+Matches are scheduled into rounds where each player appears at most once
+(a match goes one round after the latest round either player was in), so a
+whole round is applied with a handful of vector operations while every
+player still sees their own matches in chronological order.
+
+NumPy is only needed here, so this module must not be imported by the app.
+"""
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from .elo_service import EloService
+from ..database.query_executor import execute_many, stream_query
+
+# Rating every user starts from (users.user_elo default)
+INITIAL_RATING = 1200
+
+# Rows per server-side cursor fetch / per bulk update round trip
+REPLAY_BATCH_SIZE = 10000
+
+COMPLETED_MATCHES_QUERY = """
+    SELECT match_id, winner_id, loser_id, elo_change, winner_elo_change, loser_elo_change,
+           winner_runtime, loser_runtime, CASE WHEN winner_code IS NULL THEN 1 ELSE 0 END
+    FROM match_history
+    WHERE elo_change != 0
+    ORDER BY match_id
+"""
+
+
+@dataclass
+class EloParameters:
+    """The EloService constants a replay is run with"""
+    provisional_k: int
+    default_k: int
+    experienced_k: int
+    provisional_games: int
+    experienced_rating: int
+    resignation_penalty: int
+
+    @classmethod
+    def current(cls) -> "EloParameters":
+        """Parameters as currently configured on EloService"""
+        return cls(
+            provisional_k=EloService.PROVISIONAL_K_FACTOR,
+            default_k=EloService.DEFAULT_K_FACTOR,
+            experienced_k=EloService.EXPERIENCED_K_FACTOR,
+            provisional_games=EloService.PROVISIONAL_GAMES,
+            experienced_rating=EloService.EXPERIENCED_RATING,
+            resignation_penalty=EloService.RESIGNATION_PENALTY,
+        )
+
+    def as_dict(self) -> dict:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@dataclass
+class MatchArrays:
+    """Completed matches in chronological order, one array element per match"""
+    match_ids: np.ndarray
+    winner_ids: np.ndarray
+    loser_ids: np.ndarray
+    resigned: np.ndarray
+    # Changes currently stored in match_history, for the diff report
+    winner_changes: np.ndarray
+    loser_changes: np.ndarray
+
+    def __len__(self):
+        return len(self.match_ids)
+
+
+@dataclass
+class ReplayResult:
+    ratings: np.ndarray  # Final rating per user index
+    games_played: np.ndarray  # Completed matches per user index
+    winner_changes: np.ndarray  # Per match, in MatchArrays order
+    loser_changes: np.ndarray
+    winner_elo: np.ndarray  # Ratings after each match
+    loser_elo: np.ndarray
+    rounds: int
+
+
+def is_resignation(winner_runtime, loser_runtime, winner_code_missing) -> bool:
+    """
+    Resignations are not flagged in match_history. Both resign paths store
+    runtime -1 for both players and no code, while an accepted submission
+    stores the winner's runtime. The winner's code is fetched afterwards and
+    can be missing when that fetch fails, so it only counts together with the
+    runtimes. A submission win whose runtime could not be parsed and whose
+    code is missing is indistinguishable from a resignation and counts as one.
+    """
+    return winner_runtime == -1 and loser_runtime == -1 and bool(winner_code_missing)
+
+
+def games_before(winner_idx: np.ndarray, loser_idx: np.ndarray):
+    """Number of earlier matches each match's winner and loser had played"""
+    m = len(winner_idx)
+    players = np.concatenate([winner_idx, loser_idx])
+    positions = np.concatenate([np.arange(m), np.arange(m)])
+
+    # Group appearances by player, in chronological order within each player
+    order = np.lexsort((positions, players))
+    sorted_players = players[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_players[1:] != sorted_players[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, 2 * m])
+    counts = np.arange(2 * m) - np.repeat(group_starts, group_sizes)
+
+    games = np.empty(2 * m, dtype=np.int64)
+    games[order] = counts
+    return games[:m], games[m:]
+
+
+def schedule_rounds(winner_idx: np.ndarray, loser_idx: np.ndarray, user_count: int) -> np.ndarray:
+    """Round of each match: one after the latest round either player appeared in"""
+    last_round = [0] * user_count
+    rounds = []
+    for winner, loser in zip(winner_idx.tolist(), loser_idx.tolist()):
+        current = max(last_round[winner], last_round[loser]) + 1
+        last_round[winner] = last_round[loser] = current
+        rounds.append(current)
+    return np.array(rounds, dtype=np.int64)
+
+
+def expected_scores(ratings: np.ndarray, opponent_ratings: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.power(10.0, (opponent_ratings - ratings) / 400))
+
+
+def k_factors(ratings: np.ndarray, games_played: np.ndarray, params: EloParameters) -> np.ndarray:
+    return np.where(
+        games_played < params.provisional_games,
+        params.provisional_k,
+        np.where(ratings >= params.experienced_rating, params.experienced_k, params.default_k),
+    )
+
+
+def replay(
+    winner_idx: np.ndarray,
+    loser_idx: np.ndarray,
+    resigned: np.ndarray,
+    initial_ratings: np.ndarray,
+    params: EloParameters = None,
+) -> ReplayResult:
+    """
+    Replay matches (user indices, chronological order) from initial_ratings.
+    Produces the same changes as calling EloService.calculate_match_rating_changes
+    match by match.
+    """
+    params = params or EloParameters.current()
+    m = len(winner_idx)
+    ratings = np.array(initial_ratings, dtype=np.int64)
+
+    winner_games, loser_games = games_before(winner_idx, loser_idx)
+    rounds = schedule_rounds(winner_idx, loser_idx, len(ratings))
+
+    winner_changes = np.zeros(m, dtype=np.int64)
+    loser_changes = np.zeros(m, dtype=np.int64)
+    winner_elo = np.zeros(m, dtype=np.int64)
+    loser_elo = np.zeros(m, dtype=np.int64)
+
+    order = np.argsort(rounds, kind="stable")
+    boundaries = np.flatnonzero(np.diff(rounds[order])) + 1
+    for batch in np.split(order, boundaries) if m else []:
+        winners = winner_idx[batch]
+        losers = loser_idx[batch]
+        winner_ratings = ratings[winners]
+        loser_ratings = ratings[losers]
+
+        winner_change = np.round(
+            k_factors(winner_ratings, winner_games[batch], params) * (1.0 - expected_scores(winner_ratings, loser_ratings))
+        ).astype(np.int64)
+        loser_change = np.round(
+            k_factors(loser_ratings, loser_games[batch], params) * (0.0 - expected_scores(loser_ratings, winner_ratings))
+        ).astype(np.int64) - params.resignation_penalty * resigned[batch]
+
+        ratings[winners] = winner_ratings + winner_change
+        ratings[losers] = loser_ratings + loser_change
+        winner_changes[batch] = winner_change
+        loser_changes[batch] = loser_change
+        winner_elo[batch] = ratings[winners]
+        loser_elo[batch] = ratings[losers]
+
+    games_played = np.bincount(np.concatenate([winner_idx, loser_idx]), minlength=len(ratings))
+    return ReplayResult(
+        ratings=ratings,
+        games_played=games_played,
+        winner_changes=winner_changes,
+        loser_changes=loser_changes,
+        winner_elo=winner_elo,
+        loser_elo=loser_elo,
+        rounds=int(rounds.max()) if m else 0,
+    )
+
+
+async def load_users():
+    """(user_ids sorted ascending, current ratings) as arrays"""
+    user_ids, ratings = [], []
+    async for user_id, user_elo in stream_query(
+        "SELECT user_id, user_elo FROM users ORDER BY user_id", batch_size=REPLAY_BATCH_SIZE, as_tuples=True
+    ):
+        user_ids.append(user_id)
+        ratings.append(user_elo if user_elo is not None else INITIAL_RATING)
+    return np.array(user_ids, dtype=np.int64), np.array(ratings, dtype=np.int64)
+
+
+async def load_matches() -> MatchArrays:
+    """Stream completed matches into arrays"""
+    match_ids, winner_ids, loser_ids, resigned, winner_changes, loser_changes = [], [], [], [], [], []
+    async for row in stream_query(COMPLETED_MATCHES_QUERY, batch_size=REPLAY_BATCH_SIZE, as_tuples=True):
+        match_id, winner_id, loser_id, elo_change, winner_change, loser_change, winner_runtime, loser_runtime, no_code = row
+        match_ids.append(match_id)
+        winner_ids.append(winner_id)
+        loser_ids.append(loser_id)
+        resigned.append(is_resignation(winner_runtime, loser_runtime, no_code))
+        # Older rows only have elo_change (same fallback as the results service)
+        winner_changes.append(winner_change if winner_change is not None else elo_change)
+        loser_changes.append(loser_change if loser_change is not None else -elo_change)
+
+    return MatchArrays(
+        match_ids=np.array(match_ids, dtype=np.int64),
+        winner_ids=np.array(winner_ids, dtype=np.int64),
+        loser_ids=np.array(loser_ids, dtype=np.int64),
+        resigned=np.array(resigned, dtype=bool),
+        winner_changes=np.array(winner_changes, dtype=np.int64),
+        loser_changes=np.array(loser_changes, dtype=np.int64),
+    )
+
+
+def build_report(user_ids, current_ratings, matches: MatchArrays, result: ReplayResult, top: int = 20) -> dict:
+    """Summary of how the replay differs from what is stored"""
+    played = result.games_played > 0
+    deltas = np.where(played, result.ratings - current_ratings, 0)
+    changed_users = np.flatnonzero(deltas)
+    changed_matches = (matches.winner_changes != result.winner_changes) | (matches.loser_changes != result.loser_changes)
+
+    biggest = changed_users[np.argsort(-np.abs(deltas[changed_users]), kind="stable")][:top]
+    return {
+        "users": int(played.sum()),
+        "matches": len(matches),
+        "resignations": int(matches.resigned.sum()),
+        "rounds": result.rounds,
+        "users_changed": len(changed_users),
+        "matches_changed": int(changed_matches.sum()),
+        "mean_abs_delta": round(float(np.abs(deltas[played]).mean()), 2) if played.any() else 0.0,
+        "max_abs_delta": int(np.abs(deltas).max()) if len(deltas) else 0,
+        "largest_changes": [
+            {
+                "user_id": int(user_ids[i]),
+                "current_elo": int(current_ratings[i]),
+                "replayed_elo": int(result.ratings[i]),
+                "delta": int(deltas[i]),
+                "games_played": int(result.games_played[i]),
+            }
+            for i in biggest
+        ],
+    }
+
+
+async def apply_replay(user_ids, current_ratings, matches: MatchArrays, result: ReplayResult) -> dict:
+    """Write replayed ratings and per-match changes back in bulk, only where they differ"""
+    changed_users = np.flatnonzero((result.games_played > 0) & (result.ratings != current_ratings))
+    users_updated = await execute_many(
+        "UPDATE users SET user_elo = :user_elo WHERE user_id = :user_id",
+        [{"user_id": int(user_ids[i]), "user_elo": int(result.ratings[i])} for i in changed_users],
+        batch_size=REPLAY_BATCH_SIZE,
+    )
+
+    # After-match ratings shift even when a match's own changes don't, so every match is rewritten
+    matches_updated = await execute_many(
+        """
+        UPDATE match_history
+        SET elo_change = :elo_change, winner_elo_change = :winner_elo_change, loser_elo_change = :loser_elo_change,
+            winner_elo = :winner_elo, loser_elo = :loser_elo
+        WHERE match_id = :match_id
+        """,
+        [
+            {
+                "match_id": match_id,
+                "elo_change": abs(loser_change),
+                "winner_elo_change": winner_change,
+                "loser_elo_change": loser_change,
+                "winner_elo": winner_elo,
+                "loser_elo": loser_elo,
+            }
+            for match_id, winner_change, loser_change, winner_elo, loser_elo in zip(
+                matches.match_ids.tolist(),
+                result.winner_changes.tolist(),
+                result.loser_changes.tolist(),
+                result.winner_elo.tolist(),
+                result.loser_elo.tolist(),
+            )
+        ],
+        batch_size=REPLAY_BATCH_SIZE,
+    )
+    return {"users_updated": users_updated, "matches_updated": matches_updated}
+
+
+async def run_replay(params: EloParameters = None, apply: bool = False, top: int = 20) -> dict:
+    """Load history, replay it and report the differences; optionally write them back"""
+    params = params or EloParameters.current()
+    user_ids, current_ratings = await load_users()
+    matches = await load_matches()
+
+    # Map user ids to array positions
+    winner_idx = np.searchsorted(user_ids, matches.winner_ids)
+    loser_idx = np.searchsorted(user_ids, matches.loser_ids)
+    initial_ratings = np.full(len(user_ids), INITIAL_RATING, dtype=np.int64)
+
+    result = replay(winner_idx, loser_idx, matches.resigned, initial_ratings, params)
+    report = build_report(user_ids, current_ratings, matches, result, top=top)
+    report["parameters"] = params.as_dict()
+    if apply:
+        report["applied"] = await apply_replay(user_ids, current_ratings, matches, result)
+    return report
@@ -7,6 +7,9 @@ class EloService:
     DEFAULT_K_FACTOR = 32  # Standard for most competitive games
     PROVISIONAL_K_FACTOR = 40  # Higher K for new players (first 30 games)
     EXPERIENCED_K_FACTOR = 16  # Lower K for highly rated players (2400+)
+    PROVISIONAL_GAMES = 30  # Games before a player stops being provisional
+    EXPERIENCED_RATING = 2400  # Rating from which the experienced K-factor applies
+    RESIGNATION_PENALTY = 2  # Extra points a player loses for resigning
     
     @staticmethod
     def calculate_expected_score(player_rating: int, opponent_rating: int) -> float:
@@ -17,11 +20,11 @@ class EloService:
     @staticmethod
     def get_k_factor(player_rating: int, games_played: int = None) -> int:
         # Use higher K-factor for provisional players (first 30 games)
-        if games_played is not None and games_played < 30:
+        if games_played is not None and games_played < EloService.PROVISIONAL_GAMES:
             return EloService.PROVISIONAL_K_FACTOR
         
         # Use lower K-factor for highly rated players
-        if player_rating >= 2400:
+        if player_rating >= EloService.EXPERIENCED_RATING:
             return EloService.EXPERIENCED_K_FACTOR
         
         return EloService.DEFAULT_K_FACTOR
@@ -66,7 +69,7 @@ class EloService:
         
         # Apply resignation penalty: loser loses an additional 2 points
         if is_resignation:
-            loser_change -= 2
+            loser_change -= EloService.RESIGNATION_PENALTY
         
         return winner_change, loser_change
     
@@ -0,0 +1,44 @@
+# src/matchmaking/encoding.py
+import json
+from typing import Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+def encode_json(payload: dict) -> bytes:
+    """Serialize a payload to UTF-8 JSON bytes using the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedMessage:
+    """
+    A WebSocket message serialized exactly once.
+
+    Broadcasting the same EncodedMessage to many connections shares the
+    encoded bytes, and the text form is decoded lazily at most once for
+    clients that still use text frames.
+    """
+    __slots__ = ("type", "data", "_text")
+
+    def __init__(self, message: dict):
+        self.type = message.get("type")
+        self.data = encode_json(message)
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode("utf-8")
+        return self._text
+
+
+def encode_message(message: Union[dict, EncodedMessage]) -> EncodedMessage:
+    """Encode a message unless it already is encoded"""
+    if isinstance(message, EncodedMessage):
+        return message
+    return EncodedMessage(message)
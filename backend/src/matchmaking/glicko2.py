@@ -0,0 +1,199 @@
+# src/matchmaking/glicko2.py
+"""
+Glicko-2 ratings, computed in batched rating periods (RATING_SYSTEM=glicko2).
+
+Every RATING_PERIOD_SECONDS the background job collects the completed
+matches not yet rated, updates every user's rating, deviation and volatility
+at once with vectorized NumPy math (Glickman, "Example of the Glicko-2
+system") and records the batch in rating_periods. Players without games in
+a period only have their deviation grow.
+
+All games in a period are rated against the opponents' pre-period ratings,
+which is what lets a whole period be computed as one array operation.
+
+NumPy is only needed here; the app imports this module only in glicko2 mode.
+"""
+import asyncio
+import math
+import os
+
+import numpy as np
+from sqlalchemy import text
+
+from ..database.models import RatingPeriod
+from ..logging_config import get_logger
+
+logger = get_logger("ratings")
+
+# Seconds between rating periods
+RATING_PERIOD_SECONDS = float(os.getenv("RATING_PERIOD_SECONDS", "3600"))
+
+# System constant: how much volatility may change per period (0.3-1.2 is typical)
+GLICKO_TAU = float(os.getenv("GLICKO_TAU", "0.5"))
+
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+DEFAULT_VOLATILITY = 0.06
+
+# Glicko-2 works on a scale where 1500 / 350 become 0 / ~2.01
+SCALE = 173.7178
+CONVERGENCE_TOLERANCE = 0.000001
+MAX_ITERATIONS = 100
+
+PENDING_MATCHES_QUERY = """
+    SELECT match_id, winner_id, loser_id
+    FROM match_history
+    WHERE elo_change != 0 AND rating_period_id IS NULL
+    ORDER BY match_id
+"""
+
+
+def g(phi: np.ndarray) -> np.ndarray:
+    return 1 / np.sqrt(1 + 3 * phi ** 2 / math.pi ** 2)
+
+
+def solve_volatility(sigma, phi, v, delta, tau: float = GLICKO_TAU) -> np.ndarray:
+    """New volatility for each player (step 5, Illinois algorithm, all players at once)"""
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    A = a.copy()
+    large_delta = delta ** 2 > phi ** 2 + v
+    B = np.where(large_delta, np.log(np.where(large_delta, delta ** 2 - phi ** 2 - v, 1.0)), a - tau)
+    # Step B further down until f(B) >= 0 where the first guess fell short
+    needs_step = ~large_delta & (f(B) < 0)
+    for k in range(2, MAX_ITERATIONS):
+        if not needs_step.any():
+            break
+        B = np.where(needs_step, a - k * tau, B)
+        needs_step &= f(B) < 0
+
+    fA, fB = f(A), f(B)
+    active = np.abs(B - A) > CONVERGENCE_TOLERANCE
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        crossed = fC * fB <= 0
+        A = np.where(active & crossed, B, A)
+        fA = np.where(active, np.where(crossed, fB, fA / 2), fA)
+        B = np.where(active, C, B)
+        fB = np.where(active, fC, fB)
+        active &= np.abs(B - A) > CONVERGENCE_TOLERANCE
+
+    return np.exp(A / 2)
+
+
+def rate_period(ratings, deviations, volatilities, winner_idx, loser_idx, tau: float = GLICKO_TAU):
+    """
+    One Glicko-2 rating period for every user.
+    ratings/deviations/volatilities are per user index; each match is
+    (winner_idx[i], loser_idx[i]). Returns new (ratings, deviations, volatilities).
+    """
+    mu = (np.asarray(ratings, dtype=float) - DEFAULT_RATING) / SCALE
+    phi = np.asarray(deviations, dtype=float) / SCALE
+    sigma = np.asarray(volatilities, dtype=float)
+    n = len(mu)
+
+    # Each match is one game for the winner (score 1) and one for the loser (score 0)
+    players = np.concatenate([winner_idx, loser_idx]).astype(np.int64)
+    opponents = np.concatenate([loser_idx, winner_idx]).astype(np.int64)
+    scores = np.concatenate([np.ones(len(winner_idx)), np.zeros(len(loser_idx))])
+
+    g_opponent = g(phi[opponents])
+    expected = 1 / (1 + np.exp(-g_opponent * (mu[players] - mu[opponents])))
+    v_inverse = np.bincount(players, weights=g_opponent ** 2 * expected * (1 - expected), minlength=n)
+    improvement = np.bincount(players, weights=g_opponent * (scores - expected), minlength=n)
+
+    played = v_inverse > 0
+    new_mu = mu.copy()
+    new_sigma = sigma.copy()
+    # Players who sat the period out only become less certain
+    new_phi = np.sqrt(phi ** 2 + sigma ** 2)
+
+    if played.any():
+        v = 1 / v_inverse[played]
+        delta = v * improvement[played]
+        new_sigma[played] = solve_volatility(sigma[played], phi[played], v, delta, tau)
+        phi_star = np.sqrt(phi[played] ** 2 + new_sigma[played] ** 2)
+        new_phi[played] = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+        new_mu[played] = mu[played] + new_phi[played] ** 2 * improvement[played]
+
+    new_deviations = np.minimum(new_phi * SCALE, DEFAULT_RD)
+    return new_mu * SCALE + DEFAULT_RATING, new_deviations, new_sigma
+
+
+async def process_rating_period(db) -> dict:
+    """
+    Rate all completed, unrated matches as one period and write the results.
+    Everything happens in the caller's transaction; the caller commits.
+    """
+    match_rows = (await db.execute(text(PENDING_MATCHES_QUERY))).all()
+    user_rows = (await db.execute(text(
+        "SELECT user_id, glicko_rating, glicko_rd, glicko_volatility FROM users ORDER BY user_id"
+    ))).all()
+    if not user_rows:
+        return {"matches": 0, "players": 0}
+
+    # NULL (never rated, or columns added without defaults) means the starting values
+    user_ids = np.array([row[0] for row in user_rows], dtype=np.int64)
+    ratings = np.array([DEFAULT_RATING if row[1] is None else row[1] for row in user_rows], dtype=float)
+    deviations = np.array([DEFAULT_RD if row[2] is None else row[2] for row in user_rows], dtype=float)
+    volatilities = np.array([DEFAULT_VOLATILITY if row[3] is None else row[3] for row in user_rows], dtype=float)
+
+    winner_idx = np.searchsorted(user_ids, np.array([row[1] for row in match_rows], dtype=np.int64))
+    loser_idx = np.searchsorted(user_ids, np.array([row[2] for row in match_rows], dtype=np.int64))
+
+    new_ratings, new_deviations, new_volatilities = rate_period(
+        ratings, deviations, volatilities, winner_idx, loser_idx
+    )
+
+    # Players at the deviation cap who didn't play are unchanged; skip their rows
+    changed = np.flatnonzero(
+        (new_ratings != ratings) | (new_deviations != deviations) | (new_volatilities != volatilities)
+    )
+    if len(changed):
+        await db.execute(
+            text("UPDATE users SET glicko_rating = :rating, glicko_rd = :rd, glicko_volatility = :volatility "
+                 "WHERE user_id = :user_id"),
+            [
+                {
+                    "user_id": int(user_ids[i]),
+                    "rating": float(new_ratings[i]),
+                    "rd": float(new_deviations[i]),
+                    "volatility": float(new_volatilities[i]),
+                }
+                for i in changed
+            ],
+        )
+
+    players = len(np.unique(np.concatenate([winner_idx, loser_idx])))
+    if match_rows:
+        period = RatingPeriod(matches=len(match_rows), players=players)
+        db.add(period)
+        await db.flush()
+        await db.execute(
+            text("UPDATE match_history SET rating_period_id = :period_id WHERE match_id = :match_id"),
+            [{"period_id": period.period_id, "match_id": row[0]} for row in match_rows],
+        )
+
+    return {"matches": len(match_rows), "players": players, "users_updated": len(changed)}
+
+
+async def run_rating_periods(interval: float = RATING_PERIOD_SECONDS):
+    """Background task: close a rating period every `interval` seconds"""
+    from ..database.database import AsyncSessionLocal
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await process_rating_period(db)
+                await db.commit()
+            logger.info(f"📈 Rated {result['matches']} matches for {result['players']} players")
+        except Exception as e:
+            logger.warning(f"⚠️ Rating period failed: {e}")
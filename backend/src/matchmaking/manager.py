@@ -3,8 +3,11 @@ import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..database.models import User
+from ..logging_config import get_logger
 from ..matchmaking.service import create_match_record
 
+logger = get_logger("matchmaking")
+
 MATCHMAKING_KEY = "matchmaking_queue"
 REDIS_URL = "redis://localhost:6379"  # Use Elasticache endpoint in production
 
@@ -54,7 +57,7 @@ class MatchmakingManager:
             # Create match record
             match_record = await create_match_record(db, user, opp)
             if not match_record:
-                print(f"❌ Failed to create match record between {user.email} and {opp.email}")
+                logger.warning(f"❌ Failed to create match record between {user.email} and {opp.email}")
                 continue
             
             match = match_record["match"]
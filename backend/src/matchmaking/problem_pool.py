@@ -0,0 +1,111 @@
+# src/matchmaking/problem_pool.py
+"""
+Pre-fetched problems per (topics, difficulty) bucket.
+
+create_match_record records every bucket it asks for and takes a ready
+Problem from that bucket's ring buffer when one is there. The background
+warmer keeps the most requested buckets topped up, one upstream selection at
+a time, and wakes early whenever a problem is taken. A cold bucket falls
+back to selecting a problem on the spot.
+"""
+import asyncio
+import os
+from collections import Counter, deque
+from typing import Callable, Dict, Optional
+
+from ..leetcode.schemas import Problem
+from ..logging_config import get_logger
+from ..metrics.metrics import PROBLEM_POOL_REQUESTS
+
+logger = get_logger("matchmaking")
+
+# Ready problems kept per bucket (0 disables the pool)
+PROBLEM_POOL_SIZE = int(os.getenv("PROBLEM_POOL_SIZE", "4"))
+
+# How many of the most requested buckets the warmer keeps filled
+PROBLEM_POOL_BUCKETS = int(os.getenv("PROBLEM_POOL_BUCKETS", "20"))
+
+# Seconds between warmer passes when nothing has been taken
+PROBLEM_POOL_REFILL_SECONDS = float(os.getenv("PROBLEM_POOL_REFILL_SECONDS", "30"))
+
+
+def bucket_key(topics, difficulties) -> tuple:
+    return tuple(sorted(topics or ())), tuple(sorted(difficulties or ()))
+
+
+class ProblemPool:
+    def __init__(self, size: int = PROBLEM_POOL_SIZE, max_buckets: int = PROBLEM_POOL_BUCKETS):
+        self.size = size
+        self.max_buckets = max_buckets
+        self.buckets: Dict[tuple, deque] = {}
+        self.requests: Counter = Counter()
+        self._wake = asyncio.Event()
+
+    def take(self, topics, difficulties, accept: Optional[Callable[[Problem], bool]] = None) -> Optional[Problem]:
+        """
+        A ready problem for the bucket, or None on a miss. `accept` can reject
+        pooled problems (e.g. ones a player has already played); those stay pooled.
+        """
+        if self.size <= 0:
+            return None
+        key = bucket_key(topics, difficulties)
+        self.requests[key] += 1
+        if len(self.requests) > self.max_buckets * 8:
+            # Forget rarely requested buckets so the counter stays small
+            self.requests = Counter(dict(self.requests.most_common(self.max_buckets * 4)))
+        buffer = self.buckets.get(key)
+        if buffer:
+            for problem in buffer:
+                if accept is None or accept(problem):
+                    buffer.remove(problem)
+                    PROBLEM_POOL_REQUESTS.labels(result="hit").inc()
+                    self._wake.set()
+                    return problem
+        PROBLEM_POOL_REQUESTS.labels(result="miss").inc()
+        self._wake.set()
+        return None
+
+    def popular_buckets(self) -> list:
+        return [key for key, _ in self.requests.most_common(self.max_buckets)]
+
+    async def fill(self) -> int:
+        """Top up the popular buckets; returns the number of problems fetched"""
+        from ..leetcode.service.leetcode_service import LeetCodeService
+
+        popular = self.popular_buckets()
+        # Buckets that dropped out of the top are no longer kept
+        for key in set(self.buckets) - set(popular):
+            del self.buckets[key]
+
+        fetched = 0
+        for key in popular:
+            buffer = self.buckets.setdefault(key, deque(maxlen=self.size))
+            topics, difficulties = key
+            while len(buffer) < self.size:
+                problem = await LeetCodeService.get_random_problem(
+                    topics=list(topics) or None, difficulty=list(difficulties) or None
+                )
+                if not isinstance(problem, Problem):
+                    logger.debug(f"🧊 Could not pre-fetch a problem for bucket {key}: {problem}")
+                    break
+                buffer.append(problem)
+                fetched += 1
+        return fetched
+
+    async def run(self, interval: float = PROBLEM_POOL_REFILL_SECONDS):
+        """Background task: refill after problems are taken, and every `interval` seconds"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                fetched = await self.fill()
+                if fetched:
+                    logger.debug(f"🔥 Pre-fetched {fetched} problems for {len(self.buckets)} buckets")
+            except Exception as e:
+                logger.warning(f"⚠️ Problem pool refill failed: {e}")
+
+
+PROBLEM_POOL = ProblemPool()
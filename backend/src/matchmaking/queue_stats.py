@@ -0,0 +1,109 @@
+# src/matchmaking/queue_stats.py
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional
+
+# Width of each ELO bucket in the queue histogram
+HISTOGRAM_BUCKET_SIZE = 100
+
+
+class _FenwickTree:
+    """Prefix counts over positions 0..size-1"""
+
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    def add(self, position: int):
+        position += 1
+        while position < len(self.tree):
+            self.tree[position] += 1
+            position += position & -position
+
+    def count_before(self, position: int) -> int:
+        """Number of added positions < position"""
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+
+def count_potential_matches(queue: Dict[int, dict], current_time: float,
+                            elo_range_for_wait_time: Callable[[float, Optional[float]], int]) -> Dict[int, dict]:
+    """
+    Compute wait time, ELO range and potential match count for every queued user.
+
+    try_match_players pairs two users when their ELO difference is within the
+    range for the larger of their wait times and rating deviations. The range
+    grows with both, so that is the larger of the two users' own ranges: a
+    user can be matched with anyone inside their own window, plus anyone with
+    a wider window that reaches them.
+
+    Users are processed in order of range with Fenwick trees over ELO, so the
+    whole queue takes O(n log n) instead of comparing every pair.
+
+    Returns: user_id -> {"wait_time", "elo_range", "potential_matches"}
+    """
+    users = []
+    for user_id, user_data in queue.items():
+        wait_time = current_time - user_data["join_time"]
+        elo_range = elo_range_for_wait_time(wait_time, user_data.get("rating_deviation"))
+        users.append((user_id, user_data["elo"], elo_range, wait_time))
+
+    sorted_elos = sorted(elo for _, elo, _, _ in users)
+    interval_starts = sorted(elo - elo_range for _, elo, elo_range, _ in users)
+    interval_ends = sorted(elo + elo_range for _, elo, elo_range, _ in users)
+    by_range = sorted(users, key=lambda user: user[2])
+    counts = dict.fromkeys(queue, 0)
+
+    # Others whose range is <= the user's: the user's own window decides
+    narrower = _FenwickTree(len(sorted_elos))
+    i = 0
+    while i < len(by_range):
+        j = i
+        while j < len(by_range) and by_range[j][2] == by_range[i][2]:
+            narrower.add(bisect_left(sorted_elos, by_range[j][1]))
+            j += 1
+        for user_id, elo, elo_range, _ in by_range[i:j]:
+            in_range = (
+                narrower.count_before(bisect_right(sorted_elos, elo + elo_range))
+                - narrower.count_before(bisect_left(sorted_elos, elo - elo_range))
+            )
+            counts[user_id] += in_range - 1  # Minus the user themself
+        i = j
+
+    # Others with a wider range: their window has to reach the user
+    starts, ends = _FenwickTree(len(interval_starts)), _FenwickTree(len(interval_ends))
+    j = len(by_range)
+    for i in range(len(by_range) - 1, -1, -1):
+        user_id, elo, elo_range, _ = by_range[i]
+        while j > 0 and by_range[j - 1][2] > elo_range:
+            _, other_elo, other_range, _ = by_range[j - 1]
+            starts.add(bisect_left(interval_starts, other_elo - other_range))
+            ends.add(bisect_left(interval_ends, other_elo + other_range))
+            j -= 1
+        counts[user_id] += (
+            starts.count_before(bisect_right(interval_starts, elo))
+            - ends.count_before(bisect_left(interval_ends, elo))
+        )
+
+    return {
+        user_id: {"wait_time": wait_time, "elo_range": elo_range, "potential_matches": counts[user_id]}
+        for user_id, _, elo_range, wait_time in users
+    }
+
+
+def elo_histogram(queue: Dict[int, dict], bucket_size: int = HISTOGRAM_BUCKET_SIZE) -> List[dict]:
+    """Bucket queued users by ELO, e.g. [{"elo_min": 1200, "elo_max": 1299, "count": 3}, ...]"""
+    counts: Dict[int, int] = {}
+    for user_data in queue.values():
+        bucket = user_data["elo"] // bucket_size
+        counts[bucket] = counts.get(bucket, 0) + 1
+
+    return [
+        {
+            "elo_min": bucket * bucket_size,
+            "elo_max": (bucket + 1) * bucket_size - 1,
+            "count": counts[bucket],
+        }
+        for bucket in sorted(counts)
+    ]
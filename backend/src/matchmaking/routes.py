@@ -2,16 +2,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func, and_
-from ..database.database import get_db
+from ..database.database import get_db, mark_recent_write
 from ..database.models import User, MatchHistory
 from ..matchmaking.manager import MatchmakingManager
 from ..matchmaking.manager import MATCHMAKING_KEY
 from ..matchmaking.schemas import QueueResponse, MatchResponse
 from ..matchmaking.elo_service import EloService
+from ..matchmaking.completed_problems import COMPLETED_PROBLEMS
 from ..leetcode.schemas import Problem
+from ..achievements.achievements import AchievementTracker, MatchCompletedEvent
+from ..logging_config import get_logger
 
 router = APIRouter(tags=["Matchmaking"])
 manager = MatchmakingManager()
+logger = get_logger("matchmaking")
 
 async def get_user_games_played(user_id: int, db: AsyncSession) -> int:
     """Get the total number of completed games for a user."""
@@ -55,7 +59,7 @@ async def join_queue(user_id: int, db: AsyncSession = Depends(get_db)):
             detail="Cannot join queue while you have a pending friend match request. Please cancel or wait for response."
         )
 
-    print(f"🚀 User {user_id} ({user.email}) joining queue with ELO {user.user_elo}")
+    logger.info(f"🚀 User {user_id} ({user.email}) joining queue with ELO {user.user_elo}")
     
     # First, remove user from queue if they're already there (cleanup)
     await manager.remove_player(user.id)
@@ -65,7 +69,7 @@ async def join_queue(user_id: int, db: AsyncSession = Depends(get_db)):
 
     match = await manager.find_match(user.id, user.user_elo, db)
     if match:
-        print(f"🎉 Immediate match found for user {user_id}")
+        logger.info(f"🎉 Immediate match found for user {user_id}")
         problem = match.get("problem")
         match_response = MatchResponse(
             match_id=match["match_id"],
@@ -76,9 +80,15 @@ async def join_queue(user_id: int, db: AsyncSession = Depends(get_db)):
         )
         return QueueResponse(status="matched", match=match_response)
     
-    print(f"⏳ User {user_id} added to queue, waiting for opponent")
+    logger.info(f"⏳ User {user_id} added to queue, waiting for opponent")
     return QueueResponse(status="queued", match=None)
 
+@router.get("/queue/stats")
+async def get_queue_stats():
+    """Current WebSocket queue size, ELO histogram and wait times"""
+    from ..matchmaking.websocket_manager import websocket_manager
+    return websocket_manager.get_queue_stats()
+
 @router.post("/leave/{user_id}")
 async def leave_queue(user_id: int):
     await manager.remove_player(user_id)
@@ -213,7 +223,7 @@ async def submit_solution(match_id: int, user_id: int, db: AsyncSession = Depend
             winner_memory = -1.0
             winner_code = None
     except Exception as e:
-        print(f"Error getting winner submission data: {e}")
+        logger.warning(f"⚠️ Error getting winner submission data: {e}")
         winner_runtime = -1
         winner_memory = -1.0
         winner_code = None
@@ -258,6 +268,13 @@ async def submit_solution(match_id: int, user_id: int, db: AsyncSession = Depend
     match.loser_code = None  # Loser doesn't have valid code
     
     await db.commit()
+    mark_recent_write(user_ids=(winner_id, loser_id), match_ids=(match_id,))
+
+    # Update achievement counters for both players (loser still played a game)
+    await AchievementTracker.on_match_completed(
+        MatchCompletedEvent(winner_id=winner_id, loser_id=loser_id, difficulty=match.difficulty),
+        db,
+    )
     
     return {
         "status": "completed", 
@@ -305,12 +322,13 @@ async def resign_match(match_id: int, user_id: int, db: AsyncSession = Depends(g
         try:
             problem_slug = problem.slug if hasattr(problem, 'slug') else str(problem.get('slug', 'unknown'))
             match.leetcode_problem = problem_slug
-            print(f"📝 Updated resigned match {match_id} with problem slug: {problem_slug}")
+            COMPLETED_PROBLEMS.record((winner_id, loser_id), problem_slug)
+            logger.info(f"📝 Updated resigned match {match_id} with problem slug: {problem_slug}")
         except Exception as e:
-            print(f"⚠️ Error getting problem slug for resigned match {match_id}: {e}")
+            logger.warning(f"⚠️ Error getting problem slug for resigned match {match_id}: {e}")
             match.leetcode_problem = "unknown"
     else:
-        print(f"⚠️ Warning: No problem found for resigned match {match_id}")
+        logger.warning(f"⚠️ No problem found for resigned match {match_id}")
         match.leetcode_problem = "unknown"
     
     # Set match duration (fallback - WebSocket should handle this)
@@ -362,6 +380,13 @@ async def resign_match(match_id: int, user_id: int, db: AsyncSession = Depends(g
     match.loser_code = None  # No code for resignation
     
     await db.commit()
+    mark_recent_write(user_ids=(winner_id, loser_id), match_ids=(match_id,))
+
+    # Update achievement counters for both players (loser still played a game)
+    await AchievementTracker.on_match_completed(
+        MatchCompletedEvent(winner_id=winner_id, loser_id=loser_id, difficulty=match.difficulty),
+        db,
+    )
     
     return {
         "status": "completed", 
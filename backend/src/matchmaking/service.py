@@ -1,8 +1,18 @@
 # src/matchmaking/service.py
+import asyncio
+import os
+from functools import partial
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..database.models import MatchHistory
 from ..database.models import User
 from ..leetcode.service.leetcode_service import LeetCodeService
+from ..logging_config import get_logger
+from ..metrics.metrics import observe_stage
+from .completed_problems import COMPLETED_PROBLEMS
+from .problem_pool import PROBLEM_POOL
+
+logger = get_logger("matchmaking")
 
 TOPIC_MAPPING = [
     "array",
@@ -78,85 +88,53 @@ TOPIC_MAPPING = [
     "biconnected-component",
 ]
 
-async def get_completed_problems(db: AsyncSession, user_id: int) -> set:
-    """Get all problem slugs that a user has completed"""
-    from sqlalchemy import select, or_
-    
-    # Get all matches where user was winner or loser (excluding TBD matches)
-    result = await db.execute(
-        select(MatchHistory.leetcode_problem).where(
-            or_(
-                MatchHistory.winner_id == user_id,
-                MatchHistory.loser_id == user_id
-            )
-        ).where(MatchHistory.leetcode_problem != "TBD")
-    )
-    
-    completed = {row[0] for row in result.fetchall()}
-    return completed
+DIFFICULTY_MAPPING = {"1": "EASY", "2": "MEDIUM", "3": "HARD"}
 
+# Upper bound on problem selection across all fallback tiers (seconds)
+PROBLEM_SELECTION_DEADLINE_SECONDS = float(os.getenv("PROBLEM_SELECTION_DEADLINE_SECONDS", "8"))
 
-async def create_match_record(db: AsyncSession, user: User, opponent: User):
-    from sqlalchemy import or_, delete
+# Head start each fallback tier gets before the next one starts anyway (seconds)
+PROBLEM_SELECTION_HEDGE_SECONDS = float(os.getenv("PROBLEM_SELECTION_HEDGE_SECONDS", "0.5"))
 
-    
-    # Clean up any existing TBD records for both users
-    await db.execute(
-        delete(MatchHistory).where(
-            or_(
-                MatchHistory.winner_id.in_([user.id, opponent.id]),
-                MatchHistory.loser_id.in_([user.id, opponent.id])
-            )
-        ).where(MatchHistory.leetcode_problem == "TBD")
-    )
+ALL_COMPLETED_MESSAGE = (
+    "You've completed all questions under your current filters. "
+    "Enable Repeat Questions or widen your topics."
+)
 
-    shared_topics = list(set(user.topics or []) & set(opponent.topics or []))
-    shared_difficulty = list(set(user.difficulty or []) & set(opponent.difficulty or []))
-    
-    # Check if either user has repeat disabled
-    user_repeat = getattr(user, 'repeating_questions', True)
-    opponent_repeat = getattr(opponent, 'repeating_questions', True)
-    
-    # Get completed problems for users with repeat disabled
-    excluded_problems = set()
-    if not user_repeat:
-        user_completed = await get_completed_problems(db, user.id)
-        excluded_problems.update(user_completed)
-        print(f"🔄 User {user.email} has repeat OFF - excluding {len(user_completed)} problems")
-    
-    if not opponent_repeat:
-        opponent_completed = await get_completed_problems(db, opponent.id)
-        excluded_problems.update(opponent_completed)
-        print(f"🔄 Opponent {opponent.email} has repeat OFF - excluding {len(opponent_completed)} problems")
+
+def resolve_problem_filters(user: User, opponent: User):
+    """
+    Work out which topics and difficulties to pick a problem from.
+
+    Uses the players' shared preferences, falling back to their combined
+    preferences (at most 5 topics) and then to popular defaults.
+    Returns (topic_slugs, difficulty_strings, fallback_used).
+    """
+    user_topics = user.topics or []
+    user_difficulty = user.difficulty or []
+    opponent_topics = opponent.topics or []
+    opponent_difficulty = opponent.difficulty or []
+
+    shared_topics = list(set(user_topics) & set(opponent_topics))
+    shared_difficulty = list(set(user_difficulty) & set(opponent_difficulty))
 
     # Implement progressive fallback matching
     fallback_used = False
     if not shared_topics and not shared_difficulty:
-        print(f"⚠️ No overlap between {user.email} and {opponent.email}, trying fallback strategies")
         fallback_used = True
-        
-        # Strategy 1: Try individual preferences first
-        user_topics = user.topics or []
-        user_difficulty = user.difficulty or []
-        opponent_topics = opponent.topics or []
-        opponent_difficulty = opponent.difficulty or []
-        
-        # Combine all topics and difficulties from both users
+
+        # Strategy 1: Combine all topics and difficulties from both users
         combined_topics = list(set(user_topics + opponent_topics))
         combined_difficulty = list(set(user_difficulty + opponent_difficulty))
-        
+
         if combined_topics or combined_difficulty:
             shared_topics = combined_topics[:5]  # Limit to 5 topics to avoid too broad search
             shared_difficulty = combined_difficulty
-            print(f"📋 Fallback Strategy 1: Using combined preferences - topics: {shared_topics}, difficulty: {shared_difficulty}")
         else:
             # Strategy 2: Use popular defaults
             shared_difficulty = ["2"]  # Medium difficulty
             shared_topics = ["0", "1", "2"]  # Array, String, Hash Table (most common)
-            print(f"📋 Fallback Strategy 2: Using default popular settings - topics: {shared_topics}, difficulty: {shared_difficulty}")
-    else:
-        print(f"✅ Found overlap - topics: {shared_topics}, difficulty: {shared_difficulty}")
-    
+
     # Convert topic indices to topic slugs
     topic_slugs = []
     for topic_idx in shared_topics:
@@ -166,59 +144,199 @@ async def create_match_record(db: AsyncSession, user: User, opponent: User):
                 topic_slugs.append(TOPIC_MAPPING[idx])
         except (ValueError, TypeError):
             continue
-    
+
     # Convert difficulty numbers to difficulty strings
-    difficulty_mapping = {"1": "EASY", "2": "MEDIUM", "3": "HARD"}
-    difficulty_strings = []
-    for diff in shared_difficulty:
-        try:
-            diff_str = str(diff)
-            if diff_str in difficulty_mapping:
-                difficulty_strings.append(difficulty_mapping[diff_str])
-        except (ValueError, TypeError):
-            continue
+    difficulty_strings = [DIFFICULTY_MAPPING[str(diff)] for diff in shared_difficulty if str(diff) in DIFFICULTY_MAPPING]
+
+    return topic_slugs, difficulty_strings, fallback_used
+
+
+async def get_completed_problems(db: AsyncSession, user_id: int) -> set:
+    """Get all problem slugs that a user has completed"""
+    from sqlalchemy import select, or_
     
-    # Try to get a problem with progressive fallback
-    problem = None
-    attempts = 0
-    max_attempts = 3
+    # Get all matches where user was winner or loser (excluding TBD matches)
+    result = await db.execute(
+        select(MatchHistory.leetcode_problem).where(
+            or_(
+                MatchHistory.winner_id == user_id,
+                MatchHistory.loser_id == user_id
+            )
+        ).where(MatchHistory.leetcode_problem != "TBD")
+    )
     
-    while not problem and attempts < max_attempts:
-        attempts += 1
-        
+    completed = {row[0] for row in result.fetchall()}
+    return completed
+
+
+async def pick_unplayed_problem(problem_index, topic_slugs, difficulty_strings, excluded_mask: int):
+    """A random problem from the bucket that neither player has played, chosen locally"""
+    eligible = problem_index.bucket_mask(topic_slugs, difficulty_strings) & ~excluded_mask
+    slug = problem_index.pick(eligible)
+    if slug is None:
+        return {"error": ALL_COMPLETED_MESSAGE}
+    return await LeetCodeService.fetch_problem(slug)
+
+
+async def select_problem(topic_slugs, difficulty_strings, excluded_problems: set, excluded_mask: int, problem_index):
+    """One selection attempt with the given filters; returns a Problem or an {"error"} dict"""
+    if excluded_mask:
+        return await pick_unplayed_problem(problem_index, topic_slugs, difficulty_strings, excluded_mask)
+    return await LeetCodeService.get_random_problem(
+        topics=topic_slugs or None,
+        difficulty=difficulty_strings or None,
+        excluded_slugs=excluded_problems if excluded_problems else None
+    )
+
+
+def _is_problem(result) -> bool:
+    return result is not None and not (isinstance(result, dict) and "error" in result)
+
+
+async def select_problem_with_fallback(
+    tiers: list,
+    deadline: float = PROBLEM_SELECTION_DEADLINE_SECONDS,
+    hedge: float = PROBLEM_SELECTION_HEDGE_SECONDS,
+):
+    """
+    Run fallback tiers (coroutine functions, highest priority first) concurrently.
+
+    Tier i starts after i * hedge seconds, or as soon as tier i - 1 fails. The
+    first tier in priority order that succeeds wins and the rest are cancelled.
+    At the deadline, the best tier that has already succeeded is used.
+    Returns (tier index, problem), or (None, last error) if none succeeded.
+    """
+    failed = [asyncio.Event() for _ in tiers]
+
+    async def run_tier(index: int, tier):
+        if index:
+            try:
+                await asyncio.wait_for(failed[index - 1].wait(), index * hedge)
+            except asyncio.TimeoutError:
+                pass
         try:
-            problem = await LeetCodeService.get_random_problem(
-                topics=topic_slugs or None,
-                difficulty=difficulty_strings or None,
-                excluded_slugs=excluded_problems if excluded_problems else None
-            )
-            
-            if problem and not (isinstance(problem, dict) and "error" in problem):
-                break
-                
+            result = await tier()
         except Exception as e:
-            print(f"❌ Attempt {attempts} failed to fetch problem: {e}")
-        
-        # If first attempt failed and we used specific preferences, try with broader settings
-        if attempts == 1 and (topic_slugs or difficulty_strings):
-            print(f"🔄 Attempt {attempts + 1}: Trying with broader settings")
-            # Remove topic restrictions but keep difficulty
-            topic_slugs = None
-        elif attempts == 2:
-            print(f"🔄 Attempt {attempts + 1}: Trying with no restrictions")
-            # Remove all restrictions
-            topic_slugs = None
-            difficulty_strings = None
-            excluded_problems = set()  # Also ignore exclusions as last resort
-
-    if not problem or (isinstance(problem, dict) and "error" in problem):
+            logger.warning(f"❌ Tier {index + 1} failed to fetch problem: {e}")
+            result = None
+        if not _is_problem(result):
+            failed[index].set()
+        return result
+
+    tasks = [asyncio.create_task(run_tier(index, tier)) for index, tier in enumerate(tiers)]
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    error = None
+    try:
+        for index, task in enumerate(tasks):
+            done, _ = await asyncio.wait({task}, timeout=max(end - loop.time(), 0))
+            if not done:
+                logger.warning(f"⏰ Problem selection deadline ({deadline}s) reached waiting on tier {index + 1}")
+                break
+            if _is_problem(task.result()):
+                return index, task.result()
+            error = task.result() or error
+
+        for index, task in enumerate(tasks):
+            if task.done() and _is_problem(task.result()):
+                return index, task.result()
+        return None, error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def create_match_record(db: AsyncSession, user: User, opponent: User):
+    from sqlalchemy import or_, delete
+
+    
+    # Clean up any existing TBD records for both users
+    with observe_stage("db_cleanup"):
+        await db.execute(
+            delete(MatchHistory).where(
+                or_(
+                    MatchHistory.winner_id.in_([user.id, opponent.id]),
+                    MatchHistory.loser_id.in_([user.id, opponent.id])
+                )
+            ).where(MatchHistory.leetcode_problem == "TBD")
+        )
+
+    # Check if either user has repeat disabled
+    user_repeat = getattr(user, 'repeating_questions', True)
+    opponent_repeat = getattr(opponent, 'repeating_questions', True)
+    
+    # Get completed problems for users with repeat disabled: bitmasks over the
+    # catalog when it's available, otherwise slugs for get_random_problem to skip
+    with observe_stage("db_read"):
+        excluded_problems = set()
+        excluded_mask = 0
+        problem_index = None
+        if not (user_repeat and opponent_repeat):
+            problem_index = await COMPLETED_PROBLEMS.problem_index()
+
+        for player, label, repeat in ((user, "User", user_repeat), (opponent, "Opponent", opponent_repeat)):
+            if repeat:
+                continue
+            if problem_index:
+                completed = await COMPLETED_PROBLEMS.get(db, player.id)
+                excluded_mask |= completed
+                completed_count = completed.bit_count()
+            else:
+                completed_slugs = await get_completed_problems(db, player.id)
+                excluded_problems.update(completed_slugs)
+                completed_count = len(completed_slugs)
+            logger.debug(f"🔄 {label} {player.email} has repeat OFF - excluding {completed_count} problems")
+
+    topic_slugs, difficulty_strings, fallback_used = resolve_problem_filters(user, opponent)
+    if fallback_used:
+        logger.debug(f"📋 No overlap between {user.email} and {opponent.email}, using fallback - topics: {topic_slugs}, difficulty: {difficulty_strings}")
+    else:
+        logger.debug(f"✅ Found overlap - topics: {topic_slugs}, difficulty: {difficulty_strings}")
+
+    # A pre-fetched problem for these preferences skips selection entirely
+    def not_played(problem) -> bool:
+        if excluded_mask:
+            return not problem_index.mask([problem.slug]) & excluded_mask
+        return problem.slug not in excluded_problems
+
+    pooled = PROBLEM_POOL.take(topic_slugs, difficulty_strings, accept=not_played)
+    if pooled:
+        logger.debug(f"⚡ Using pre-fetched problem {pooled.slug} for {user.email} & {opponent.email}")
+        return await save_match_record(db, user, opponent, pooled)
+
+    # Fallback tiers in priority order: preferences, then difficulty only, then
+    # anything (ignoring exclusions as a last resort). They run concurrently and
+    # the highest tier that succeeds within the deadline wins.
+    tier_filters = [(tuple(topic_slugs), tuple(difficulty_strings), True)]
+    if topic_slugs:
+        tier_filters.append(((), tuple(difficulty_strings), True))
+    tier_filters.append(((), (), False))
+    tier_filters = list(dict.fromkeys(tier_filters))
+    tiers = [
+        partial(
+            select_problem, list(topics), list(difficulties),
+            excluded_problems if exclude else set(), excluded_mask if exclude else 0, problem_index,
+        )
+        for topics, difficulties, exclude in tier_filters
+    ]
+
+    with observe_stage("problem_selection"):
+        tier, problem = await select_problem_with_fallback(tiers)
+
+    if tier is None:
         error_msg = problem.get("error", "Unknown error") if isinstance(problem, dict) else "Failed to fetch problem"
-        print(f"❌ Failed to fetch any compatible problem after {max_attempts} attempts for {user.email} & {opponent.email}: {error_msg}")
+        logger.warning(f"❌ Failed to fetch any compatible problem from {len(tiers)} tiers for {user.email} & {opponent.email}: {error_msg}")
         return None
-    
-    if attempts > 1:
-        print(f"✅ Successfully fetched problem on attempt {attempts} for {user.email} & {opponent.email}")
 
+    if tier > 0:
+        topics, difficulties, exclude = tier_filters[tier]
+        logger.info(f"✅ Fetched problem with fallback tier {tier + 1} (topics: {list(topics)}, difficulty: {list(difficulties)}, exclusions: {exclude}) for {user.email} & {opponent.email}")
+
+    return await save_match_record(db, user, opponent, problem)
+
+
+async def save_match_record(db: AsyncSession, user: User, opponent: User, problem):
+    """Insert the pending (TBD) match row for the chosen problem"""
     match = MatchHistory(
         winner_id=user.id,  # Temporary - will be updated when match completes
         loser_id=opponent.id,  # Temporary - will be updated when match completes
@@ -228,6 +346,9 @@ async def create_match_record(db: AsyncSession, user: User, opponent: User):
         loser_elo_change=0,   # New: Will be set when match completes
         winner_elo=user.user_elo,
         loser_elo=opponent.user_elo,
+        problem_id=problem.id,
+        difficulty=problem.difficulty.upper(),
+        topic_tags=list(problem.tags),
         match_seconds = 0,
         winner_runtime = 0,
         loser_runtime = 0,
@@ -235,8 +356,9 @@ async def create_match_record(db: AsyncSession, user: User, opponent: User):
         loser_memory = 0.0
         
     )
-    db.add(match)
-    await db.commit()
-    await db.refresh(match)
+    with observe_stage("db_write"):
+        db.add(match)
+        await db.commit()
+        await db.refresh(match)
     return {"match": match, 
             "problem": problem}
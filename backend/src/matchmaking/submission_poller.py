@@ -0,0 +1,133 @@
+# src/matchmaking/submission_poller.py
+"""
+Automatic submission detection (AUTO_DETECT_SUBMISSIONS=true).
+
+Instead of waiting for players to press submit, one scheduler polls
+recentAcSubmissionList for every player in an active match. Each round looks
+every username up once, in batched requests spread out by a rate limit, and
+the first player with an accepted submission for the match problem made
+after the match started is declared the winner.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from ..logging_config import get_logger
+
+logger = get_logger("matchmaking")
+
+AUTO_DETECT_SUBMISSIONS = os.getenv("AUTO_DETECT_SUBMISSIONS", "false").lower() == "true"
+
+# Seconds between the starts of two polling rounds
+SUBMISSION_POLL_INTERVAL_SECONDS = float(os.getenv("SUBMISSION_POLL_INTERVAL_SECONDS", "5"))
+
+# Upstream (batched) requests per second, and in flight at once
+SUBMISSION_POLL_RATE = float(os.getenv("SUBMISSION_POLL_RATE", "10"))
+SUBMISSION_POLL_CONCURRENCY = int(os.getenv("SUBMISSION_POLL_CONCURRENCY", "5"))
+
+
+class SubmissionPoller:
+    def __init__(
+        self,
+        manager,
+        interval: float = SUBMISSION_POLL_INTERVAL_SECONDS,
+        rate: float = SUBMISSION_POLL_RATE,
+        concurrency: int = SUBMISSION_POLL_CONCURRENCY,
+    ):
+        self.manager = manager
+        self.interval = interval
+        self.rate = rate
+        self.concurrency = concurrency
+
+    def active_players(self) -> List[dict]:
+        """Players in matches that have started, with what is needed to check their submissions"""
+        players = []
+        for match_id, timer_data in list(self.manager.match_timers.items()):
+            problem = self.manager.match_problems.get(match_id)
+            if timer_data.get("status") != "active" or not problem:
+                continue
+            for user_id in timer_data["players"]:
+                username = self.manager.leetcode_usernames.get(user_id)
+                if username:
+                    players.append({
+                        "match_id": match_id,
+                        "user_id": user_id,
+                        "username": username,
+                        "slug": problem.slug,
+                        "start_time": timer_data["start_time"],
+                    })
+        return players
+
+    async def fetch_recent_submissions(self, usernames) -> Dict[str, Optional[list]]:
+        """
+        Batched lookups (LEETCODE_BATCH_SIZE users per request), at most `rate`
+        requests started per second; users in a failed request map to None
+        """
+        from ..leetcode.service.leetcode_service import LEETCODE_BATCH_SIZE, LeetCodeService
+
+        usernames = list(usernames)
+        chunks = [usernames[i:i + LEETCODE_BATCH_SIZE] for i in range(0, len(usernames), LEETCODE_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        spacing = 1 / self.rate if self.rate > 0 else 0
+
+        async def fetch(index: int, chunk: List[str]) -> dict:
+            await asyncio.sleep(index * spacing)
+            async with semaphore:
+                try:
+                    return await LeetCodeService.get_users_submissions(chunk)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not poll submissions for {len(chunk)} players: {e}")
+                    return {}
+
+        submissions = {}
+        for results in await asyncio.gather(*(fetch(i, chunk) for i, chunk in enumerate(chunks))):
+            submissions.update(results)
+        return submissions
+
+    @staticmethod
+    def find_solve(submissions: Optional[list], slug: str, start_time: float) -> Optional[dict]:
+        """Earliest accepted submission for `slug` made since the match started"""
+        solves = [
+            submission for submission in submissions or []
+            if submission.get("titleSlug") == slug and int(submission.get("timestamp") or 0) >= int(start_time)
+        ]
+        return min(solves, key=lambda submission: int(submission["timestamp"])) if solves else None
+
+    async def poll_once(self) -> int:
+        """Run one polling round; returns the number of matches completed"""
+        players = self.active_players()
+        if not players:
+            return 0
+
+        submissions = await self.fetch_recent_submissions(sorted({player["username"] for player in players}))
+
+        # The player who solved it first wins, even if both are seen in the same round
+        winners: Dict[int, tuple] = {}
+        for player in players:
+            solve = self.find_solve(submissions.get(player["username"]), player["slug"], player["start_time"])
+            if solve and (player["match_id"] not in winners or int(solve["timestamp"]) < int(winners[player["match_id"]][1]["timestamp"])):
+                winners[player["match_id"]] = (player["user_id"], solve)
+
+        from ..database.database import AsyncSessionLocal
+
+        completed = 0
+        for match_id, (user_id, solve) in winners.items():
+            try:
+                async with AsyncSessionLocal() as db:
+                    if await self.manager.declare_winner(match_id, user_id, solve, db):
+                        completed += 1
+                        logger.info(f"🤖 Detected accepted submission by user {user_id} in match {match_id}")
+            except Exception as e:
+                logger.error(f"❌ Could not complete match {match_id} from a detected submission: {e}")
+        return completed
+
+    async def run(self):
+        """Background task: poll every `interval` seconds (rounds never overlap)"""
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"❌ Submission polling round failed: {e}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
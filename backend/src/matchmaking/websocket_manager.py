@@ -1,17 +1,41 @@
 # src/matchmaking/websocket_manager.py
-import json
 import asyncio
-from typing import Dict, Set
+import os
+from typing import Dict, List, Optional, Union
 from fastapi import WebSocket
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, update
+from sqlalchemy.orm import undefer_group
 from ..database.models import User, MatchHistory
+from ..database.database import mark_recent_write
 from .manager import MatchmakingManager
 from .service import create_match_record
+from .completed_problems import COMPLETED_PROBLEMS
 from .elo_service import EloService
+from .connection import REPLACED_CLOSE_CODE, ConnectionSender
+from .encoding import EncodedMessage, encode_message
+from .queue_stats import count_potential_matches, elo_histogram
+from ..metrics.metrics import (
+    MATCH_CREATION_FAILURES, MATCH_CREATION_SECONDS, MATCH_WAIT_SECONDS, QUEUE_ABANDONED_WAIT_SECONDS, observe_stage,
+)
+from ..logging_config import SampledLogger, get_logger
 from ..profile.file_service import get_profile_picture_url
 import time
 
+logger = get_logger("matchmaking")
+# Pair rejections happen on every matching pass; log a sample only
+rejection_logger = SampledLogger(logger)
+
+# "elo" (default) or "glicko2": which rating the queue pairs players on
+RATING_SYSTEM = os.getenv("RATING_SYSTEM", "elo").lower()
+
+# The Glicko-2 columns are deferred (an Elo-mode database may not have them yet);
+# user loads that feed queue_rating add these options
+QUEUE_USER_OPTIONS = (undefer_group("glicko2"),) if RATING_SYSTEM == "glicko2" else ()
+
+# In glicko2 mode a player's search window is at least this many rating deviations wide
+GLICKO_RD_WINDOW_FACTOR = float(os.getenv("GLICKO_RD_WINDOW_FACTOR", "1.0"))
+
 class WebSocketManager:
     """
     WebSocket manager for handling real-time matchmaking and game events.
@@ -32,10 +56,15 @@ class WebSocketManager:
         self.match_problems: Dict[int, dict] = {}
         # Store match timers by match_id
         self.match_timers: Dict[int, dict] = {}  # match_id -> {start_time, players, status}
+        # LeetCode usernames of players in a match, so submissions can be checked before the DB read
+        self.leetcode_usernames: Dict[int, str] = {}
+        # Background fetches of winning submissions' code
+        self._code_fetch_tasks: set = set()
+        # Outbound message queue per connected user
+        self.senders: Dict[int, ConnectionSender] = {}
         self.matchmaking_manager = MatchmakingManager()
-        # Start queue status update task
-        self._queue_update_task = None
-        self._start_queue_updates()
+        # Queue status update and matching tasks start with the first connection
+        self._background_tasks: List[asyncio.Task] = []
 
     async def get_user_games_played(self, user_id: int, db: AsyncSession) -> int:
         """Get the total number of completed games for a user."""
@@ -51,38 +80,95 @@ class WebSocketManager:
         )
         return result.scalar() or 0
 
-    async def connect(self, websocket: WebSocket, user_id: int):
+    async def connect(self, websocket: WebSocket, user_id: int, binary_frames: bool = False):
         """Store WebSocket connection (already accepted in route)"""
+        self._start_queue_updates()
+
+        # Replace any previous connection for this user. The old sender is detached
+        # first so closing it doesn't run disconnect() and drop the user from the queue.
+        previous_sender = self.senders.pop(user_id, None)
+        if previous_sender:
+            previous_sender.close(REPLACED_CLOSE_CODE)
+
         self.active_connections[user_id] = websocket
-        print(f"🔌 User {user_id} connected via WebSocket")
+        if user_id in self.queue:
+            # Still queued: the entry moves over to the new socket
+            self.queue[user_id]["websocket"] = websocket
+        sender = ConnectionSender(
+            user_id, websocket, on_close=self._on_sender_closed, binary_frames=binary_frames
+        )
+        self.senders[user_id] = sender
+        sender.start()
+        logger.info(f"🔌 User {user_id} connected via WebSocket")
+
+    def disconnect(self, user_id: int, websocket: Optional[WebSocket] = None):
+        """
+        Remove user from connections and queue.
+        If a websocket is given, only disconnect when it is still the user's current one.
+        """
+        if websocket is not None and self.active_connections.get(user_id) is not websocket:
+            return
 
-    def disconnect(self, user_id: int):
-        """Remove user from connections and queue"""
+        sender = self.senders.pop(user_id, None)
+        if sender:
+            sender.close()
         if user_id in self.active_connections:
             del self.active_connections[user_id]
-        if user_id in self.queue:
-            del self.queue[user_id]
-        print(f"🔌 User {user_id} disconnected")
+        queued = self.queue.pop(user_id, None)
+        if queued:
+            QUEUE_ABANDONED_WAIT_SECONDS.observe(time.time() - queued["join_time"])
+        logger.info(f"🔌 User {user_id} disconnected")
+
+    def _on_sender_closed(self, user_id: int, websocket: WebSocket):
+        """Drop a connection whose writer stopped (send failure or slow consumer)"""
+        if self.senders.get(user_id) is not None and self.senders[user_id].websocket is websocket:
+            self.disconnect(user_id, websocket)
+
+    @staticmethod
+    def _encode(message: Union[dict, EncodedMessage]) -> Optional[EncodedMessage]:
+        """Serialize a message, or log and return None if it can't be encoded"""
+        try:
+            return encode_message(message)
+        except (TypeError, ValueError) as e:
+            logger.error(f"❌ Dropping {message.get('type')} message that could not be encoded: {e}")
+            return None
+
+    async def send_to_user(self, user_id: int, message: Union[dict, EncodedMessage]):
+        """Queue a message for a specific user (never waits on the socket)"""
+        sender = self.senders.get(user_id)
+        if sender:
+            encoded = self._encode(message)
+            if encoded is not None:
+                sender.enqueue(encoded)
+
+    async def broadcast(self, user_ids, message: Union[dict, EncodedMessage]):
+        """Queue the same message for several users, serializing it only once"""
+        encoded = self._encode(message)
+        if encoded is None:
+            return
+        for user_id in user_ids:
+            sender = self.senders.get(user_id)
+            if sender:
+                sender.enqueue(encoded)
 
-    async def send_to_user(self, user_id: int, message: dict):
-        """Send message to specific user"""
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_text(json.dumps(message))
-            except Exception as e:
-                print(f"❌ Failed to send message to user {user_id}: {e}")
-                # Remove dead connection
-                if user_id in self.active_connections:
-                    del self.active_connections[user_id]
+    def queue_rating(self, user: User):
+        """(rating, rating deviation) a user is matched on; the deviation is None in elo mode"""
+        if RATING_SYSTEM == "glicko2":
+            from .glicko2 import DEFAULT_RATING, DEFAULT_RD
 
-    async def join_queue(self, user_id: int, user_elo: int, db: AsyncSession):
+            rating = DEFAULT_RATING if user.glicko_rating is None else user.glicko_rating
+            return round(rating), DEFAULT_RD if user.glicko_rd is None else user.glicko_rd
+        return user.user_elo, None
+
+    async def join_queue(self, user_id: int, user_elo: int, db: AsyncSession, rating_deviation: Optional[float] = None):
         """Add user to matchmaking queue"""
-        print(f"🚀 User {user_id} joining queue with ELO {user_elo}")
+        logger.info(f"🚀 User {user_id} joining queue with ELO {user_elo}")
         
         # Add to queue with timestamp for progressive matching
         import time
         self.queue[user_id] = {
             "elo": user_elo,
+            "rating_deviation": rating_deviation,
             "websocket": self.active_connections.get(user_id),
             "join_time": time.time()
         }
@@ -96,30 +182,49 @@ class WebSocketManager:
         # Try to find a match
         await self.try_match_players(db)
 
+    def _requeue(self, user: User, join_time: float):
+        """Put a user back in the queue after a failed match creation"""
+        rating, rating_deviation = self.queue_rating(user)
+        self.queue[user.id] = {
+            "elo": rating,
+            "rating_deviation": rating_deviation,
+            "websocket": self.active_connections.get(user.id),
+            "join_time": join_time,
+        }
+
     async def leave_queue(self, user_id: int):
         """Remove user from queue"""
-        if user_id in self.queue:
-            del self.queue[user_id]
+        queued = self.queue.pop(user_id, None)
+        if queued:
+            QUEUE_ABANDONED_WAIT_SECONDS.observe(time.time() - queued["join_time"])
             await self.send_to_user(user_id, {
                 "type": "queue_left",
                 "message": "Left matchmaking queue"
             })
-            print(f"🚪 User {user_id} left queue")
-
-    def get_elo_range_for_wait_time(self, wait_time_seconds: float) -> int:
-        """Calculate ELO range based on how long user has been waiting"""
+            logger.info(f"🚪 User {user_id} left queue")
+
+    def get_elo_range_for_wait_time(self, wait_time_seconds: float, rating_deviation: Optional[float] = None) -> int:
+        """
+        Calculate ELO range based on how long user has been waiting.
+        With Glicko-2, players whose rating is still uncertain (new or inactive)
+        search at least GLICKO_RD_WINDOW_FACTOR deviations around their rating.
+        """
         if wait_time_seconds < 30:  # First 30 seconds
-            return 100
+            elo_range = 100
         elif wait_time_seconds < 60:  # 30-60 seconds
-            return 150
+            elo_range = 150
         elif wait_time_seconds < 120:  # 1-2 minutes
-            return 200
+            elo_range = 200
         elif wait_time_seconds < 300:  # 2-5 minutes
-            return 300
+            elo_range = 300
         elif wait_time_seconds < 600:  # 5-10 minutes
-            return 500
+            elo_range = 500
         else:  # 10+ minutes - very generous matching
-            return 1000
+            elo_range = 1000
+
+        if rating_deviation:
+            elo_range = max(elo_range, round(GLICKO_RD_WINDOW_FACTOR * rating_deviation))
+        return elo_range
 
     async def try_match_players(self, db: AsyncSession):
         """Try to match players in queue with progressive ELO expansion"""
@@ -140,56 +245,56 @@ class WebSocketManager:
                 user1_wait_time = current_time - user1_data["join_time"]
                 user2_wait_time = current_time - user2_data["join_time"]
                 
-                # Use the maximum wait time to determine ELO range (more generous matching)
+                # Use the maximum wait time (and rating deviation) to determine ELO range (more generous matching)
                 max_wait_time = max(user1_wait_time, user2_wait_time)
-                elo_range = self.get_elo_range_for_wait_time(max_wait_time)
+                max_deviation = max(user1_data.get("rating_deviation") or 0, user2_data.get("rating_deviation") or 0)
+                elo_range = self.get_elo_range_for_wait_time(max_wait_time, max_deviation)
                 
                 # Check ELO compatibility with progressive range
                 elo_diff = abs(user1_data["elo"] - user2_data["elo"])
                 if elo_diff <= elo_range:
-                    print(f"🎯 Matching users {user1_id} (ELO: {user1_data['elo']}) and {user2_id} (ELO: {user2_data['elo']}) with ELO diff {elo_diff} (range: ±{elo_range}, max wait: {max_wait_time:.1f}s)")
+                    logger.info(f"🎯 Matching users {user1_id} (ELO: {user1_data['elo']}) and {user2_id} (ELO: {user2_data['elo']}) with ELO diff {elo_diff} (range: ±{elo_range}, max wait: {max_wait_time:.1f}s)")
                     await self.create_match(user1_id, user2_id, db)
                     return
                 else:
                     # Log why match was rejected for debugging
                     if elo_diff > 100:  # Only log if it would have been rejected under old system
-                        print(f"⏳ Users {user1_id} (ELO: {user1_data['elo']}) and {user2_id} (ELO: {user2_data['elo']}) - ELO diff {elo_diff} > range ±{elo_range} (wait: {max_wait_time:.1f}s)")
+                        rejection_logger.debug(
+                            "rejected_pair",
+                            "⏳ Users %s (ELO: %s) and %s (ELO: %s) - ELO diff %s > range ±%s (wait: %.1fs)",
+                            user1_id, user1_data["elo"], user2_id, user2_data["elo"], elo_diff, elo_range, max_wait_time,
+                        )
 
     async def create_match(self, user1_id: int, user2_id: int, db: AsyncSession):
         """Create a match between two users"""
+        start = time.perf_counter()
         try:
             # Remove both from queue
-            self.queue.pop(user1_id, None)
-            self.queue.pop(user2_id, None)
+            queued1 = self.queue.pop(user1_id, None)
+            queued2 = self.queue.pop(user2_id, None)
 
             # Get user data from database
-            user1_result = await db.execute(select(User).where(User.id == user1_id))
-            user1 = user1_result.scalar_one_or_none()
-            
-            user2_result = await db.execute(select(User).where(User.id == user2_id))
-            user2 = user2_result.scalar_one_or_none()
+            with observe_stage("user_lookup"):
+                user1_result = await db.execute(select(User).where(User.id == user1_id).options(*QUEUE_USER_OPTIONS))
+                user1 = user1_result.scalar_one_or_none()
+
+                user2_result = await db.execute(select(User).where(User.id == user2_id).options(*QUEUE_USER_OPTIONS))
+                user2 = user2_result.scalar_one_or_none()
 
             if not user1 or not user2:
-                print(f"❌ Failed to get user data for match")
+                logger.error(f"❌ Failed to get user data for match")
+                MATCH_CREATION_FAILURES.labels(reason="missing_user").inc()
                 return
 
             # Create match record
             match_record = await create_match_record(db, user1, user2)
             if not match_record:
-                print(f"❌ Failed to create match record between {user1.email} and {user2.email}")
+                logger.error(f"❌ Failed to create match record between {user1.email} and {user2.email}")
+                MATCH_CREATION_FAILURES.labels(reason="no_problem").inc()
                 # Re-add users to queue with original join times
-                import time
                 current_time = time.time()
-                self.queue[user1_id] = {
-                    "elo": user1.user_elo, 
-                    "websocket": self.active_connections.get(user1_id),
-                    "join_time": current_time - 5  # Give them a small head start
-                }
-                self.queue[user2_id] = {
-                    "elo": user2.user_elo, 
-                    "websocket": self.active_connections.get(user2_id),
-                    "join_time": current_time - 5  # Give them a small head start
-                }
+                self._requeue(user1, current_time - 5)  # Give them a small head start
+                self._requeue(user2, current_time - 5)  # Give them a small head start
                 
                 # Notify users about the retry
                 await self.send_to_user(user1_id, {
@@ -207,8 +312,11 @@ class WebSocketManager:
 
             # Store problem for this match
             self.match_problems[match.match_id] = problem
+            for user in (user1, user2):
+                if user.leetcode_username:
+                    self.leetcode_usernames[user.id] = user.leetcode_username
 
-            print(f"✅ Match created: {match.match_id} between {user1.email} and {user2.email}")
+            logger.info(f"✅ Match created: {match.match_id} between {user1.email} and {user2.email}")
 
             # Initialize match timer
             self.match_timers[match.match_id] = {
@@ -225,42 +333,41 @@ class WebSocketManager:
                 "problem": problem.dict(),
             }
 
-            await self.send_to_user(user1_id, {
-                **match_data,
-                "opponent": {
-                    "username": user2.leetcode_username or user2.email,
-                    "elo": user2.user_elo,
-                    "profile_picture_url": get_profile_picture_url(user2.profile_picture_url)
-                }
-            })
+            with observe_stage("notify"):
+                await self.send_to_user(user1_id, {
+                    **match_data,
+                    "opponent": {
+                        "username": user2.leetcode_username or user2.email,
+                        "elo": user2.user_elo,
+                        "profile_picture_url": get_profile_picture_url(user2.profile_picture_url)
+                    }
+                })
 
-            await self.send_to_user(user2_id, {
-                **match_data,
-                "opponent": {
-                    "username": user1.leetcode_username or user1.email,
-                    "elo": user1.user_elo,
-                    "profile_picture_url": get_profile_picture_url(user1.profile_picture_url)
-                }
-            })
+                await self.send_to_user(user2_id, {
+                    **match_data,
+                    "opponent": {
+                        "username": user1.leetcode_username or user1.email,
+                        "elo": user1.user_elo,
+                        "profile_picture_url": get_profile_picture_url(user1.profile_picture_url)
+                    }
+                })
 
             # Start countdown timer for this match
             asyncio.create_task(self.run_match_timer(match.match_id))
 
+            MATCH_CREATION_SECONDS.observe(time.perf_counter() - start)
+            matched_at = time.time()
+            for queued in (queued1, queued2):
+                if queued:
+                    MATCH_WAIT_SECONDS.observe(matched_at - queued["join_time"])
+
         except Exception as e:
-            print(f"❌ Error creating match: {e}")
+            logger.error(f"❌ Error creating match: {e}")
+            MATCH_CREATION_FAILURES.labels(reason="error").inc()
             # Re-add users to queue if match creation failed
-            import time
             current_time = time.time()
-            self.queue[user1_id] = {
-                "elo": user1.user_elo, 
-                "websocket": self.active_connections.get(user1_id),
-                "join_time": current_time - 10  # Give them more head start after error
-            }
-            self.queue[user2_id] = {
-                "elo": user2.user_elo, 
-                "websocket": self.active_connections.get(user2_id),
-                "join_time": current_time - 10  # Give them more head start after error
-            }
+            self._requeue(user1, current_time - 10)  # Give them more head start after error
+            self._requeue(user2, current_time - 10)  # Give them more head start after error
             
             # Notify users about the error
             await self.send_to_user(user1_id, {
@@ -273,68 +380,112 @@ class WebSocketManager:
             })
 
     async def submit_solution(self, match_id: int, user_id: int, db: AsyncSession, frontend_seconds: int = 0):
-        """Handle solution submission with LeetCode validation"""
-        from sqlalchemy import select
-        from ..database.models import MatchHistory
+        """
+        Handle solution submission with LeetCode validation.
+
+        Runs in three phases so the DB connection is never held across network I/O:
+        1. read the match and submitting user (the recent AC list request is
+           already in flight when the username is known from match creation)
+        2. check the recent AC list - the only upstream round trip before the result
+        3. re-check the match and write the result
+        The submission's code is fetched in the background after both players are notified.
+        """
         from ..leetcode.service.leetcode_service import LeetCodeService
 
-        # Find the match
-        match_result = await db.execute(
-            select(MatchHistory).where(MatchHistory.match_id == match_id)
-        )
-        match = match_result.scalar_one_or_none()
+        # Start the upstream request first so it overlaps with the DB reads
+        username = self.leetcode_usernames.get(user_id)
+        submissions_task = asyncio.create_task(LeetCodeService.get_user_submissions(username)) if username else None
+        try:
+            # Phase 1: DB reads
+            match_result = await db.execute(
+                select(MatchHistory).where(MatchHistory.match_id == match_id)
+            )
+            match = match_result.scalar_one_or_none()
 
-        if not match or match.elo_change != 0:
-            return False
+            if not match or match.elo_change != 0 or user_id not in (match.winner_id, match.loser_id):
+                return False
 
-        # Get the user who submitted
-        user_result = await db.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar_one_or_none()
-        
-        if not user or not user.leetcode_username:
-            await self.send_to_user(user_id, {
-                "type": "error",
-                "message": "LeetCode username not found. Please update your profile."
-            })
-            return False
+            # Get the user who submitted
+            user_result = await db.execute(select(User).where(User.id == user_id))
+            user = user_result.scalar_one_or_none()
 
-        # Get the problem for this match
-        problem = self.match_problems.get(match_id)
-        if not problem:
-            await self.send_to_user(user_id, {
-                "type": "error", 
-                "message": "Match problem not found"
-            })
-            return False
+            if not user or not user.leetcode_username:
+                await self.send_to_user(user_id, {
+                    "type": "error",
+                    "message": "LeetCode username not found. Please update your profile."
+                })
+                return False
 
-        try:
-            # Check user's recent submissions
-            print(f"🔍 Checking submissions for {user.leetcode_username} on problem {problem.slug}")
-            recent_submission = await LeetCodeService.get_recent_user_submission(user.leetcode_username)
-            
-            if not recent_submission:
+            # Get the problem for this match
+            problem = self.match_problems.get(match_id)
+            if not problem:
                 await self.send_to_user(user_id, {
-                    "type": "submission_invalid",
-                    "message": "No recent submissions found. Please submit your solution on LeetCode first."
+                    "type": "error", 
+                    "message": "Match problem not found"
                 })
                 return False
-            
-            # Check if the submission is for the correct problem
-            if recent_submission.titleSlug != problem.slug:
+
+            # Release the connection while waiting on LeetCode (this expires the loaded rows)
+            leetcode_username = user.leetcode_username
+            await db.rollback()
+
+            # Phase 2: validate against the user's most recent accepted submission
+            try:
+                if username != leetcode_username:
+                    if submissions_task:
+                        submissions_task.cancel()
+                    submissions_task = asyncio.create_task(LeetCodeService.get_user_submissions(leetcode_username))
+
+                logger.info(f"🔍 Checking submissions for {leetcode_username} on problem {problem.slug}")
+                submissions = await submissions_task
+                recent_submission = submissions[0] if submissions else None
+
+                if not recent_submission:
+                    await self.send_to_user(user_id, {
+                        "type": "submission_invalid",
+                        "message": "No recent submissions found. Please submit your solution on LeetCode first."
+                    })
+                    return False
+
+                # Check if the submission is for the correct problem
+                if recent_submission["titleSlug"] != problem.slug:
+                    await self.send_to_user(user_id, {
+                        "type": "submission_invalid", 
+                        "message": f"Your recent submission is for '{recent_submission['titleSlug']}', but the match problem is '{problem.slug}'. Please submit the correct problem."
+                    })
+                    return False
+
+                logger.info(f"✅ Valid submission found for {leetcode_username}: {recent_submission['titleSlug']}")
+
+            except Exception as e:
+                logger.error(f"❌ Error validating submission: {e}")
                 await self.send_to_user(user_id, {
-                    "type": "submission_invalid", 
-                    "message": f"Your recent submission is for '{recent_submission.titleSlug}', but the match problem is '{problem.slug}'. Please submit the correct problem."
+                    "type": "error",
+                    "message": "Failed to validate submission. Please try again."
                 })
                 return False
-            
-            print(f"✅ Valid submission found for {user.leetcode_username}: {recent_submission.titleSlug}")
-            
-        except Exception as e:
-            print(f"❌ Error validating submission: {e}")
-            await self.send_to_user(user_id, {
-                "type": "error",
-                "message": "Failed to validate submission. Please try again."
-            })
+        finally:
+            if submissions_task and not submissions_task.done():
+                submissions_task.cancel()
+
+        # Phase 3: write the result
+        return await self.declare_winner(match_id, user_id, recent_submission, db, frontend_seconds)
+
+    async def declare_winner(self, match_id: int, user_id: int, submission: dict, db: AsyncSession, frontend_seconds: int = 0):
+        """
+        Complete a match won by user_id with an accepted LeetCode submission
+        (an entry of recentAcSubmissionList). Returns False if the match was
+        already finished, e.g. by the opponent in the meantime.
+        """
+        problem = self.match_problems.get(match_id)
+        if not problem:
+            return False
+
+        match_result = await db.execute(
+            select(MatchHistory).where(MatchHistory.match_id == match_id)
+        )
+        match = match_result.scalar_one_or_none()
+        if not match or match.elo_change != 0:
             return False
 
         # Store original ELOs before any swapping
@@ -359,49 +510,36 @@ class WebSocketManager:
         # Use frontend timer value if provided, otherwise calculate from server
         if frontend_seconds > 0:
             match.match_seconds = frontend_seconds
-            print(f"⏱️ Match {match_id} duration (from frontend): {frontend_seconds} seconds")
+            logger.info(f"⏱️ Match {match_id} duration (from frontend): {frontend_seconds} seconds")
         else:
             # Fallback to server calculation
             timer_data = self.match_timers.get(match_id)
             if timer_data and timer_data.get("start_time"):
                 match_duration = int(time.time() - timer_data["start_time"])
                 match.match_seconds = match_duration
-                print(f"⏱️ Match {match_id} duration (server calculated): {match_duration} seconds")
+                logger.info(f"⏱️ Match {match_id} duration (server calculated): {match_duration} seconds")
             else:
                 match.match_seconds = 0
-                print(f"⚠️ No timer data found for match {match_id}")
+                logger.warning(f"⚠️ No timer data found for match {match_id}")
 
         # Update match with problem slug
-        problem = self.match_problems.get(match_id)
-        if problem:
-            match.leetcode_problem = problem.slug
+        match.leetcode_problem = problem.slug
+        COMPLETED_PROBLEMS.record((match.winner_id, match.loser_id), problem.slug)
 
-        # Get runtime, memory, and code data from the winner's submission
+        # Get runtime and memory from the winner's submission (the code follows in the background)
+        runtime = submission.get("runtime")
+        memory = submission.get("memory")
+        # Parse runtime (remove "ms" and convert to int)
         try:
-            if recent_submission:
-                # Parse runtime (remove "ms" and convert to int)
-                try:
-                    winner_runtime = int(recent_submission.runtime.replace(" ms", "").replace("ms", "")) if recent_submission.runtime else -1
-                except (ValueError, AttributeError):
-                    winner_runtime = -1
-                
-                # Parse memory (remove "MB" and convert to float)
-                try:
-                    winner_memory = float(recent_submission.memory.replace(" MB", "").replace("MB", "")) if recent_submission.memory else -1.0
-                except (ValueError, AttributeError):
-                    winner_memory = -1.0
-                
-                # Get the submitted code
-                winner_code = recent_submission.code if hasattr(recent_submission, 'code') else None
-            else:
-                winner_runtime = -1
-                winner_memory = -1.0
-                winner_code = None
-        except Exception as e:
-            print(f"Error parsing submission data: {e}")
+            winner_runtime = int(runtime.replace(" ms", "").replace("ms", "")) if runtime else -1
+        except (ValueError, AttributeError):
             winner_runtime = -1
+
+        # Parse memory (remove "MB" and convert to float)
+        try:
+            winner_memory = float(memory.replace(" MB", "").replace("MB", "")) if memory else -1.0
+        except (ValueError, AttributeError):
             winner_memory = -1.0
-            winner_code = None
 
         # Get user data and calculate ELO changes
         winner_result = await db.execute(select(User).where(User.id == winner_id))
@@ -443,32 +581,39 @@ class WebSocketManager:
             loser.user_elo += loser_elo_change  # This will be negative
             match.winner_elo = winner.user_elo
             match.loser_elo = loser.user_elo
-            
-            
-            
-            
 
-        # Set runtime, memory, and code data
+        # Set runtime and memory data
         match.winner_runtime = winner_runtime
         match.loser_runtime = -1  # Loser gets -1 for runtime
         match.winner_memory = winner_memory
         match.loser_memory = -1.0  # Loser gets -1 for memory
-        match.winner_code = winner_code  # Store winner's code
+        # Filled in by _store_winner_code. If that fetch fails the code stays NULL,
+        # but winner_runtime is set, so elo_replay doesn't count this as a resignation
+        match.winner_code = None
         match.loser_code = None  # Loser doesn't have valid code
 
         await db.commit()
+        mark_recent_write(user_ids=(winner_id, loser_id), match_ids=(match_id,))
 
-        # Stop the timer
+        # Stop the timer and forget both players' LeetCode usernames, as the resign path does
         self.stop_match_timer(match_id)
-
-        # Check achievements for both players
-        from ..achievements.achievements import AchievementTracker
-        
-        # Check achievements for winner
-        winner_achievements = await AchievementTracker.check_achievements(winner_id, db, "match_completed")
-        
-        # Check achievements for loser (they still played a game)
-        loser_achievements = await AchievementTracker.check_achievements(loser_id, db, "match_completed")
+        if match_id in self.match_timers:
+            for player_id in self.match_timers[match_id]["players"]:
+                self.leetcode_usernames.pop(player_id, None)
+
+        # Update achievement counters for both players (loser still played a game)
+        from ..achievements.achievements import AchievementTracker, MatchCompletedEvent
+
+        unlocked = await AchievementTracker.on_match_completed(
+            MatchCompletedEvent(
+                winner_id=winner_id,
+                loser_id=loser_id,
+                difficulty=problem.difficulty if problem else None,
+            ),
+            db,
+        )
+        winner_achievements = unlocked.get(winner_id, [])
+        loser_achievements = unlocked.get(loser_id, [])
 
         # Notify both players
         await self.send_to_user(winner_id, {
@@ -487,9 +632,36 @@ class WebSocketManager:
             "achievements_unlocked": loser_achievements
         })
 
-        print(f"🏆 Match {match_id} completed. Winner: {winner_id}, Loser: {loser_id}")
+        # The code is only shown in match history, so it doesn't hold up the result
+        task = asyncio.create_task(self._store_winner_code(match_id, winner_id, submission["id"]))
+        self._code_fetch_tasks.add(task)
+        task.add_done_callback(self._code_fetch_tasks.discard)
+
+        logger.info(f"🏆 Match {match_id} completed. Winner: {winner_id}, Loser: {loser_id}")
         return True
 
+    async def _store_winner_code(self, match_id: int, winner_id: int, submission_id):
+        """Fetch the winning submission's code and attach it to the finished match"""
+        from ..database.database import AsyncSessionLocal
+        from ..leetcode.service.leetcode_service import LeetCodeService
+
+        try:
+            details = await LeetCodeService.get_submission_details(submission_id)
+            code = details.get("code") if details else None
+            if code is None:
+                logger.warning(f"⚠️ No code returned for submission {submission_id} of match {match_id}")
+                return
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(MatchHistory)
+                    .where(MatchHistory.match_id == match_id)
+                    .where(MatchHistory.winner_id == winner_id)
+                    .values(winner_code=code)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not store submission code for match {match_id}: {e}")
+
     async def resign_match(self, match_id: int, user_id: int, db: AsyncSession, frontend_seconds: int = 0):
         """Handle match resignation"""
         from sqlalchemy import select
@@ -527,22 +699,23 @@ class WebSocketManager:
         # Use frontend timer value if provided, otherwise calculate from server
         if frontend_seconds > 0:
             match.match_seconds = frontend_seconds
-            print(f"⏱️ Match {match_id} resigned after (from frontend): {frontend_seconds} seconds")
+            logger.info(f"⏱️ Match {match_id} resigned after (from frontend): {frontend_seconds} seconds")
         else:
             # Fallback to server calculation
             timer_data = self.match_timers.get(match_id)
             if timer_data and timer_data.get("start_time"):
                 match_duration = int(time.time() - timer_data["start_time"])
                 match.match_seconds = match_duration
-                print(f"⏱️ Match {match_id} resigned after (server calculated): {match_duration} seconds")
+                logger.info(f"⏱️ Match {match_id} resigned after (server calculated): {match_duration} seconds")
             else:
                 match.match_seconds = 0
-                print(f"⚠️ No timer data found for resigned match {match_id}")
+                logger.warning(f"⚠️ No timer data found for resigned match {match_id}")
 
         # Update match with problem slug
         problem = self.match_problems.get(match_id)
         if problem:
             match.leetcode_problem = problem.slug
+            COMPLETED_PROBLEMS.record((winner_id, loser_id), problem.slug)
 
         # Get user data and calculate ELO changes for resignation
         winner_result = await db.execute(select(User).where(User.id == winner_id))
@@ -594,15 +767,21 @@ class WebSocketManager:
         match.loser_code = None  # No code for resignation
 
         await db.commit()
-
-        # Check achievements for both players
-        from ..achievements.achievements import AchievementTracker
-        
-        # Check achievements for winner (they won by resignation)
-        winner_achievements = await AchievementTracker.check_achievements(winner_id, db, "match_completed")
-        
-        # Check achievements for loser (they still played a game)
-        loser_achievements = await AchievementTracker.check_achievements(loser_id, db, "match_completed")
+        mark_recent_write(user_ids=(winner_id, loser_id), match_ids=(match_id,))
+
+        # Update achievement counters for both players (loser still played a game)
+        from ..achievements.achievements import AchievementTracker, MatchCompletedEvent
+
+        unlocked = await AchievementTracker.on_match_completed(
+            MatchCompletedEvent(
+                winner_id=winner_id,
+                loser_id=loser_id,
+                difficulty=problem.difficulty if problem else None,
+            ),
+            db,
+        )
+        winner_achievements = unlocked.get(winner_id, [])
+        loser_achievements = unlocked.get(loser_id, [])
 
         # Notify both players
         await self.send_to_user(winner_id, {
@@ -623,11 +802,13 @@ class WebSocketManager:
             "achievements_unlocked": loser_achievements
         })
 
-        print(f"🏳️ Match {match_id} ended by resignation. Winner: {winner_id}, Loser: {loser_id}")
+        logger.info(f"🏳️ Match {match_id} ended by resignation. Winner: {winner_id}, Loser: {loser_id}")
         
         # Stop the timer for this match
         if match_id in self.match_timers:
             self.match_timers[match_id]["status"] = "completed"
+            for player_id in self.match_timers[match_id]["players"]:
+                self.leetcode_usernames.pop(player_id, None)
         
         return True
 
@@ -646,22 +827,20 @@ class WebSocketManager:
                     return
                 
                 # Send countdown to both players
-                for player_id in players:
-                    await self.send_to_user(player_id, {
-                        "type": "timer_update",
-                        "phase": "countdown",
-                        "countdown": countdown
-                    })
+                await self.broadcast(players, {
+                    "type": "timer_update",
+                    "phase": "countdown",
+                    "countdown": countdown
+                })
                 
                 await asyncio.sleep(1)
 
             # Send "START!" message
-            for player_id in players:
-                await self.send_to_user(player_id, {
-                    "type": "timer_update",
-                    "phase": "start",
-                    "message": "START!"
-                })
+            await self.broadcast(players, {
+                "type": "timer_update",
+                "phase": "start",
+                "message": "START!"
+            })
             
             await asyncio.sleep(1)
 
@@ -674,19 +853,18 @@ class WebSocketManager:
             start_timestamp = timer_data["start_time"]
             
             # Send match start time to both players for client-side calculation
-            for player_id in players:
-                await self.send_to_user(player_id, {
-                    "type": "timer_update",
-                    "phase": "active",
-                    "start_timestamp": start_timestamp
-                })
+            await self.broadcast(players, {
+                "type": "timer_update",
+                "phase": "active",
+                "start_timestamp": start_timestamp
+            })
             
             # Keep timer alive but don't send continuous updates
             while timer_data["status"] == "active":
                 await asyncio.sleep(5)  # Check every 5 seconds instead of every second
 
         except Exception as e:
-            print(f"❌ Timer error for match {match_id}: {e}")
+            logger.error(f"❌ Timer error for match {match_id}: {e}")
         finally:
             # Clean up timer data
             if match_id in self.match_timers:
@@ -698,16 +876,17 @@ class WebSocketManager:
             self.match_timers[match_id]["status"] = "completed"
 
     def _start_queue_updates(self):
-        """Start the periodic queue status update and matching tasks"""
-        import asyncio
-        
+        """Start the periodic queue status update and matching tasks (once)"""
+        if self._background_tasks:
+            return
+
         async def queue_update_loop():
             while True:
                 try:
                     await asyncio.sleep(10)  # Update every 10 seconds
                     await self._send_queue_updates()
                 except Exception as e:
-                    print(f"❌ Queue update error: {e}")
+                    logger.error(f"❌ Queue update error: {e}")
         
         async def periodic_matching_loop():
             """Periodically try to match players to handle progressive ELO expansion"""
@@ -719,45 +898,47 @@ class WebSocketManager:
                         async with AsyncSessionLocal() as db:
                             await self.try_match_players(db)
                 except Exception as e:
-                    print(f"❌ Periodic matching error: {e}")
+                    logger.error(f"❌ Periodic matching error: {e}")
         
         # Start both tasks
-        asyncio.create_task(queue_update_loop())
-        asyncio.create_task(periodic_matching_loop())
+        self._background_tasks = [
+            asyncio.create_task(queue_update_loop()),
+            asyncio.create_task(periodic_matching_loop()),
+        ]
 
     async def _send_queue_updates(self):
         """Send queue status updates to all users in queue"""
         if not self.queue:
             return
-            
-        import time
-        current_time = time.time()
+
         queue_size = len(self.queue)
-        
-        for user_id, user_data in self.queue.items():
-            wait_time = current_time - user_data["join_time"]
-            current_elo_range = self.get_elo_range_for_wait_time(wait_time)
-            
-            # Count potential matches within current ELO range
-            user_elo = user_data["elo"]
-            potential_matches = 0
-            for other_id, other_data in self.queue.items():
-                if other_id != user_id:
-                    elo_diff = abs(user_elo - other_data["elo"])
-                    if elo_diff <= current_elo_range:
-                        potential_matches += 1
-            
+        statuses = count_potential_matches(self.queue, time.time(), self.get_elo_range_for_wait_time)
+
+        for user_id, status in statuses.items():
+            wait_time = int(status["wait_time"])
+            current_elo_range = status["elo_range"]
+            potential_matches = status["potential_matches"]
+
             await self.send_to_user(user_id, {
                 "type": "queue_status",
                 "queue_size": queue_size,
-                "wait_time": int(wait_time),
+                "wait_time": wait_time,
                 "elo_range": current_elo_range,
                 "potential_matches": potential_matches,
-                "message": f"Searching... ({int(wait_time)}s, ±{current_elo_range} ELO, {potential_matches} potential matches)"
+                "message": f"Searching... ({wait_time}s, ±{current_elo_range} ELO, {potential_matches} potential matches)"
             })
 
+    def get_queue_stats(self) -> dict:
+        """Queue size, ELO distribution and wait times for ops dashboards"""
+        current_time = time.time()
+        wait_times = sorted(current_time - user_data["join_time"] for user_data in self.queue.values())
+        return {
+            "queue_size": len(self.queue),
+            "longest_wait_seconds": round(wait_times[-1], 1) if wait_times else 0,
+            "median_wait_seconds": round(wait_times[len(wait_times) // 2], 1) if wait_times else 0,
+            "elo_histogram": elo_histogram(self.queue),
+        }
+
 
-    
-    
 # Global WebSocket manager instance
 websocket_manager = WebSocketManager()
\ No newline at end of file
@@ -5,7 +5,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..database.database import get_db
 from ..database.models import User
-from .websocket_manager import websocket_manager
+from .websocket_manager import QUEUE_USER_OPTIONS, websocket_manager
+from ..logging_config import get_logger
+
+logger = get_logger("websocket")
 
 router = APIRouter()
 
@@ -18,7 +21,7 @@ async def test_websocket(websocket: WebSocket):
             data = await websocket.receive_text()
             await websocket.send_text(f"Echo: {data}")
     except WebSocketDisconnect:
-        print("Test WebSocket disconnected")
+        logger.info("Test WebSocket disconnected")
 
 @router.websocket("/ws/matchmaking/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
@@ -27,10 +30,11 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
     try:
         # Accept connection first
         await websocket.accept()
-        print(f"🔌 WebSocket connection accepted for user {user_id}")
+        logger.info(f"🔌 WebSocket connection accepted for user {user_id}")
         
-        # Connect user to manager
-        await websocket_manager.connect(websocket, user_id)
+        # Connect user to manager (clients may opt into binary frames with ?frames=binary)
+        binary_frames = websocket.query_params.get("frames") == "binary"
+        await websocket_manager.connect(websocket, user_id, binary_frames=binary_frames)
         
         # Send connection confirmation
         await websocket_manager.send_to_user(user_id, {
@@ -60,7 +64,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
             active_match = active_match_result.scalar_one_or_none()
             
             if active_match:
-                print(f"🎮 User {user_id} has an active match {active_match.match_id}, sending match_found")
+                logger.info(f"🎮 User {user_id} has an active match {active_match.match_id}, sending match_found")
                 
                 # Get opponent info
                 opponent_id = active_match.loser_id if active_match.winner_id == user_id else active_match.winner_id
@@ -86,7 +90,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
                     # Check if timer is already running
                     timer_data = websocket_manager.match_timers.get(active_match.match_id)
                     if not timer_data:
-                        print(f"⏱️ Starting timer for existing match {active_match.match_id}")
+                        logger.info(f"⏱️ Starting timer for existing match {active_match.match_id}")
                         websocket_manager.match_timers[active_match.match_id] = {
                             "start_time": None,
                             "players": [active_match.winner_id, active_match.loser_id],
@@ -107,19 +111,20 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
             # Receive messages from client
             data = await websocket.receive_text()
             message = json.loads(data)
-            print(f"📨 Received message from user {user_id}: {message}")
-            
             message_type = message.get("type")
+            # Payloads are not logged: they arrive several times a second per player
+            logger.debug("📨 Received %s from user %s", message_type, user_id)
             
             if message_type == "join_queue":
                 # Get database session for this operation
                 from ..database.database import AsyncSessionLocal
                 async with AsyncSessionLocal() as db:
                     # Get user data
-                    result = await db.execute(select(User).where(User.id == user_id))
+                    result = await db.execute(select(User).where(User.id == user_id).options(*QUEUE_USER_OPTIONS))
                     user = result.scalar_one_or_none()
                     if user:
-                        await websocket_manager.join_queue(user_id, user.user_elo, db)
+                        rating, rating_deviation = websocket_manager.queue_rating(user)
+                        await websocket_manager.join_queue(user_id, rating, db, rating_deviation=rating_deviation)
                     else:
                         await websocket_manager.send_to_user(user_id, {
                             "type": "error",
@@ -160,8 +165,8 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
                 await websocket_manager.send_to_user(user_id, {"type": "pong"})
                 
     except WebSocketDisconnect:
-        print(f"🔌 WebSocket disconnected for user {user_id}")
-        websocket_manager.disconnect(user_id)
+        logger.info(f"🔌 WebSocket disconnected for user {user_id}")
+        websocket_manager.disconnect(user_id, websocket)
     except Exception as e:
-        print(f"❌ WebSocket error for user {user_id}: {e}")
-        websocket_manager.disconnect(user_id)
\ No newline at end of file
+        logger.error(f"❌ WebSocket error for user {user_id}: {e}")
+        websocket_manager.disconnect(user_id, websocket)
\ No newline at end of file
@@ -0,0 +1,176 @@
+# src/metrics/metrics.py
+"""
+Prometheus metrics for matchmaking, WebSockets, the LeetCode client and the DB pool.
+
+Event metrics (latencies, failures) are recorded where they happen. State that
+already lives in memory (queue, connections, pool occupancy) is read at scrape
+time by RuntimeCollector instead of being mirrored into gauges.
+"""
+import re
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeHistogramMetricFamily, GaugeMetricFamily
+
+# Seconds buckets shared by the wait-time histograms (queue waits run from seconds to minutes)
+WAIT_TIME_BUCKETS = (1, 5, 10, 15, 30, 45, 60, 90, 120, 180, 300, 600)
+
+# Latency buckets for single operations (DB calls, GraphQL requests, sends)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15)
+
+
+# --- Matchmaking ---
+MATCH_WAIT_SECONDS = Histogram(
+    "matchmaking_time_to_match_seconds",
+    "Time a player spent in the queue before being matched",
+    buckets=WAIT_TIME_BUCKETS,
+)
+QUEUE_ABANDONED_WAIT_SECONDS = Histogram(
+    "matchmaking_queue_abandoned_wait_seconds",
+    "Time a player spent in the queue before leaving or disconnecting unmatched",
+    buckets=WAIT_TIME_BUCKETS,
+)
+MATCH_CREATION_SECONDS = Histogram(
+    "matchmaking_match_creation_seconds",
+    "End-to-end time to create a match and notify both players",
+    buckets=LATENCY_BUCKETS,
+)
+MATCH_CREATION_STAGE_SECONDS = Histogram(
+    "matchmaking_match_creation_stage_seconds",
+    "Time spent in each stage of match creation",
+    ["stage"],  # user_lookup, db_cleanup, db_read, problem_selection, db_write, notify
+    buckets=LATENCY_BUCKETS,
+)
+MATCH_CREATION_FAILURES = Counter(
+    "matchmaking_match_creation_failures_total",
+    "Matches that could not be created",
+    ["reason"],  # missing_user, no_problem, error
+)
+PROBLEM_POOL_REQUESTS = Counter(
+    "matchmaking_problem_pool_requests_total",
+    "Match problems looked up in the pre-fetched pool",
+    ["result"],  # hit, miss
+)
+
+# --- WebSockets ---
+WS_SEND_FAILURES = Counter(
+    "websocket_send_failures_total",
+    "WebSocket sends that failed or were abandoned",
+    ["reason"],  # timeout, error, slow_consumer
+)
+WS_MESSAGES_DROPPED = Counter(
+    "websocket_messages_dropped_total",
+    "Droppable status messages discarded for clients that fell behind",
+)
+
+# --- LeetCode GraphQL client ---
+GRAPHQL_REQUEST_SECONDS = Histogram(
+    "leetcode_graphql_request_seconds",
+    "LeetCode GraphQL request latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+GRAPHQL_ERRORS = Counter(
+    "leetcode_graphql_errors_total",
+    "LeetCode GraphQL requests that failed",
+    ["operation", "reason"],  # http_<status>, transport, graphql
+)
+
+_OPERATION_NAME = re.compile(r"\b(?:query|mutation)\s+(\w+)")
+_operation_names = {}
+
+
+def graphql_operation_name(query: str) -> str:
+    """Operation name of a GraphQL document, e.g. 'recentAcSubmissions'"""
+    name = _operation_names.get(query)
+    if name is None:
+        match = _OPERATION_NAME.search(query)
+        name = match.group(1) if match else "anonymous"
+        _operation_names[query] = name
+    return name
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Time a block as one stage of match creation"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        MATCH_CREATION_STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+class RuntimeCollector:
+    """Reads queue, connection and DB pool state when /metrics is scraped"""
+
+    def describe(self):
+        # Keeps register() from calling collect() while the app is still importing
+        return []
+
+    def collect(self):
+        # Imported here: both modules import this one for their event metrics
+        from ..matchmaking.websocket_manager import websocket_manager
+        from ..database import database
+
+        queue = dict(websocket_manager.queue)
+        now = time.time()
+
+        depth = GaugeMetricFamily("matchmaking_queue_depth", "Players currently waiting in the queue")
+        depth.add_metric([], len(queue))
+        yield depth
+
+        waits = [now - user_data["join_time"] for user_data in queue.values()]
+        buckets = [(str(bound), sum(1 for wait in waits if wait <= bound)) for bound in WAIT_TIME_BUCKETS]
+        buckets.append(("+Inf", len(waits)))
+        # A snapshot that shrinks as players leave, so a gauge histogram (_gcount/_gsum);
+        # finished waits go to matchmaking_time_to_match / matchmaking_queue_abandoned_wait
+        current_wait = GaugeHistogramMetricFamily(
+            "matchmaking_queue_wait_seconds",
+            "How long each player currently in the queue has been waiting",
+        )
+        current_wait.add_metric([], buckets, sum(waits))
+        yield current_wait
+
+        connections = GaugeMetricFamily("websocket_active_connections", "Open matchmaking WebSocket connections")
+        connections.add_metric([], len(websocket_manager.senders))
+        yield connections
+
+        pending = GaugeMetricFamily("websocket_pending_messages", "Messages buffered for all connections")
+        pending.add_metric([], sum(sender.pending_count for sender in list(websocket_manager.senders.values())))
+        yield pending
+
+        engines = {"primary": database.async_engine}
+        if database.read_engine is not database.async_engine:
+            engines["replica"] = database.read_engine
+        yield from self._pool_metrics(engines, database.get_pool_stats)
+
+    @staticmethod
+    def _pool_metrics(engines: dict, get_pool_stats):
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"]),
+            "checked_out": GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Overflow connections open", labels=["engine"]),
+            "checkout_wait_max_ms": GaugeMetricFamily(
+                "db_pool_checkout_wait_max_milliseconds", "Longest wait for a connection", labels=["engine"]
+            ),
+        }
+        counters = {
+            "checkouts": CounterMetricFamily("db_pool_checkouts", "Connection checkouts", labels=["engine"]),
+            "overflow_checkouts": CounterMetricFamily(
+                "db_pool_overflow_checkouts", "Checkouts made while overflow connections were open", labels=["engine"]
+            ),
+            "timeouts": CounterMetricFamily("db_pool_timeouts", "Checkouts that timed out", labels=["engine"]),
+        }
+
+        for name, engine in engines.items():
+            stats = get_pool_stats(engine)
+            for key, family in {**gauges, **counters}.items():
+                if key in stats:
+                    family.add_metric([name], stats[key])
+
+        yield from gauges.values()
+        yield from counters.values()
+
+
+REGISTRY.register(RuntimeCollector())
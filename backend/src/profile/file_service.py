@@ -6,7 +6,6 @@ import uuid
 import io
 from typing import Optional
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 import aiofiles
 
 # Configuration
@@ -59,7 +58,10 @@ async def save_profile_picture(file: UploadFile, user_id: int) -> str:
     file_id = str(uuid.uuid4())
     filename = f"{user_id}_{file_id}{file_ext}"
     file_path = os.path.join(UPLOAD_DIR, filename)
-    
+
+    # Pillow is only needed for uploads, so keep it out of app startup
+    from PIL import Image
+
     try:
         # Save and resize image
         with Image.open(io.BytesIO(file_content)) as img:
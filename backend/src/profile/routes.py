@@ -5,14 +5,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.profile.service import get_profile_data, update_profile_picture
 from src.profile.schemas import ProfileOut
 from src.profile.file_service import save_profile_picture, delete_profile_picture, get_profile_picture_url
-from src.database.database import get_db
+from src.database.database import get_db, get_read_db
 from src.auth.auth import current_user
 from src.database.models import User
 
 router = APIRouter(prefix="/api/profile", tags=["Profile"])
 
 @router.get("/{user_id}", response_model=ProfileOut)
-async def get_profile(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_profile(user_id: int, db: AsyncSession = Depends(get_read_db)):
     data = await get_profile_data(db, user_id)
     if not data:
         raise HTTPException(status_code=404, detail="User not found")
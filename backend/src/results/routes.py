@@ -1,7 +1,7 @@
 # src/results/routes.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..database.database import get_db
+from ..database.database import get_read_db
 from .service import ResultsService
 
 router = APIRouter(prefix="/match-result", tags=["Match Results"])
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/match-result", tags=["Match Results"])
 @router.get("/{match_id}")
 async def get_match_result(
     match_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get match result by match ID - publicly viewable."""
     
@@ -43,7 +43,7 @@ async def get_match_result(
 @router.get("/")
 async def list_recent_matches(
     limit: int = 10,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List recent matches for testing purposes."""
     
@@ -59,7 +59,7 @@ async def list_recent_matches(
 async def get_user_match_history(
     user_id: int,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get match history for a specific user."""
     
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import desc, select
 from src.database.models import User
-from src.database.database import get_db
+from src.database.database import get_db, get_read_db
 from src.users import service, schemas
 from src.profile.file_service import get_profile_picture_url
 
@@ -38,7 +38,7 @@ async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)):
     }
     
 @router.get("/leaderboard")
-async def get_leaderboard(db: AsyncSession = Depends(get_db)):
+async def get_leaderboard(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(
         select(
             User.id,
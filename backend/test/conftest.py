@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Make `src` importable when pytest is run from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests run against a throwaway SQLite database unless one is configured
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.database import Base
+from src.database.models import User, MatchHistory, UserAchievementStats
+from src.achievements.achievements import AchievementTracker, MatchCompletedEvent
+
+
+@asynccontextmanager
+async def make_session():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        yield db
+    await engine.dispose()
+
+
+def add_users(db, *user_ids):
+    for user_id in user_ids:
+        db.add(User(id=user_id, email=f"user{user_id}", hashed_password="x"))
+
+
+def completed_match(winner_id, loser_id, slug, difficulty=None):
+    return MatchHistory(
+        winner_id=winner_id, loser_id=loser_id, leetcode_problem=slug, difficulty=difficulty,
+        elo_change=16, winner_elo=1216, loser_elo=1184, match_seconds=60,
+        winner_runtime=1, loser_runtime=-1, winner_memory=1.0, loser_memory=-1.0,
+    )
+
+
+def test_first_event_seeds_counters_from_history():
+    async def scenario():
+        async with make_session() as db:
+            add_users(db, 1, 2)
+            db.add(completed_match(1, 2, "two-sum", "EASY"))
+            await db.commit()
+
+            unlocked = await AchievementTracker.on_match_completed(MatchCompletedEvent(1, 2, "Easy"), db)
+            counters = await db.get(UserAchievementStats, 1)
+            return unlocked, counters
+
+    unlocked, counters = asyncio.run(scenario())
+    # Seeded from history, so the committed match is counted exactly once
+    assert counters.games_played == 1
+    assert counters.wins == 1
+    assert counters.easy_wins == 1
+    assert {a["id"] for a in unlocked[1]} == {0, 3}
+    assert {a["id"] for a in unlocked[2]} == {0}
+
+
+def test_subsequent_events_apply_deltas_without_history():
+    async def scenario():
+        async with make_session() as db:
+            add_users(db, 1, 2)
+            db.add(UserAchievementStats(user_id=1, games_played=4, wins=4, easy_wins=2, medium_wins=2, hard_wins=0))
+            db.add(UserAchievementStats(user_id=2, games_played=0, wins=0))
+            await db.commit()
+
+            unlocked = await AchievementTracker.on_match_completed(MatchCompletedEvent(1, 2, "Hard"), db)
+            counters = await db.get(UserAchievementStats, 1)
+            return unlocked, counters
+
+    unlocked, counters = asyncio.run(scenario())
+    assert (counters.games_played, counters.wins, counters.hard_wins) == (5, 5, 1)
+    # Play 5, each difficulty, win 5, solve 1 hard (+ earlier thresholds)
+    assert {2, 1, 4, 7}.issubset({a["id"] for a in unlocked[1]})
+
+
+def test_rest_submit_updates_counters():
+    from src.matchmaking.routes import submit_solution
+
+    async def scenario():
+        async with make_session() as db:
+            add_users(db, 1, 2)
+            db.add(UserAchievementStats(user_id=1, games_played=3, wins=2, medium_wins=2))
+            db.add(UserAchievementStats(user_id=2, games_played=3, wins=1))
+            db.add(MatchHistory(
+                match_id=10, winner_id=1, loser_id=2, leetcode_problem="TBD", difficulty="MEDIUM",
+                elo_change=0, winner_elo=1200, loser_elo=1200, match_seconds=0,
+                winner_runtime=0, loser_runtime=0, winner_memory=0.0, loser_memory=0.0,
+            ))
+            await db.commit()
+
+            # The second player submits over REST and wins
+            result = await submit_solution(10, 2, db)
+            return result, await db.get(UserAchievementStats, 1), await db.get(UserAchievementStats, 2)
+
+    result, loser, winner = asyncio.run(scenario())
+    assert result["winner_id"] == 2
+    assert (winner.games_played, winner.wins, winner.medium_wins) == (4, 2, 1)
+    assert (loser.games_played, loser.wins) == (4, 2)
+
+
+def test_declare_winner_forgets_usernames_and_keeps_runtime(monkeypatch):
+    import time
+    from src.leetcode.schemas import Problem
+    from src.leetcode.service.leetcode_service import LeetCodeService
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    async def no_details(submission_id):
+        return None
+
+    monkeypatch.setattr(LeetCodeService, "get_submission_details", staticmethod(no_details))
+
+    async def scenario():
+        manager = WebSocketManager()
+        manager.match_problems[10] = Problem(
+            id=1, title="Two Sum", slug="two-sum", difficulty="Easy", tags=[], acceptance_rate="50"
+        )
+        manager.match_timers[10] = {"start_time": time.time(), "players": [1, 2], "status": "active", "countdown": 0}
+        manager.leetcode_usernames.update({1: "alice", 2: "bob", 3: "carol"})
+        async with make_session() as db:
+            add_users(db, 1, 2)
+            db.add(MatchHistory(
+                match_id=10, winner_id=1, loser_id=2, leetcode_problem="TBD", difficulty="EASY",
+                elo_change=0, winner_elo=1200, loser_elo=1200, match_seconds=0,
+                winner_runtime=0, loser_runtime=0, winner_memory=0.0, loser_memory=0.0,
+            ))
+            await db.commit()
+
+            won = await manager.declare_winner(10, 2, {"id": "99", "runtime": "12 ms", "memory": "16.1 MB"}, db)
+            # The code fetch finds nothing, so the match keeps a NULL winner_code
+            await asyncio.gather(*manager._code_fetch_tasks)
+            match = await db.get(MatchHistory, 10)
+            return won, manager, match
+
+    won, manager, match = asyncio.run(scenario())
+    assert won
+    assert manager.leetcode_usernames == {3: "carol"}
+    assert manager.match_timers[10]["status"] == "completed"
+    assert (match.winner_id, match.winner_runtime, match.winner_code) == (2, 12, None)
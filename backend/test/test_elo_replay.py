@@ -0,0 +1,104 @@
+import asyncio
+import random
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import database, query_executor
+from src.database.models import Base, MatchHistory, User
+from src.matchmaking.elo_replay import EloParameters, replay, run_replay
+from src.matchmaking.elo_service import EloService
+
+
+def replay_sequentially(matches, user_count, initial_rating=1200):
+    ratings = [initial_rating] * user_count
+    games = [0] * user_count
+    changes = []
+    for winner, loser, resigned in matches:
+        winner_change, loser_change = EloService.calculate_match_rating_changes(
+            ratings[winner], ratings[loser], games[winner], games[loser], resigned
+        )
+        ratings[winner] += winner_change
+        ratings[loser] += loser_change
+        games[winner] += 1
+        games[loser] += 1
+        changes.append((winner_change, loser_change))
+    return ratings, changes
+
+
+def test_replay_matches_sequential_elo_service():
+    rng = random.Random(7)
+    user_count = 60
+    matches = []
+    for _ in range(5000):
+        winner, loser = rng.sample(range(user_count), 2)
+        matches.append((winner, loser, rng.random() < 0.1))
+
+    expected_ratings, expected_changes = replay_sequentially(matches, user_count)
+    winners, losers, resigned = (np.array(column) for column in zip(*matches))
+    result = replay(winners, losers, resigned, np.full(user_count, 1200))
+
+    assert result.ratings.tolist() == expected_ratings
+    assert list(zip(result.winner_changes.tolist(), result.loser_changes.tolist())) == expected_changes
+    assert result.games_played.sum() == 2 * len(matches)
+    # Many matches share a round, otherwise nothing was vectorized
+    assert result.rounds < len(matches) / 5
+
+
+def test_replay_uses_given_parameters():
+    params = EloParameters.current()
+    params.resignation_penalty = 10
+    result = replay(np.array([0]), np.array([1]), np.array([True]), np.array([1200, 1200]), params)
+    assert result.loser_changes.tolist() == [-20 - 10]
+
+
+def test_run_replay_reports_and_applies_differences(tmp_path, monkeypatch):
+    engine = database.create_engine_from_url(f"sqlite+aiosqlite:///{tmp_path / 'replay.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(query_executor, "AsyncSessionLocal", session_factory)
+
+    def match(winner_id, loser_id, resigned=False, **overrides):
+        fields = dict(
+            winner_id=winner_id, loser_id=loser_id, leetcode_problem="two-sum", elo_change=1,
+            winner_elo_change=1, loser_elo_change=-1, winner_elo=1201, loser_elo=1199, match_seconds=60,
+            winner_runtime=-1 if resigned else 5, loser_runtime=-1, winner_memory=-1.0, loser_memory=-1.0,
+            winner_code=None if resigned else "return []",
+        )
+        fields.update(overrides)
+        return MatchHistory(**fields)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x", user_elo=1200) for i in (1, 2, 3)])
+            await db.flush()
+            db.add_all([
+                match(1, 2),
+                match(1, 2, resigned=True),
+                # Submission win whose code fetch failed: still not a resignation
+                match(2, 1, winner_code=None),
+                # Pending match: not replayed
+                match(2, 3, leetcode_problem="TBD", elo_change=0, winner_elo_change=0, loser_elo_change=0),
+            ])
+            await db.commit()
+
+        report = await run_replay(apply=True)
+
+        async with session_factory() as db:
+            ratings = {user.id: user.user_elo for user in (await db.execute(select(User))).scalars()}
+            changes = [
+                (m.winner_elo_change, m.loser_elo_change)
+                for m in (await db.execute(select(MatchHistory).order_by(MatchHistory.match_id))).scalars()
+            ]
+        await engine.dispose()
+        return report, ratings, changes
+
+    report, ratings, changes = asyncio.run(scenario())
+
+    expected_ratings, expected_changes = replay_sequentially([(0, 1, False), (0, 1, True), (1, 0, False)], 2)
+    assert report["matches"] == 3 and report["resignations"] == 1
+    assert report["users_changed"] == 2 and report["matches_changed"] == 3
+    assert [ratings[1], ratings[2], ratings[3]] == expected_ratings + [1200]
+    assert changes == expected_changes + [(0, 0)]
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from scripts.fake_leetcode_server import FakeConfig, FakeLeetCode, create_app
+from src.leetcode.service import graphql_queries
+from src.leetcode.service.client import LeetCodeGraphQLClient
+from src.leetcode.service.leetcode_service import LeetCodeService
+
+
+def post(client, query, variables=None):
+    return client.post("/graphql", json={"query": query, "variables": variables or {}})
+
+
+def test_serves_every_backend_query():
+    fake = FakeLeetCode(problem_count=30)
+    client = TestClient(create_app(fake))
+    client.post("/_control/accept", json={"username": "alice", "titleSlug": "fake-problem-3"})
+    submission_id = fake.submissions["alice"][0]["id"]
+
+    variables = {
+        "PROFILE_QUERY": {"username": "alice"},
+        "PROBLEM_QUERY": {"titleSlug": "fake-problem-3"},
+        "RANDOM_QUESTION_QUERY": {"filtersV2": {"difficultyFilter": {"difficulties": ["HARD"]}}},
+        "RECENT_AC_SUBMISSIONS_QUERY": {"username": "alice"},
+        "QUESTION_STATS_QUERY": {"username": "alice"},
+        "SUBMISSION_DETAILS_QUERY": {"submissionId": int(submission_id)},
+    }
+    for name in dir(graphql_queries):
+        if name.endswith("_QUERY"):
+            body = post(client, getattr(graphql_queries, name), variables.get(name)).json()
+            assert "errors" not in body, name
+            assert all(value is not None for value in body["data"].values()), name
+
+
+def test_unknown_query_returns_graphql_errors():
+    client = TestClient(create_app(FakeLeetCode(problem_count=5)))
+    response = post(client, "query userContestRanking($username: String!) { userContestRanking { rating } }")
+    assert response.status_code == 200
+    assert response.json() == {"data": None, "errors": [{"message": "Unsupported query: userContestRanking"}]}
+
+
+def test_injected_failures():
+    fake = FakeLeetCode(config=FakeConfig(error_rate=1.0))
+    client = TestClient(create_app(fake))
+    assert post(client, graphql_queries.PROBLEM_QUERY, {"titleSlug": "fake-problem-1"}).status_code == 500
+
+    client.post("/_control/config", json={"error_rate": 0.0, "rate_limit": 0.001, "burst": 2})
+    statuses = [post(client, graphql_queries.PROBLEM_QUERY, {"titleSlug": "fake-problem-1"}).status_code
+                for _ in range(4)]
+    assert statuses == [200, 200, 429, 429]
+    assert fake.failures == {"http_500": 1, "rate_limited": 2}
+
+
+def test_service_runs_against_fake(monkeypatch):
+    # Route the real client through the fake app in-process instead of the network
+    app = create_app(FakeLeetCode(problem_count=30))
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: real_client(
+        transport=httpx.ASGITransport(app=app), base_url="http://fake", **kwargs
+    ))
+    monkeypatch.setattr(LeetCodeGraphQLClient, "BASE_URL", "http://fake/graphql")
+
+    problem = asyncio.run(LeetCodeService.get_random_problem(difficulty=["MEDIUM"]))
+    assert problem.difficulty == "Medium"
+    assert asyncio.run(LeetCodeService.get_user_stats("bob")).total_solved == 0
@@ -0,0 +1,153 @@
+import asyncio
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import undefer_group
+
+from src.database import database
+from src.database.models import Base, MatchHistory, RatingPeriod, User
+from src.matchmaking.glicko2 import process_rating_period, rate_period
+from src.matchmaking.websocket_manager import WebSocketManager
+
+
+def test_rate_period_matches_glickman_example():
+    # Player 0 (1500/200) beats 1400/30, loses to 1550/100 and 1700/300
+    ratings, deviations, volatilities = rate_period(
+        [1500, 1400, 1550, 1700], [200, 30, 100, 300], [0.06] * 4,
+        winner_idx=np.array([0, 2, 3]), loser_idx=np.array([1, 0, 0]),
+    )
+    assert ratings[0] == pytest.approx(1464.06, abs=0.01)
+    assert deviations[0] == pytest.approx(151.52, abs=0.01)
+    assert volatilities[0] == pytest.approx(0.05999, abs=0.00001)
+
+
+def test_inactive_players_only_become_less_certain():
+    ratings, deviations, volatilities = rate_period([1600, 1500], [50, 350], [0.06, 0.06], np.array([]), np.array([]))
+    assert ratings.tolist() == [1600, 1500]
+    assert 50 < deviations[0] < 60
+    assert deviations[1] == 350  # Capped at the starting deviation
+
+
+def test_rating_deviation_widens_the_search_window():
+    manager = WebSocketManager()
+    assert manager.get_elo_range_for_wait_time(10) == 100
+    assert manager.get_elo_range_for_wait_time(10, rating_deviation=350) == 350
+    # A settled rating falls back to the wait-time window
+    assert manager.get_elo_range_for_wait_time(400, rating_deviation=40) == 500
+
+
+def test_process_rating_period_rates_each_match_once(tmp_path):
+    engine = database.create_engine_from_url(f"sqlite+aiosqlite:///{tmp_path / 'glicko.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x") for i in (1, 2, 3)])
+            await db.flush()
+            db.add(MatchHistory(
+                winner_id=1, loser_id=2, leetcode_problem="two-sum", elo_change=16, winner_elo=1216,
+                loser_elo=1184, match_seconds=60, winner_runtime=5, loser_runtime=-1, winner_memory=1.0,
+                loser_memory=-1.0,
+            ))
+            await db.commit()
+
+        results = []
+        for _ in range(2):
+            async with session_factory() as db:
+                results.append(await process_rating_period(db))
+                await db.commit()
+
+        async with session_factory() as db:
+            glicko = undefer_group("glicko2")
+            users = {user.id: user for user in (await db.execute(select(User).options(glicko))).scalars()}
+            match = (await db.execute(select(MatchHistory).options(glicko))).scalar_one()
+            periods = (await db.execute(select(RatingPeriod))).scalars().all()
+        await engine.dispose()
+        return results, users, match, periods
+
+    results, users, match, periods = asyncio.run(scenario())
+
+    assert results[0]["matches"] == 1 and results[0]["players"] == 2
+    assert results[1]["matches"] == 0
+    assert len(periods) == 1 and match.rating_period_id == periods[0].period_id
+    assert users[1].glicko_rating > 1500 > users[2].glicko_rating
+    assert users[1].glicko_rd < 350 and users[3].glicko_rd == 350
+
+
+def test_null_glicko_values_count_as_starting_values(tmp_path, monkeypatch):
+    from sqlalchemy import text
+    from src.matchmaking import websocket_manager as manager_module
+
+    engine = database.create_engine_from_url(f"sqlite+aiosqlite:///{tmp_path / 'glicko.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x") for i in (1, 2)])
+            await db.flush()
+            await db.execute(text(
+                "UPDATE users SET glicko_rating = NULL, glicko_rd = NULL, glicko_volatility = NULL WHERE user_id = 2"
+            ))
+            db.add(MatchHistory(
+                winner_id=1, loser_id=2, leetcode_problem="two-sum", elo_change=16, winner_elo=1216,
+                loser_elo=1184, match_seconds=60, winner_runtime=5, loser_runtime=-1, winner_memory=1.0,
+                loser_memory=-1.0,
+            ))
+            await db.commit()
+        async with session_factory() as db:
+            await process_rating_period(db)
+            await db.commit()
+        async with session_factory() as db:
+            rows = (await db.execute(text(
+                "SELECT glicko_rating, glicko_rd, glicko_volatility FROM users ORDER BY user_id"
+            ))).all()
+        await engine.dispose()
+        return rows
+
+    rows = asyncio.run(scenario())
+    expected = rate_period([1500, 1500], [350, 350], [0.06, 0.06], np.array([0]), np.array([1]))
+    assert [tuple(row) for row in rows] == pytest.approx(list(zip(*expected)))
+
+    monkeypatch.setattr(manager_module, "RATING_SYSTEM", "glicko2")
+    unrated = User(id=3, email="user3@example.com", hashed_password="x", user_elo=1300)
+    assert WebSocketManager().queue_rating(unrated) == (1500, 350)
+
+
+def test_elo_mode_runs_without_glicko_columns(tmp_path):
+    from sqlalchemy import MetaData, Table
+
+    engine = database.create_engine_from_url(f"sqlite+aiosqlite:///{tmp_path / 'elo.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    # The schema as it was before scripts.migrate_glicko2
+    glicko_columns = {"glicko_rating", "glicko_rd", "glicko_volatility", "rating_period_id"}
+    legacy = MetaData()
+    for table in Base.metadata.sorted_tables:
+        Table(table.name, legacy, *(column._copy() for column in table.columns if column.name not in glicko_columns))
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(legacy.create_all)
+        async with session_factory() as db:
+            db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x") for i in (1, 2)])
+            await db.flush()
+            db.add(MatchHistory(
+                winner_id=1, loser_id=2, leetcode_problem="two-sum", elo_change=16, winner_elo=1216,
+                loser_elo=1184, match_seconds=60, winner_runtime=5, loser_runtime=-1, winner_memory=1.0,
+                loser_memory=-1.0,
+            ))
+            await db.commit()
+        async with session_factory() as db:
+            users = (await db.execute(select(User).order_by(User.id))).scalars().all()
+            match = (await db.execute(select(MatchHistory))).scalar_one()
+            ratings = [WebSocketManager().queue_rating(user) for user in users]
+        await engine.dispose()
+        return ratings, match.winner_id
+
+    assert asyncio.run(scenario()) == ([(1200, None), (1200, None)], 1)
@@ -0,0 +1,54 @@
+import json
+import logging
+
+from src.logging_config import JsonFormatter, SampledLogger, parse_levels
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_parse_levels():
+    assert parse_levels("matchmaking=debug, leetcode=WARNING,bogus") == {
+        "matchmaking": "DEBUG",
+        "leetcode": "WARNING",
+    }
+
+
+def test_sampled_logger_suppresses_repeats():
+    logger = logging.getLogger("app.test_sampled")
+    logger.setLevel(logging.DEBUG)
+    handler = ListHandler()
+    logger.addHandler(handler)
+
+    sampled = SampledLogger(logger, interval=60)
+    for i in range(5):
+        sampled.debug("pair", "rejected %s", i)
+    sampled.debug("other", "different key")
+    assert handler.messages == ["rejected 0", "different key"]
+
+    # Once the interval passes the next line reports what was skipped
+    sampled.interval = 0
+    sampled.debug("pair", "rejected %s", 5)
+    assert handler.messages[-1] == "rejected 5 (+4 similar suppressed)"
+
+    # Disabled levels are skipped before any bookkeeping
+    logger.setLevel(logging.INFO)
+    sampled.debug("pair", "hidden")
+    assert len(handler.messages) == 3
+    logger.removeHandler(handler)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.getLogger("app.matchmaking").makeRecord(
+        "app.matchmaking", logging.INFO, __file__, 1, "match %s", (7,), None, extra={"match_id": 7}
+    )
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["category"] == "matchmaking"
+    assert entry["msg"] == "match 7"
+    assert entry["match_id"] == 7
@@ -0,0 +1,500 @@
+import json
+import asyncio
+import pytest
+from src.matchmaking.connection import ConnectionSender
+from src.matchmaking.encoding import EncodedMessage
+
+
+class FakeWebSocket:
+    """Records sent frames; optionally blocks to simulate a slow client"""
+
+    def __init__(self, block: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.block = block
+
+    async def send_text(self, data: str):
+        if self.block:
+            await asyncio.sleep(3600)
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_messages_are_delivered_in_order():
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = ConnectionSender(1, ws, on_close=lambda *_: None)
+        sender.start()
+        for countdown in [3, 2, 1]:
+            sender.enqueue({"type": "timer_update", "countdown": countdown})
+        await asyncio.sleep(0.01)
+        sender.close()
+        return ws.sent
+
+    sent = run(scenario())
+    assert [json.loads(frame)["countdown"] for frame in sent] == [3, 2, 1]
+
+
+def test_queue_status_is_coalesced():
+    async def scenario():
+        ws = FakeWebSocket()
+        sender = ConnectionSender(1, ws, on_close=lambda *_: None)
+        # Writer not started yet, so both messages stay pending
+        sender.enqueue({"type": "queue_status", "wait_time": 10})
+        sender.enqueue({"type": "queue_status", "wait_time": 20})
+        assert sender.pending_count == 1
+        sender.start()
+        await asyncio.sleep(0.01)
+        sender.close()
+        return ws.sent
+
+    sent = run(scenario())
+    assert [json.loads(frame) for frame in sent] == [{"type": "queue_status", "wait_time": 20}]
+
+
+def test_status_messages_dropped_before_disconnecting():
+    async def scenario():
+        closed = []
+        ws = FakeWebSocket()
+        sender = ConnectionSender(1, ws, on_close=lambda user_id, _: closed.append(user_id), max_size=2)
+        sender.enqueue({"type": "queue_status"})
+        sender.enqueue({"type": "timer_update", "countdown": 3})
+        # Full: the status update makes room for the important message
+        assert sender.enqueue({"type": "timer_update", "countdown": 2})
+        assert sender.dropped_messages == 1
+        # Full of important messages: dropping status is fine, more important ones disconnect
+        assert not sender.enqueue({"type": "pong"})
+        assert not sender.enqueue({"type": "match_found"})
+        await asyncio.sleep(0)
+        return closed, ws.closed_with
+
+    closed, close_code = run(scenario())
+    assert closed == [1]
+    assert close_code == 1013
+
+
+def test_stuck_socket_times_out_and_closes():
+    async def scenario():
+        closed = []
+        ws = FakeWebSocket(block=True)
+        sender = ConnectionSender(1, ws, on_close=lambda user_id, _: closed.append(user_id), send_timeout=0.01)
+        sender.start()
+        sender.enqueue({"type": "match_found"})
+        await asyncio.sleep(0.05)
+        return closed, sender.closed
+
+    closed, is_closed = run(scenario())
+    assert closed == [1]
+    assert is_closed
+
+
+def test_reconnect_while_queued_keeps_queue_entry():
+    import time
+    from src.matchmaking.connection import REPLACED_CLOSE_CODE
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    async def scenario():
+        manager = WebSocketManager()
+        manager._start_queue_updates = lambda: None
+        old_ws, new_ws = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(old_ws, 1)
+        manager.queue[1] = {"elo": 1200, "rating_deviation": None, "websocket": old_ws, "join_time": time.time()}
+
+        await manager.connect(new_ws, 1)
+        await manager.send_to_user(1, {"type": "pong"})
+        await asyncio.sleep(0.01)
+        # Disconnecting the replaced socket later must not touch the new connection
+        manager.disconnect(1, old_ws)
+        queue, current = dict(manager.queue), manager.active_connections.get(1)
+        manager.disconnect(1)
+        return queue, current, old_ws, new_ws
+
+    queue, current, old_ws, new_ws = run(scenario())
+    assert queue[1]["websocket"] is new_ws and current is new_ws
+    assert old_ws.closed_with == REPLACED_CLOSE_CODE
+    assert [json.loads(frame) for frame in new_ws.sent] == [{"type": "pong"}]
+
+
+def test_broadcast_payload_is_encoded_once():
+    async def scenario():
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        senders = [ConnectionSender(i, ws, on_close=lambda *_: None, binary_frames=(i == 1))
+                   for i, ws in enumerate(sockets)]
+        message = EncodedMessage({"type": "timer_update", "phase": "start"})
+        for sender in senders:
+            sender.start()
+            sender.enqueue(message)
+        await asyncio.sleep(0.01)
+        for sender in senders:
+            sender.close()
+        return message, sockets
+
+    message, sockets = run(scenario())
+    # Text client gets the shared decoded string, binary client the shared bytes
+    assert sockets[0].sent[0] is message.text
+    assert sockets[1].sent[0] is message.data
+
+
+def test_unencodable_message_is_dropped_not_raised():
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    async def scenario():
+        manager = WebSocketManager()
+        ws = FakeWebSocket()
+        sender = ConnectionSender(1, ws, on_close=lambda *_: None)
+        manager.senders[1] = sender
+        sender.start()
+        await manager.send_to_user(1, {"type": "match_found", "problem": object()})
+        await manager.broadcast([1], {"type": "timer_update", "elapsed": {1, 2}})
+        await manager.send_to_user(1, {"type": "timer_update", "phase": "start"})
+        await asyncio.sleep(0.01)
+        sender.close()
+        return ws.sent
+
+    sent = run(scenario())
+    assert [json.loads(frame) for frame in sent] == [{"type": "timer_update", "phase": "start"}]
+
+
+def test_potential_matches_agree_with_pairwise_scan():
+    import random
+    from src.matchmaking.queue_stats import count_potential_matches
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    rng = random.Random(7)
+    now = 10_000.0
+    range_for_wait = WebSocketManager().get_elo_range_for_wait_time
+
+    def pair_range(a, b):
+        # The range try_match_players uses for a pair
+        wait = max(now - a["join_time"], now - b["join_time"])
+        return range_for_wait(wait, max(a.get("rating_deviation") or 0, b.get("rating_deviation") or 0))
+
+    # Elo mode, then Glicko-2 mode where some players carry wide rating deviations
+    for deviations in ([None], [None, 40.0, 120.0, 350.0]):
+        queue = {
+            user_id: {
+                "elo": rng.randint(800, 2000), "join_time": now - rng.uniform(0, 700),
+                "rating_deviation": rng.choice(deviations),
+            }
+            for user_id in range(300)
+        }
+
+        statuses = count_potential_matches(queue, now, range_for_wait)
+
+        for user_id, user_data in queue.items():
+            expected = sum(
+                1 for other_id, other_data in queue.items()
+                if other_id != user_id and abs(user_data["elo"] - other_data["elo"]) <= pair_range(user_data, other_data)
+            )
+            assert statuses[user_id]["potential_matches"] == expected
+            assert statuses[user_id]["elo_range"] == range_for_wait(
+                now - user_data["join_time"], user_data["rating_deviation"]
+            )
+
+
+def test_glicko_queue_status_counts_pairs_the_matcher_accepts(monkeypatch):
+    import time
+    from src.matchmaking import websocket_manager as manager_module
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    monkeypatch.setattr(manager_module, "RATING_SYSTEM", "glicko2")
+    manager = WebSocketManager()
+    now = time.time()
+    # A new player (wide deviation) and a settled one 300 points apart, both just queued
+    manager.queue = {
+        1: {"elo": 1500, "rating_deviation": 350.0, "websocket": None, "join_time": now},
+        2: {"elo": 1800, "rating_deviation": 40.0, "websocket": None, "join_time": now},
+    }
+    sent = {}
+
+    async def send_to_user(user_id, message):
+        sent[user_id] = message
+
+    monkeypatch.setattr(manager, "send_to_user", send_to_user)
+    run(manager._send_queue_updates())
+
+    assert (sent[1]["elo_range"], sent[1]["potential_matches"]) == (350, 1)
+    # The settled player searches ±100 but the matcher would still pair them via the other's window
+    assert (sent[2]["elo_range"], sent[2]["potential_matches"]) == (100, 1)
+
+
+def test_elo_histogram_buckets():
+    from src.matchmaking.queue_stats import elo_histogram
+
+    queue = {1: {"elo": 1200}, 2: {"elo": 1299}, 3: {"elo": 1450}}
+    assert elo_histogram(queue) == [
+        {"elo_min": 1200, "elo_max": 1299, "count": 2},
+        {"elo_min": 1400, "elo_max": 1499, "count": 1},
+    ]
+
+
+def test_resolve_problem_filters_falls_back_when_preferences_do_not_overlap():
+    from types import SimpleNamespace
+    from src.matchmaking.service import resolve_problem_filters
+
+    shared = resolve_problem_filters(
+        SimpleNamespace(topics=["0", "1"], difficulty=["1", "2"]),
+        SimpleNamespace(topics=["1", "5"], difficulty=["2", "3"]),
+    )
+    assert shared == (["string"], ["MEDIUM"], False)
+
+    topics, difficulty, fallback_used = resolve_problem_filters(
+        SimpleNamespace(topics=["0"], difficulty=["1"]),
+        SimpleNamespace(topics=["5"], difficulty=["3"]),
+    )
+    assert fallback_used
+    assert sorted(topics) == ["array", "sorting"] and sorted(difficulty) == ["EASY", "HARD"]
+
+    assert resolve_problem_filters(
+        SimpleNamespace(topics=None, difficulty=None), SimpleNamespace(topics=[], difficulty=[])
+    ) == (["array", "string", "hash-table"], ["MEDIUM"], True)
+
+
+def test_submit_solution_releases_db_and_fetches_code_after_result(tmp_path, monkeypatch):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from src.database import database
+    from src.database.models import Base, MatchHistory, User
+    from src.leetcode.schemas import Problem
+    from src.leetcode.service.leetcode_service import LeetCodeService
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    engine = database.create_engine_from_url(f"sqlite+aiosqlite:///{tmp_path / 'submit.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+
+    events = []
+    manager = WebSocketManager()
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add_all([
+                User(id=1, email="a@example.com", hashed_password="x", leetcode_username="alice"),
+                User(id=2, email="b@example.com", hashed_password="x", leetcode_username="bob"),
+            ])
+            await db.flush()
+            match = MatchHistory(
+                winner_id=1, loser_id=2, leetcode_problem="TBD", elo_change=0, winner_elo=1200, loser_elo=1200,
+                match_seconds=0, winner_runtime=0, loser_runtime=0, winner_memory=0.0, loser_memory=0.0,
+            )
+            db.add(match)
+            await db.commit()
+            match_id = match.match_id
+
+        manager.match_problems[match_id] = Problem(
+            id=1, title="Two Sum", slug="two-sum", difficulty="Easy", tags=["array"], acceptance_rate="55"
+        )
+
+        async with session_factory() as db:
+            async def get_user_submissions(username):
+                events.append(("submissions", username, db.in_transaction()))
+                return [{"id": 99, "titleSlug": "two-sum", "runtime": "5 ms", "memory": "17.1 MB"}]
+
+            async def get_submission_details(submission_id):
+                events.append(("details", submission_id))
+                return {"code": "return [0, 1]"}
+
+            async def send_to_user(user_id, message):
+                events.append((message["type"], user_id))
+
+            monkeypatch.setattr(LeetCodeService, "get_user_submissions", get_user_submissions)
+            monkeypatch.setattr(LeetCodeService, "get_submission_details", get_submission_details)
+            monkeypatch.setattr(manager, "send_to_user", send_to_user)
+
+            # The opponent submits: winner/loser are swapped
+            assert await manager.submit_solution(match_id, 2, db, frontend_seconds=90)
+            await asyncio.gather(*manager._code_fetch_tasks)
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(MatchHistory))).scalar_one()
+        await engine.dispose()
+        return stored
+
+    stored = run(scenario())
+
+    # No DB transaction is open while LeetCode is queried
+    assert events[0] == ("submissions", "bob", False)
+    # Both players hear the result before the code is fetched
+    assert events[1:] == [("match_completed", 2), ("match_completed", 1), ("details", 99)]
+    assert stored.winner_id == 2 and stored.elo_change != 0
+    assert stored.winner_runtime == 5 and stored.winner_memory == 17.1
+    assert stored.winner_code == "return [0, 1]"
+
+
+def test_submission_poller_declares_first_solver_once_per_round(monkeypatch):
+    from types import SimpleNamespace
+    from src.leetcode.service.leetcode_service import LeetCodeService
+    from src.matchmaking.submission_poller import SubmissionPoller
+
+    requests, declared = [], []
+
+    async def get_users_submissions(usernames):
+        requests.append(usernames)
+        return {username: {
+            "alice": [{"id": 1, "titleSlug": "two-sum", "timestamp": "1060"}],
+            "bob": [
+                {"id": 2, "titleSlug": "two-sum", "timestamp": "1030"},
+                {"id": 3, "titleSlug": "two-sum", "timestamp": "900"},  # solved before the match
+            ],
+        }[username] for username in usernames}
+
+    async def declare_winner(match_id, user_id, submission, db):
+        declared.append((match_id, user_id, submission["id"]))
+        return True
+
+    manager = SimpleNamespace(
+        match_timers={
+            10: {"start_time": 1000.0, "players": [1, 2], "status": "active"},
+            11: {"start_time": None, "players": [3, 4], "status": "countdown"},
+            12: {"start_time": 1000.0, "players": [5, 1], "status": "active"},
+        },
+        match_problems={10: SimpleNamespace(slug="two-sum"), 11: SimpleNamespace(slug="two-sum"),
+                        12: SimpleNamespace(slug="add-two-numbers")},
+        leetcode_usernames={1: "alice", 2: "bob", 3: "carol", 4: "dave", 5: "alice"},
+        declare_winner=declare_winner,
+    )
+    monkeypatch.setattr(LeetCodeService, "get_users_submissions", get_users_submissions)
+
+    completed = run(SubmissionPoller(manager, rate=0).poll_once())
+
+    # One batched request, each username once, none for matches still counting down
+    assert requests == [["alice", "bob"]]
+    # Bob solved it after the start and before Alice; match 12's problem is unsolved
+    assert declared == [(10, 2, 2)] and completed == 1
+
+
+def test_completed_problem_bitmasks_exclude_played_problems(monkeypatch):
+    import random
+    from src.matchmaking import service
+    from src.matchmaking.completed_problems import CompletedProblems, ProblemIndex
+
+    catalog = {
+        "two-sum": {"id": 1, "difficulty": "EASY", "paid_only": False, "topic_slugs": ["array", "hash-table"]},
+        "add-two-numbers": {"id": 2, "difficulty": "MEDIUM", "paid_only": False, "topic_slugs": ["linked-list"]},
+        "3sum": {"id": 15, "difficulty": "MEDIUM", "paid_only": False, "topic_slugs": ["array"]},
+        "premium": {"id": 16, "difficulty": "MEDIUM", "paid_only": True, "topic_slugs": ["array"]},
+    }
+    index = ProblemIndex(catalog)
+    assert index.bucket_mask(["array"], None) == index.mask(["two-sum", "3sum"])
+    assert index.bucket_mask(["array", "linked-list"], ["MEDIUM"]) == index.mask(["add-two-numbers", "3sum"])
+
+    history = {1: {"two-sum", "unknown"}, 2: {"3sum"}}
+    loads = []
+
+    async def get_completed_problems(db, user_id):
+        loads.append(user_id)
+        return history[user_id]
+
+    monkeypatch.setattr(service, "get_completed_problems", get_completed_problems)
+    completed = CompletedProblems()
+    completed.index = index
+
+    async def scenario():
+        excluded = await completed.get(None, 1) | await completed.get(None, 2)
+        eligible = index.bucket_mask(["array"], None) & ~excluded
+        completed.record([2], "add-two-numbers")
+        return eligible, await completed.get(None, 2)
+
+    eligible, user2 = run(scenario())
+    assert eligible == 0 and index.pick(eligible) is None
+    assert user2 == index.mask(["3sum", "add-two-numbers"]) and loads == [1, 2]
+    rng = random.Random(0)
+    assert {index.pick(index.bucket_mask(None, ["MEDIUM"]), rng) for _ in range(50)} == {"add-two-numbers", "3sum"}
+
+
+def test_fallback_tiers_prefer_priority_and_respect_deadline():
+    from src.matchmaking.service import select_problem_with_fallback
+
+    started, cancelled = [], []
+
+    def tier(name, delay, result):
+        async def select():
+            started.append(name)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return select
+
+    # The preferred tier succeeds last but still wins over the faster fallbacks
+    assert run(select_problem_with_fallback(
+        [tier("topics", 0.05, "p1"), tier("difficulty", 0.0, "p2"), tier("any", 0.0, "p3")], deadline=1, hedge=0,
+    )) == (0, "p1")
+
+    # A failed tier hands over at once, without waiting for its hedge delay
+    started.clear()
+    assert run(select_problem_with_fallback(
+        [tier("topics", 0.0, RuntimeError("upstream")), tier("difficulty", 0.0, "p2"), tier("any", 5, "p3")],
+        deadline=1, hedge=10,
+    )) == (1, "p2")
+    assert started == ["topics", "difficulty"]
+
+    # At the deadline a stuck tier is cancelled and the best finished tier is used
+    cancelled.clear()
+    assert run(select_problem_with_fallback(
+        [tier("topics", 5, "p1"), tier("difficulty", 0.0, {"error": "none left"}), tier("any", 0.0, "p3")],
+        deadline=0.05, hedge=0,
+    )) == (2, "p3")
+    assert cancelled == ["topics"]
+
+    assert run(select_problem_with_fallback([tier("only", 0.0, {"error": "none left"})], deadline=1)) == (
+        None, {"error": "none left"}
+    )
+
+    # No tier finishes in time: everything still running is cancelled and the last error is returned
+    cancelled.clear()
+    assert run(select_problem_with_fallback(
+        [tier("topics", 0.0, {"error": "none left"}), tier("difficulty", 5, "p2"), tier("any", 5, "p3")],
+        deadline=0.05, hedge=0,
+    )) == (None, {"error": "none left"})
+    assert sorted(cancelled) == ["any", "difficulty"]
+
+    cancelled.clear()
+    assert run(select_problem_with_fallback([tier("topics", 5, "p1")], deadline=0.05)) == (None, None)
+    assert cancelled == ["topics"]
+
+
+def test_problem_pool_serves_popular_buckets(monkeypatch):
+    from src.leetcode.schemas import Problem
+    from src.leetcode.service.leetcode_service import LeetCodeService
+    from src.matchmaking.problem_pool import ProblemPool
+
+    fetched = []
+
+    async def get_random_problem(topics=None, difficulty=None, excluded_slugs=None):
+        fetched.append((topics, difficulty))
+        n = len(fetched)
+        return Problem(id=n, title=f"P{n}", slug=f"p{n}", difficulty="Medium", tags=[], acceptance_rate="50")
+
+    monkeypatch.setattr(LeetCodeService, "get_random_problem", get_random_problem)
+    pool = ProblemPool(size=2, max_buckets=1)
+
+    # Cold bucket: a miss, but the request is remembered
+    assert pool.take(["array", "string"], ["MEDIUM"]) is None
+    pool.take(["graph"], ["HARD"])
+    pool.take(["string", "array"], ["MEDIUM"])
+
+    assert run(pool.fill()) == 2
+    assert fetched == [(["array", "string"], ["MEDIUM"])] * 2
+    assert list(pool.buckets) == [(("array", "string"), ("MEDIUM",))]
+
+    # Problems a player has played are skipped but stay pooled
+    assert pool.take(["array", "string"], ["MEDIUM"], accept=lambda p: p.slug != "p1").slug == "p2"
+    assert pool.take(["array", "string"], ["MEDIUM"]).slug == "p1"
+    assert pool.take(["array", "string"], ["MEDIUM"]) is None
+    assert pool.take(["graph"], ["HARD"]) is None
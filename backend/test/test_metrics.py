@@ -0,0 +1,48 @@
+import time
+
+from prometheus_client import REGISTRY, generate_latest
+
+from src.metrics.metrics import graphql_operation_name
+from src.leetcode.service.graphql_queries import RECENT_AC_SUBMISSIONS_QUERY
+from src.matchmaking.websocket_manager import websocket_manager
+
+
+def test_graphql_operation_name():
+    assert graphql_operation_name(RECENT_AC_SUBMISSIONS_QUERY) == "recentAcSubmissions"
+    assert graphql_operation_name("{ viewer { id } }") == "anonymous"
+
+
+def test_queue_metrics_read_live_queue(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(websocket_manager, "queue", {
+        1: {"elo": 1200, "join_time": now - 3},
+        2: {"elo": 1300, "join_time": now - 40},
+    })
+
+    output = generate_latest(REGISTRY).decode()
+    assert "matchmaking_queue_depth 2.0" in output
+    assert 'matchmaking_queue_wait_seconds_bucket{le="5"} 1.0' in output
+    assert 'matchmaking_queue_wait_seconds_bucket{le="+Inf"} 2.0' in output
+    # A snapshot: _gcount/_gsum gauges, no cumulative _count/_sum
+    assert "matchmaking_queue_wait_seconds_gcount 2.0" in output
+    assert "matchmaking_queue_wait_seconds_count" not in output
+
+
+def test_queue_leaves_record_finished_waits(monkeypatch):
+    import asyncio
+    from src.matchmaking.websocket_manager import WebSocketManager
+
+    def abandoned_count():
+        return REGISTRY.get_sample_value("matchmaking_queue_abandoned_wait_seconds_count") or 0.0
+
+    manager = WebSocketManager()
+    now = time.time()
+    manager.queue = {
+        1: {"elo": 1200, "join_time": now - 20},
+        2: {"elo": 1300, "join_time": now - 40},
+    }
+    before = abandoned_count()
+    asyncio.run(manager.leave_queue(1))
+    manager.disconnect(2)
+    manager.disconnect(3)  # Never queued
+    assert abandoned_count() == before + 2
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget for `import src.main` in a fresh interpreter
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+
+COLD_START_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from src.main import app
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("playwright", "PIL") if m in sys.modules]
+print(f"{elapsed}|{','.join(heavy)}")
+"""
+
+
+def cold_start():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    # App modules may print while importing; the measurement is the last line
+    elapsed, heavy = result.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [module for module in heavy.split(",") if module]
+
+
+def test_app_import_skips_heavy_modules():
+    _, heavy = cold_start()
+    assert heavy == []
+
+
+def test_app_cold_start_within_budget():
+    elapsed, _ = cold_start()
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"import src.main took {elapsed:.2f}s (budget {STARTUP_BUDGET_SECONDS}s)"
@@ -41,6 +41,8 @@ interface WebSocketMessage {
   potential_matches?: number;
 }
 
+const textDecoder = new TextDecoder();
+
 export const useMatchmakingWebSocket = (userId: number | null, onMatchCompleted?: () => void) => {
   const [isConnected, setIsConnected] = useState(false);
   const [isInQueue, setIsInQueue] = useState(false);
@@ -92,7 +94,9 @@ export const useMatchmakingWebSocket = (userId: number | null, onMatchCompleted?
   const connect = useCallback(() => {
     if (!userId || wsRef.current?.readyState === WebSocket.OPEN) return;
 
-    const ws = new WebSocket(`ws://127.0.0.1:8000/matchmaking/ws/matchmaking/${userId}`);
+    // Binary frames carry the server's pre-encoded JSON without a text round trip
+    const ws = new WebSocket(`ws://127.0.0.1:8000/matchmaking/ws/matchmaking/${userId}?frames=binary`);
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
 
     ws.onopen = () => {
@@ -103,7 +107,8 @@ export const useMatchmakingWebSocket = (userId: number | null, onMatchCompleted?
 
     ws.onmessage = (event) => {
       try {
-        const message: WebSocketMessage = JSON.parse(event.data);
+        const raw = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+        const message: WebSocketMessage = JSON.parse(raw);
         console.log('📨 Received:', message);
 
         switch (message.type) {